@@ -1,17 +1,23 @@
+import hashlib
 import json
-import tempfile
-from pathlib import Path
+import uuid
 from typing import Any
 
 import altair as alt
 import pandas as pd
 import streamlit as st
 
-from engine.analyzer import analyze_github_repo, analyzer
+from core.file_classifier import FileClassifier
+from core.github_clone import remote_head
+from core.mirror_cache import normalize_url
+from engine.analyzer import analyze_github_repo, analyze_source
+from engine.instrumentation import Instrumentation, summarize_performance
 from reports.json_report import generate_json_report
 
 SUPPORTED_EXTENSIONS = ["py", "cpp", "cc", "cxx", "java", "js"]
 DISPLAY_FILE_LIMIT = 50
+# Analyses kept in the session, so switching back to one is free
+ANALYSIS_HISTORY = 4
 
 st.set_page_config(page_title="Static Analyzer", page_icon="U0001F6F0", layout="wide")
 
@@ -232,22 +238,90 @@ def results_to_dataframe(results: list[dict[str, Any]]) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def run_uploaded_file_analysis(uploaded_files) -> list[dict[str, Any]]:
+def run_uploaded_file_analysis(uploaded_files, instrument: Instrumentation | None = None) -> list[dict[str, Any]]:
     results: list[dict[str, Any]] = []
     for uploaded in uploaded_files:
-        suffix = Path(uploaded.name).suffix or ".txt"
-        with tempfile.NamedTemporaryFile(delete=True, suffix=suffix) as tmp:
-            tmp.write(uploaded.read())
-            tmp.flush()
-            result = analyzer(tmp.name)
+        # Parse the upload's buffer directly, no temp file round-trip
+        result = analyze_source(uploaded.getbuffer(), name=uploaded.name, instrument=instrument)
 
         if result:
-            result["file"] = uploaded.name
             results.append(result)
 
     return results
 
 
+def upload_key(uploaded_files, record_performance: bool) -> str:
+    """Identity of an upload analysis: the files' names and content hashes."""
+    digests = sorted(
+        (uploaded.name, hashlib.sha256(uploaded.getbuffer()).hexdigest()) for uploaded in uploaded_files
+    )
+    return json.dumps(["upload", digests, record_performance])
+
+
+def repo_key(repo_url: str, revision: str | None, record_performance: bool, classify: bool, sparse: bool) -> str:
+    """Identity of a repository analysis: the normalized URL, commit SHA and options."""
+    return json.dumps(["repo", normalize_url(repo_url), revision, record_performance, classify, sparse])
+
+
+def recall_analysis(key: str) -> dict[str, Any] | None:
+    return st.session_state.setdefault("analyses", {}).get(key)
+
+
+def remember_analysis(mode: str, analysis: dict[str, Any]) -> None:
+    """Keep an analysis across reruns and make it the one shown for mode."""
+    analyses = st.session_state.setdefault("analyses", {})
+    analyses.pop(analysis["key"], None)
+    analyses[analysis["key"]] = analysis
+    while len(analyses) > ANALYSIS_HISTORY:
+        analyses.pop(next(iter(analyses)))
+    st.session_state.setdefault("current_analysis", {})[mode] = analysis["key"]
+
+
+def current_analysis(mode: str) -> dict[str, Any] | None:
+    key = st.session_state.setdefault("current_analysis", {}).get(mode)
+    return recall_analysis(key) if key is not None else None
+
+
+def analysis_frame(analysis: dict[str, Any]) -> pd.DataFrame:
+    """The analysis's metric DataFrame, built on first use and kept with it."""
+    if "frame" not in analysis:
+        analysis["frame"] = results_to_dataframe(analysis["results"])
+    return analysis["frame"]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def top_tables(key: str, search: str, _frame: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Top Cyclomatic, Halstead and OOP rows of analysis key matching search."""
+    filtered_frame = _frame
+    if search:
+        query = search.lower()
+        filtered_frame = _frame[
+            _frame["file"].str.lower().str.contains(query, na=False)
+            | _frame["language"].str.lower().str.contains(query, na=False)
+        ]
+
+    cyclomatic_top = (
+        filtered_frame[filtered_frame["cyclomatic_avg"] > 0]
+        .sort_values(["cyclomatic_avg", "cyclomatic_max"], ascending=False)
+        .head(DISPLAY_FILE_LIMIT)
+    )
+    halstead_top = (
+        filtered_frame[filtered_frame["halstead_effort"] > 0]
+        .sort_values(["halstead_effort", "halstead_volume"], ascending=False)
+        .head(DISPLAY_FILE_LIMIT)
+    )
+    oop_frame = filtered_frame.copy()
+    oop_frame["oop_total"] = (
+        oop_frame["classes"] + oop_frame["methods"] + oop_frame["attributes"] + oop_frame["inheritance"]
+    )
+    oop_top = (
+        oop_frame[oop_frame["oop_total"] > 0]
+        .sort_values(["oop_total", "classes", "methods"], ascending=False)
+        .head(DISPLAY_FILE_LIMIT)
+    )
+    return cyclomatic_top, halstead_top, oop_top
+
+
 def render_hero() -> None:
     st.markdown(
         """
@@ -307,8 +381,10 @@ def render_charts(frame: pd.DataFrame) -> None:
         st.altair_chart(line, use_container_width=True)
 
 
-def render_dashboard(results: list[dict[str, Any]], scope_name: str) -> None:
-    frame = results_to_dataframe(results)
+def render_dashboard(analysis: dict[str, Any]) -> None:
+    results = analysis["results"]
+    scope_name = analysis["title"]
+    frame = analysis_frame(analysis)
     if frame.empty:
         st.warning("Analysis completed but no metric rows were produced.")
         return
@@ -338,36 +414,14 @@ def render_dashboard(results: list[dict[str, Any]], scope_name: str) -> None:
         key="dashboard_search",
     ).strip()
 
-    filtered_frame = frame
-    if search:
-        query = search.lower()
-        filtered_frame = frame[
-            frame["file"].str.lower().str.contains(query, na=False)
-            | frame["language"].str.lower().str.contains(query, na=False)
-        ]
-
-    cyclomatic_top = (
-        filtered_frame[filtered_frame["cyclomatic_avg"] > 0]
-        .sort_values(["cyclomatic_avg", "cyclomatic_max"], ascending=False)
-        .head(DISPLAY_FILE_LIMIT)
-    )
-    halstead_top = (
-        filtered_frame[filtered_frame["halstead_effort"] > 0]
-        .sort_values(["halstead_effort", "halstead_volume"], ascending=False)
-        .head(DISPLAY_FILE_LIMIT)
-    )
-    oop_frame = filtered_frame.copy()
-    oop_frame["oop_total"] = (
-        oop_frame["classes"] + oop_frame["methods"] + oop_frame["attributes"] + oop_frame["inheritance"]
-    )
-    oop_top = (
-        oop_frame[oop_frame["oop_total"] > 0]
-        .sort_values(["oop_total", "classes", "methods"], ascending=False)
-        .head(DISPLAY_FILE_LIMIT)
-    )
+    cyclomatic_top, halstead_top, oop_top = top_tables(analysis["key"], search, frame)
 
     st.markdown("<div class='glass-panel'><b>Metric Views</b></div>", unsafe_allow_html=True)
-    tab_cyclomatic, tab_halstead, tab_oop = st.tabs(["Cyclomatic", "Halstead", "OOP"])
+    if "has_performance" not in analysis:
+        analysis["has_performance"] = any("performance" in result for result in results)
+    has_performance = analysis["has_performance"]
+    tab_names = ["Cyclomatic", "Halstead", "OOP"] + (["Performance"] if has_performance else [])
+    tab_cyclomatic, tab_halstead, tab_oop, *tab_performance = st.tabs(tab_names)
 
     with tab_cyclomatic:
         if cyclomatic_top.empty:
@@ -409,30 +463,81 @@ def render_dashboard(results: list[dict[str, Any]], scope_name: str) -> None:
             ]
             st.dataframe(table, use_container_width=True)
 
-    raw_json = generate_json_report(results)
-    summary_json = json.dumps(frame.to_dict(orient="records"), indent=2)
+    if tab_performance:
+        with tab_performance[0]:
+            render_performance(results)
 
     st.markdown("<div class='glass-panel'><b>Exports</b></div>", unsafe_allow_html=True)
     d1, d2 = st.columns(2)
+    # Payloads are serialized once per analysis and kept with it across reruns
+    exports = analysis.setdefault("exports", {})
+    if not exports:
+        exports["full"] = generate_json_report(results).encode("utf-8")
+        exports["summary"] = json.dumps(frame.to_dict(orient="records"), indent=2).encode("utf-8")
     d1.download_button(
         label=f"Download {scope_name} Full JSON",
-        data=raw_json,
+        data=exports["full"],
         file_name=f"{scope_name.lower().replace(' ', '_')}_analysis.json",
         mime="application/json",
+        on_click="ignore",
         use_container_width=True,
     )
     d2.download_button(
         label=f"Download {scope_name} Summary JSON",
-        data=summary_json,
+        data=exports["summary"],
         file_name=f"{scope_name.lower().replace(' ', '_')}_summary.json",
         mime="application/json",
+        on_click="ignore",
         use_container_width=True,
     )
 
-    with st.expander("Raw JSON"):
+    # An expander renders its body even when collapsed
+    if st.toggle("Show raw JSON", key="show_raw_json"):
         st.json(results)
 
 
+def render_performance(results: list[dict[str, Any]]) -> None:
+    performance = summarize_performance(results, top=DISPLAY_FILE_LIMIT)
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        render_kpi("Files Timed", str(performance["files"]))
+    with c2:
+        render_kpi("Wall Time", f"{performance['wall_ms'] / 1000:.2f}s")
+    with c3:
+        render_kpi("CPU Time", f"{performance['cpu_ms'] / 1000:.2f}s")
+    with c4:
+        render_kpi("Syntax Nodes", f"{performance['nodes']:,}")
+
+    if performance["cached"]:
+        st.caption(f"{performance['cached']} files came from the metric cache and were not timed.")
+
+    stages = pd.DataFrame(
+        [{"stage": name, **entry} for name, entry in performance["stages"].items()]
+    )
+    if not stages.empty:
+        chart = (
+            alt.Chart(stages)
+            .mark_bar()
+            .encode(
+                x=alt.X("wall_ms:Q", title="Wall time (ms)"),
+                y=alt.Y("stage:N", sort="-x", title=None),
+                tooltip=["stage", "wall_ms", "cpu_ms", "files"],
+            )
+            .properties(height=240)
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+    slowest = pd.DataFrame(performance["slowest_files"])
+    if not slowest.empty:
+        st.dataframe(slowest, use_container_width=True)
+
+    profiled = [result for result in results if "profile" in result.get("performance", {})]
+    for result in profiled:
+        with st.expander(f"Profile: {result['file']}"):
+            st.dataframe(pd.DataFrame(result["performance"]["profile"]), use_container_width=True)
+
+
 def render_empty_state() -> None:
     st.markdown(
         """
@@ -448,8 +553,8 @@ def render_empty_state() -> None:
 render_hero()
 
 input_mode = st.radio("Input Mode", ["Uploaded Files", "GitHub Repository"], horizontal=True, label_visibility="collapsed")
-results: list[dict[str, Any]] = []
-summary_title = "Analysis"
+record_performance = st.checkbox("Record performance (per-stage timings in a Performance tab)")
+instrumentation = Instrumentation() if record_performance else None
 
 if input_mode == "Uploaded Files":
     st.markdown("<div class='glass-panel'><b>Upload Source Files</b></div>", unsafe_allow_html=True)
@@ -464,9 +569,13 @@ if input_mode == "Uploaded Files":
         if not uploaded_files:
             st.error("Upload at least one supported source file.")
         else:
-            with st.spinner("Analyzing uploaded files..."):
-                results = run_uploaded_file_analysis(uploaded_files)
-                summary_title = "Uploaded Files"
+            key = upload_key(uploaded_files, record_performance)
+            analysis = recall_analysis(key)
+            if analysis is None:
+                with st.spinner("Analyzing uploaded files..."):
+                    results = run_uploaded_file_analysis(uploaded_files, instrument=instrumentation)
+                analysis = {"key": key, "title": "Uploaded Files", "results": results}
+            remember_analysis(input_mode, analysis)
 
 else:
     st.markdown("<div class='glass-panel'><b>Analyze GitHub Repository</b></div>", unsafe_allow_html=True)
@@ -476,29 +585,68 @@ else:
             placeholder="https://github.com/owner/repo.git",
             label_visibility="collapsed",
         )
+        classify = st.checkbox("Skip generated, minified and vendored files")
+        sparse = st.checkbox("Download only analyzable files (blob-less sparse clone)")
         submitted = st.form_submit_button("Analyze Repository", type="primary", use_container_width=True)
 
     if submitted:
         if not repo_url.strip():
             st.error("Enter a valid GitHub repository URL.")
         else:
-            progress_box = st.empty()
-
-            def progress_update(message: str) -> None:
-                progress_box.info(message)
-
-            with st.spinner("Cloning repository and running metrics..."):
-                try:
-                    output = analyze_github_repo(repo_url.strip(), progress_callback=progress_update)
-                    st.success(
-                        f"Scanned {output['total_files_scanned']} files and analyzed {output['total_files_analyzed']} files."
-                    )
-                    results = output.get("results", [])
-                    summary_title = "GitHub Repository"
-                except Exception as exc:
-                    st.error(f"Repository analysis failed: {exc}")
-
-if results:
-    render_dashboard(results, summary_title)
+            repo_url = repo_url.strip()
+            revision = remote_head(repo_url)
+            if revision is not None:
+                key = repo_key(repo_url, revision, record_performance, classify, sparse)
+                analysis = recall_analysis(key)
+            else:
+                # An unresolvable HEAD is analyzed every time, never reused
+                key = repo_key(repo_url, f"unresolved:{uuid.uuid4().hex}", record_performance, classify, sparse)
+                analysis = None
+
+            if analysis is None:
+                progress_box = st.empty()
+
+                def progress_update(message: str) -> None:
+                    progress_box.info(message)
+
+                with st.spinner("Cloning repository and running metrics..."):
+                    try:
+                        output = analyze_github_repo(
+                            repo_url, progress_callback=progress_update,
+                            classifier=FileClassifier() if classify else None,
+                            sparse=sparse, instrument=instrumentation
+                        )
+                        analysis = {
+                            "key": key,
+                            "title": "GitHub Repository",
+                            "results": output.get("results", []),
+                            "notice": f"Scanned {output['total_files_scanned']} files and analyzed {output['total_files_analyzed']} files.",
+                            "skipped_files": output.get("skipped_files", []),
+                        }
+                    except Exception as exc:
+                        st.error(f"Repository analysis failed: {exc}")
+
+            if analysis is not None:
+                remember_analysis(input_mode, analysis)
+
+analysis = current_analysis(input_mode)
+
+if analysis is not None and analysis.get("notice"):
+    st.success(analysis["notice"])
+    skipped_files = analysis.get("skipped_files", [])
+    if skipped_files:
+        with st.expander(f"Skipped {len(skipped_files)} generated, minified or vendored files"):
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {"file": s["file"], "kind": s["skipped"]["kind"], "reason": s["skipped"]["reason"]}
+                        for s in skipped_files
+                    ]
+                ),
+                use_container_width=True,
+            )
+
+if analysis is not None and analysis["results"]:
+    render_dashboard(analysis)
 else:
     render_empty_state()
@@ -0,0 +1,4 @@
+"""
+Benchmark suite: synthetic corpora, per-stage timings and regression gates.
+Run with `python -m benchmarks --help` from the repository root.
+"""
@@ -0,0 +1,74 @@
+"""
+Command line for the benchmark suite. From the repository root:
+
+  python -m benchmarks generate DIR [--seed N] [--scale X]
+  python -m benchmarks run [--corpus DIR] [--output FILE] [--repeat N]
+  python -m benchmarks compare BASELINE CURRENT [--threshold 0.10]
+
+compare exits with status 1 when any stage regressed past the threshold.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.corpus import PROFILES, generate_corpus
+from benchmarks.runner import (
+    compare_baselines, format_comparison, load_baseline, print_progress, run_benchmarks, save_baseline,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="StaticLens benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic corpus")
+    generate.add_argument("output_dir")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--scale", type=float, default=1.0)
+
+    run = commands.add_parser("run", help="time every stage and write a baseline")
+    run.add_argument("--corpus", help="corpus from 'generate' (default: a temporary one)")
+    run.add_argument("--output", help="baseline JSON path (default: stdout)")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--scale", type=float, default=1.0)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--profile", action="append", choices=PROFILES, help="profile to run (repeatable)")
+
+    compare = commands.add_parser("compare", help="fail if CURRENT regressed against BASELINE")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, as a fraction")
+    compare.add_argument("--min-seconds", type=float, default=0.005, help="ignore stages faster than this")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        written = generate_corpus(args.output_dir, seed=args.seed, scale=args.scale)
+        for profile, paths in written.items():
+            print(f"{profile}: {len(paths)} files")
+        return 0
+
+    if args.command == "run":
+        baseline = run_benchmarks(
+            corpus_dir=args.corpus, seed=args.seed, scale=args.scale, repeat=args.repeat,
+            profiles=tuple(args.profile or PROFILES), progress_callback=print_progress,
+        )
+        if args.output:
+            save_baseline(baseline, args.output)
+        else:
+            print(json.dumps(baseline, indent=2, sort_keys=True))
+        return 0
+
+    regressions, rows = compare_baselines(
+        load_baseline(args.baseline), load_baseline(args.current),
+        threshold=args.threshold, min_seconds=args.min_seconds,
+    )
+    print(format_comparison(rows, regressions))
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Deterministic synthetic corpora for benchmarking.
+
+Each profile stresses a different part of the pipeline:
+
+  small    many short files (per-file overhead, scanning, caching)
+  huge     a few very large files (parser and walk throughput)
+  nested   deeply nested control flow (recursion depth, cyclomatic)
+  classes  class-heavy code with inheritance (OOP metrics)
+
+The same seed and scale always produce byte-identical files.
+"""
+import os
+import random
+from abc import ABC, abstractmethod
+
+PROFILES = ("small", "huge", "nested", "classes")
+
+# Files per language and functions/classes per file, at scale 1.0
+PROFILE_SHAPES = {
+    "small": {"files": 150, "functions": 4},
+    "huge": {"files": 1, "functions": 1500},
+    "nested": {"files": 10, "depth": 40},
+    "classes": {"files": 10, "classes": 20, "methods": 5},
+}
+
+
+def _indent(lines, prefix):
+    return [prefix + line if line else line for line in lines]
+
+
+class _Emitter(ABC):
+    """Generates one language's syntax for the corpus profiles."""
+
+    extension = None
+
+    @abstractmethod
+    def statements(self, rng, depth=1):
+        """Lines of a random function body, nesting at most to depth 3."""
+
+    @abstractmethod
+    def function(self, name, rng):
+        """Lines of a function taking and returning an int n."""
+
+    @abstractmethod
+    def nested(self, name, depth):
+        """Lines of a function whose if/while statements nest depth deep."""
+
+    @abstractmethod
+    def klass(self, name, base, methods, rng):
+        """Lines of a class with fields and methods, extending base if given."""
+
+    def module(self, name, parts):
+        return "\n".join(line for part in parts for line in part) + "\n"
+
+
+class _PythonEmitter(_Emitter):
+    extension = ".py"
+
+    def statements(self, rng, depth=1):
+        lines = []
+        for i in range(rng.randint(2, 5)):
+            kind = rng.random()
+            if kind < 0.3 and depth < 3:
+                lines.append(f"if v{i} > {rng.randint(0, 99)} and v{i} % 3 != 0:")
+                lines.extend(_indent(self.statements(rng, depth + 1), "    "))
+            elif kind < 0.5 and depth < 3:
+                lines.append(f"for v{i} in range(n):")
+                lines.extend(_indent(self.statements(rng, depth + 1), "    "))
+            else:
+                lines.append(f"v{i} = (n * {rng.randint(1, 9)} + {rng.randint(0, 99)}) // 2")
+        return lines
+
+    def function(self, name, rng):
+        body = ["v0 = v1 = v2 = v3 = v4 = n"] + self.statements(rng) + ["return v0"]
+        return [f"def {name}(n):"] + _indent(body, "    ") + [""]
+
+    def nested(self, name, depth):
+        lines = [f"def {name}(n):"]
+        for level in range(depth):
+            keyword = "if" if level % 2 == 0 else "while"
+            lines.append("    " * (level + 1) + f"{keyword} n > {level}:")
+        lines.append("    " * (depth + 1) + "n -= 1")
+        lines.append("    return n")
+        return lines + [""]
+
+    def klass(self, name, base, methods, rng):
+        lines = [f"class {name}({base or 'object'}):", "    def __init__(self, n):"]
+        lines.extend(f"        self.a{i} = n + {i}" for i in range(rng.randint(2, 6)))
+        for method in range(methods):
+            method_lines = self.function(f"m{method}", rng)
+            method_lines[0] = f"def m{method}(self, n):"
+            lines.extend(_indent(method_lines, "    "))
+        return lines + [""]
+
+
+class _CLikeEmitter(_Emitter):
+    """Brace languages; subclasses fill in declarations."""
+
+    int_type = "int"
+
+    def statements(self, rng, depth=1):
+        lines = []
+        for i in range(rng.randint(2, 5)):
+            kind = rng.random()
+            if kind < 0.3 and depth < 3:
+                lines.append(f"if (v{i % 5} > {rng.randint(0, 99)} && v{i % 5} % 3 != 0) {{")
+                lines.extend(_indent(self.statements(rng, depth + 1), "    "))
+                lines.append("}")
+            elif kind < 0.5 and depth < 3:
+                lines.append(f"for ({self.int_type} i{depth} = 0; i{depth} < n; i{depth}++) {{")
+                lines.extend(_indent(self.statements(rng, depth + 1), "    "))
+                lines.append("}")
+            else:
+                lines.append(f"v{i % 5} = (n * {rng.randint(1, 9)} + {rng.randint(0, 99)}) / 2;")
+        return lines
+
+    def signature(self, name):
+        return f"int {name}(int n) {{"
+
+    def function(self, name, rng):
+        body = [f"{self.int_type} v0 = n, v1 = n, v2 = n, v3 = n, v4 = n;"] + self.statements(rng) + ["return v0;"]
+        return [self.signature(name)] + _indent(body, "    ") + ["}", ""]
+
+    def nested(self, name, depth):
+        lines = [self.signature(name)]
+        for level in range(depth):
+            keyword = "if" if level % 2 == 0 else "while"
+            lines.append("    " * (level + 1) + f"{keyword} (n > {level}) {{")
+        lines.append("    " * (depth + 1) + "n -= 1;")
+        for level in reversed(range(depth)):
+            lines.append("    " * (level + 1) + "}")
+        return lines + ["    return n;", "}", ""]
+
+
+class _JavaScriptEmitter(_CLikeEmitter):
+    extension = ".js"
+    int_type = "let"
+
+    def signature(self, name):
+        return f"function {name}(n) {{"
+
+    def klass(self, name, base, methods, rng):
+        lines = [f"class {name}{f' extends {base}' if base else ''} {{", "    constructor(n) {"]
+        if base:
+            lines.append("        super(n);")
+        lines.extend(f"        this.a{i} = n + {i};" for i in range(rng.randint(2, 6)))
+        lines.append("    }")
+        for method in range(methods):
+            method_lines = self.function(f"m{method}", rng)
+            method_lines[0] = f"m{method}(n) {{"
+            lines.extend(_indent(method_lines, "    "))
+        return lines + ["}", ""]
+
+
+class _JavaEmitter(_CLikeEmitter):
+    extension = ".java"
+
+    def signature(self, name):
+        return f"static int {name}(int n) {{"
+
+    def klass(self, name, base, methods, rng):
+        lines = [f"class {name}{f' extends {base}' if base else ''} {{"]
+        lines.extend(f"    int a{i};" for i in range(rng.randint(2, 6)))
+        for method in range(methods):
+            method_lines = self.function(f"m{method}", rng)
+            method_lines[0] = f"int m{method}(int n) {{"
+            lines.extend(_indent(method_lines, "    "))
+        return lines + ["}", ""]
+
+    def module(self, name, parts):
+        # Free functions must live in a class; classes stay top level
+        functions = [part for part in parts if part and not part[0].startswith("class ")]
+        classes = [part for part in parts if part and part[0].startswith("class ")]
+        lines = [line for part in classes for line in part]
+        if functions:
+            lines.append(f"public class {name} {{")
+            lines.extend(_indent([line for part in functions for line in part], "    "))
+            lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+class _CppEmitter(_CLikeEmitter):
+    extension = ".cpp"
+
+    def klass(self, name, base, methods, rng):
+        lines = [f"class {name}{f' : public {base}' if base else ''} {{", "public:"]
+        lines.extend(f"    int a{i};" for i in range(rng.randint(2, 6)))
+        for method in range(methods):
+            method_lines = self.function(f"m{method}", rng)
+            lines.extend(_indent(method_lines, "    "))
+        return lines + ["};", ""]
+
+
+EMITTERS = {
+    "python": _PythonEmitter(),
+    "javascript": _JavaScriptEmitter(),
+    "java": _JavaEmitter(),
+    "cpp": _CppEmitter(),
+}
+
+
+def _scaled(count, scale):
+    return max(1, int(round(count * scale)))
+
+
+def generate_file(language, profile, index, seed=0, scale=1.0):
+    """Source text of one corpus file; depends only on its arguments."""
+    emitter = EMITTERS[language]
+    shape = PROFILE_SHAPES[profile]
+    rng = random.Random(f"{seed}:{language}:{profile}:{index}")
+    name = f"{profile.capitalize()}{index}"
+
+    if profile == "nested":
+        depth = _scaled(shape["depth"], scale)
+        parts = [emitter.nested(f"nested_{i}", depth) for i in range(3)]
+    elif profile == "classes":
+        parts = []
+        for i in range(_scaled(shape["classes"], scale)):
+            # Every third class extends the previous one
+            base = f"C{index}_{i - 1}" if i and i % 3 else None
+            parts.append(emitter.klass(f"C{index}_{i}", base, shape["methods"], rng))
+    else:
+        count = shape["functions"] if profile == "small" else _scaled(shape["functions"], scale)
+        parts = [emitter.function(f"f_{i}", rng) for i in range(count)]
+
+    return emitter.module(name, parts)
+
+
+def generate_corpus(output_dir, seed=0, scale=1.0, profiles=PROFILES, languages=None):
+    """
+    Write the corpus as output_dir/<profile>/<language>/ files.
+
+    scale multiplies file counts for "small" and file sizes for the other
+    profiles.
+
+    Returns:
+        {profile: [file paths]}
+    """
+    languages = languages or sorted(EMITTERS)
+    written = {}
+
+    for profile in profiles:
+        shape = PROFILE_SHAPES[profile]
+        files = _scaled(shape["files"], scale) if profile == "small" else shape["files"]
+        paths = written.setdefault(profile, [])
+
+        for language in languages:
+            directory = os.path.join(output_dir, profile, language)
+            os.makedirs(directory, exist_ok=True)
+            extension = EMITTERS[language].extension
+
+            for index in range(files):
+                name = f"{profile.capitalize()}{index}" if language == "java" else f"{profile}_{index}"
+                path = os.path.join(directory, name + extension)
+                with open(path, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(generate_file(language, profile, index, seed, scale))
+                paths.append(path)
+
+    return written
@@ -0,0 +1,243 @@
+"""
+Time each pipeline stage over a corpus and record baselines.
+
+Stages, each timed separately over every file of a profile:
+
+  read            load_source()
+  parse           the language's source parser, on already read bytes
+  metric:<name>   one registered metric, on already parsed trees
+  metrics         all registered metrics together (one shared walk)
+  report:json     generate_json_report()
+  report:ndjson   write_ndjson_report()
+  report:html     generate_html_site()
+
+Each stage runs `repeat` times and the fastest run is kept. Peak memory
+is measured in one extra untimed run under tracemalloc, which sees
+Python allocations only (tree-sitter's own memory is not included).
+"""
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from core.source_loader import load_source
+from engine.analyzer import analyzer, detect_language
+from engine.metric_manager import MetricManager
+from engine.parser_manager import ParserManager
+from reports.html_report import generate_html_site
+from reports.json_report import generate_json_report, write_ndjson_report
+
+from benchmarks.corpus import PROFILES, generate_corpus
+
+BASELINE_VERSION = 1
+
+
+def _bytes(source):
+    return source if isinstance(source, bytes) else bytes(source)
+
+
+class _Fixture:
+    """Inputs of every stage for one profile, prepared once."""
+
+    def __init__(self, paths):
+        self.files = [(path, detect_language(path)) for path in paths]
+        self.size = sum(os.path.getsize(path) for path, _ in self.files)
+        self.sources = [_bytes(load_source(path)) for path, _ in self.files]
+        self.trees = [
+            ParserManager.get_source_parser(language)(source)
+            for (_, language), source in zip(self.files, self.sources)
+        ]
+        self.results = [analyzer(path) for path, _ in self.files]
+
+
+def _stages(fixture, scratch):
+    def read():
+        for path, _ in fixture.files:
+            load_source(path)
+
+    def parse():
+        for (_, language), source in zip(fixture.files, fixture.sources):
+            ParserManager.get_source_parser(language)(source)
+
+    def metrics(names=None):
+        def run():
+            for (path, language), tree in zip(fixture.files, fixture.trees):
+                MetricManager.run_all(tree, path, language, metrics=names)
+        return run
+
+    def report_json():
+        generate_json_report(fixture.results, os.path.join(scratch, "report.json"))
+
+    def report_ndjson():
+        write_ndjson_report(fixture.results, os.path.join(scratch, "report.ndjson"))
+
+    def report_html():
+        site = os.path.join(scratch, "site")
+        shutil.rmtree(site, ignore_errors=True)
+        generate_html_site(fixture.results, site)
+
+    stages = [("read", read), ("parse", parse)]
+    stages.extend(
+        (f"metric:{metric.name}", metrics([metric.name]))
+        for metric in MetricManager.registered()
+        if metric.name
+    )
+    stages.append(("metrics", metrics()))
+    stages.extend([
+        ("report:json", report_json),
+        ("report:ndjson", report_ndjson),
+        ("report:html", report_html),
+    ])
+    return stages
+
+
+def time_stage(run, repeat):
+    """Fastest of repeat runs, in seconds, and peak traced memory in bytes."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def run_benchmarks(corpus_dir=None, seed=0, scale=1.0, repeat=3, profiles=PROFILES, progress_callback=None):
+    """
+    Benchmark every stage on every profile.
+
+    Args:
+        corpus_dir: Existing generate_corpus() output; a temporary corpus
+            is generated (and removed) if None
+        seed, scale: Corpus parameters, recorded in the baseline
+        repeat: Timed runs per stage
+        profiles: Profiles to run
+        progress_callback: Called with a message per stage
+
+    Returns:
+        Baseline dict, see save_baseline()
+    """
+    temporary = corpus_dir is None
+    if temporary:
+        corpus_dir = tempfile.mkdtemp(prefix="staticlens_corpus_")
+        generate_corpus(corpus_dir, seed=seed, scale=scale, profiles=profiles)
+
+    scratch = tempfile.mkdtemp(prefix="staticlens_bench_")
+    results = {}
+
+    try:
+        for profile in profiles:
+            profile_dir = os.path.join(corpus_dir, profile)
+            paths = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(profile_dir)
+                for name in names
+                if detect_language(name)
+            )
+            if not paths:
+                continue
+
+            fixture = _Fixture(paths)
+            stages = results[profile] = {}
+
+            for stage, run in _stages(fixture, scratch):
+                if progress_callback:
+                    progress_callback(f"{profile}: {stage}")
+
+                seconds, peak = time_stage(run, repeat)
+                stages[stage] = {
+                    "seconds": round(seconds, 6),
+                    "files_per_s": round(len(paths) / seconds, 2) if seconds else None,
+                    "mb_per_s": round(fixture.size / 1e6 / seconds, 3) if seconds else None,
+                    "peak_kb": round(peak / 1024, 1),
+                }
+
+            stages["_corpus"] = {"files": len(paths), "bytes": fixture.size}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        if temporary:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    return {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics_fingerprint": MetricManager.fingerprint(),
+        "corpus": {"seed": seed, "scale": scale, "repeat": repeat},
+        "profiles": results,
+    }
+
+
+def save_baseline(baseline, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline version {baseline.get('version')}")
+    return baseline
+
+
+def compare_baselines(baseline, current, threshold=0.10, min_seconds=0.005):
+    """
+    Stages that got slower than baseline by more than threshold (a
+    fraction: 0.10 is 10%). Stages faster than min_seconds in the baseline
+    are too noisy to gate on and are ignored.
+
+    Returns:
+        (regressions, rows): regressions is a list of
+        (profile, stage, baseline seconds, current seconds, change);
+        rows has the same shape for every stage present in both
+    """
+    rows = []
+    regressions = []
+
+    for profile, stages in sorted(baseline.get("profiles", {}).items()):
+        current_stages = current.get("profiles", {}).get(profile, {})
+
+        for stage, before in sorted(stages.items()):
+            after = current_stages.get(stage)
+            if stage.startswith("_") or after is None:
+                continue
+
+            old, new = before["seconds"], after["seconds"]
+            change = (new - old) / old if old else 0.0
+            row = (profile, stage, old, new, change)
+            rows.append(row)
+
+            if old >= min_seconds and change > threshold:
+                regressions.append(row)
+
+    return regressions, rows
+
+
+def format_comparison(rows, regressions):
+    failing = {(profile, stage) for profile, stage, _, _, _ in regressions}
+    lines = [f"{'profile':<10} {'stage':<20} {'baseline':>10} {'current':>10} {'change':>8}"]
+
+    for profile, stage, old, new, change in rows:
+        flag = "  REGRESSION" if (profile, stage) in failing else ""
+        lines.append(f"{profile:<10} {stage:<20} {old:>10.4f} {new:>10.4f} {change:>+8.1%}{flag}")
+
+    return "\n".join(lines)
+
+
+def print_progress(message):
+    print(message, file=sys.stderr)
@@ -0,0 +1,82 @@
+"""
+Safe extraction of source archives (zip, and tar with or without gzip,
+bzip2 or xz compression).
+"""
+import os
+import tarfile
+import zipfile
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Refuse archives that would expand past this many bytes
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def is_archive(path):
+    """Whether path names a supported archive, by its suffix."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _inside(root, name):
+    target = os.path.realpath(os.path.join(root, name))
+    return target == root or target.startswith(root + os.sep)
+
+
+def extract_archive(source, dest, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Extract an archive (a path, or a seekable binary file object) into the
+    directory dest. The format is detected from the contents, not the name.
+
+    Members that would land outside dest (absolute paths, "..", links
+    pointing out) and archives expanding past max_bytes raise ValueError
+    before anything is written. Links and device files are not extracted.
+
+    Returns:
+        dest
+    """
+    root = os.path.realpath(dest)
+    os.makedirs(root, exist_ok=True)
+
+    is_file = hasattr(source, "read")
+
+    if zipfile.is_zipfile(source):
+        if is_file:
+            source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            members = archive.infolist()
+            _check(root, [(member.filename, member.file_size) for member in members], max_bytes)
+            archive.extractall(root)
+        return dest
+
+    if is_file:
+        source.seek(0)
+    if not tarfile.is_tarfile(source):
+        raise ValueError("not a zip or tar archive")
+
+    if is_file:
+        source.seek(0)
+    with tarfile.open(fileobj=source, mode="r:*") if is_file else tarfile.open(source, "r:*") as archive:
+        members = [member for member in archive.getmembers() if member.isfile() or member.isdir()]
+        _check(root, [(member.name, member.size) for member in members], max_bytes)
+        for member in members:
+            # Never restore modes or owners from the archive
+            member.mode = 0o755 if member.isdir() else 0o644
+            member.uid = member.gid = 0
+            member.uname = member.gname = ""
+        if hasattr(tarfile, "data_filter"):
+            # Python 3.12+, and security backports: let tarfile check too
+            archive.extractall(root, members=members, filter="data")
+        else:
+            archive.extractall(root, members=members)
+
+    return dest
+
+
+def _check(root, members, max_bytes):
+    total = 0
+    for name, size in members:
+        if os.path.isabs(name) or not _inside(root, name):
+            raise ValueError(f"archive member outside the extraction directory: {name}")
+        total += size
+        if max_bytes and total > max_bytes:
+            raise ValueError(f"archive expands past {max_bytes} bytes")
@@ -0,0 +1,157 @@
+"""
+Cheap pre-analysis detection of generated, minified, vendored and
+oversized source files
+"""
+import os
+import re
+from collections import namedtuple
+
+
+class Verdict(namedtuple("Verdict", ["kind", "reason", "action", "metrics"])):
+    """Outcome for one flagged file: what it looks like, why, and what to do."""
+
+    __slots__ = ()
+
+    def as_dict(self):
+        return {"kind": self.kind, "reason": self.reason, "action": self.action}
+
+
+SKIP = "skip"
+REDUCED = "reduced"
+FULL = "full"
+
+
+class FileClassifier:
+    """
+    Flag files whose metrics are either meaningless or disproportionately
+    expensive, from their path, size and first few KB only.
+
+    Args:
+        policy: Mapping of kind -> "skip", "reduced" or "full", merged over
+            DEFAULT_POLICY
+        max_bytes: Files larger than this are "oversized"
+        reduced_metrics: Metric names run for "reduced" files
+    """
+
+    DEFAULT_POLICY = {
+        "vendored": SKIP,
+        "generated": SKIP,
+        "minified": SKIP,
+        "oversized": REDUCED,
+    }
+
+    # Cyclomatic complexity is cheap; Halstead and OOP dominate on huge files
+    DEFAULT_REDUCED_METRICS = ("cyclomatic",)
+
+    DEFAULT_MAX_BYTES = 1024 * 1024
+
+    # Bytes read from the start of a file for header markers and line statistics
+    SAMPLE_BYTES = 32 * 1024
+
+    VENDOR_DIRS = {
+        'vendor', 'vendors', 'third_party', 'thirdparty', '3rdparty',
+        'external', 'extern', 'deps', 'bower_components',
+    }
+
+    GENERATED_NAME = re.compile(
+        r"(_pb2(_grpc)?\.py|\.pb\.(cc|h|go)|\.(generated|gen|g)\.\w+|_generated\.\w+)$",
+        re.IGNORECASE,
+    )
+    MINIFIED_NAME = re.compile(r"[.-]min\.js$|\.bundle\.js$", re.IGNORECASE)
+
+    GENERATED_MARKERS = re.compile(
+        rb"@generated|do not edit|code generated by|auto-?generated|"
+        rb"automatically generated|generated by the protocol buffer compiler|"
+        rb"this file is generated|generated by cython|amalgamation",
+        re.IGNORECASE,
+    )
+
+    # Only the file header is searched for markers
+    MARKER_BYTES = 2048
+
+    # Line statistics of minified code: a high average line length, or most
+    # of the sample in lines longer than MINIFIED_LONG_LINE
+    MINIFIED_AVG_LINE = 300
+    MINIFIED_LONG_LINE = 2000
+
+    def __init__(self, policy=None, max_bytes=DEFAULT_MAX_BYTES, reduced_metrics=DEFAULT_REDUCED_METRICS):
+        self.policy = dict(self.DEFAULT_POLICY)
+        if policy:
+            self.policy.update(policy)
+
+        for kind, action in self.policy.items():
+            if action not in (SKIP, REDUCED, FULL):
+                raise ValueError(f"Unknown action {action!r} for {kind!r} files")
+
+        self.max_bytes = max_bytes
+        self.reduced_metrics = tuple(reduced_metrics)
+
+    def classify(self, file_path, size=None, root_path=None, sample=None):
+        """
+        Classify one file. Vendor directories are looked for in the path
+        relative to root_path, when given. sample is the start of the
+        contents (at least SAMPLE_BYTES) when the file is not on disk.
+
+        Returns:
+            Verdict(kind, reason, action, metrics), where metrics is the
+            metric names to run (None for all), or None for ordinary files
+        """
+        kind, reason = self.detect(file_path, size, root_path, sample)
+
+        if kind is None:
+            return None
+
+        action = self.policy.get(kind, FULL)
+        metrics = self.reduced_metrics if action == REDUCED else None
+        return Verdict(kind, reason, action, metrics)
+
+    def detect(self, file_path, size=None, root_path=None, sample=None):
+        """(kind, reason) for a flagged file, or (None, None)."""
+        rel_path = os.path.relpath(file_path, root_path) if root_path else file_path
+        parts = rel_path.replace(os.sep, "/").split("/")
+        name = parts[-1]
+
+        for part in parts[:-1]:
+            if part.lower() in self.VENDOR_DIRS:
+                return "vendored", f"inside {part}/"
+
+        if self.GENERATED_NAME.search(name):
+            return "generated", "generated file name"
+
+        if self.MINIFIED_NAME.search(name):
+            return "minified", "minified file name"
+
+        if size is None and sample is not None:
+            size = len(sample)
+        elif size is None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                return None, None
+
+        if sample is None:
+            try:
+                with open(file_path, "rb") as f:
+                    sample = f.read(self.SAMPLE_BYTES)
+            except OSError:
+                return None, None
+        else:
+            sample = bytes(sample[:self.SAMPLE_BYTES])
+
+        marker = self.GENERATED_MARKERS.search(sample, 0, self.MARKER_BYTES)
+        if marker:
+            return "generated", f"header contains {marker.group(0).decode('ascii', 'replace')!r}"
+
+        if sample:
+            lengths = [len(line) for line in sample.split(b"\n")]
+            avg_line = len(sample) / len(lengths)
+            # A single long string literal is not enough; long lines must dominate
+            long_bytes = sum(n for n in lengths if n > self.MINIFIED_LONG_LINE)
+            if avg_line > self.MINIFIED_AVG_LINE or long_bytes * 2 > len(sample):
+                return "minified", f"average line {avg_line:.0f} chars, longest {max(lengths)}"
+
+        if self.max_bytes and size > self.max_bytes:
+            return "oversized", f"{size} bytes"
+
+        return None, None
+
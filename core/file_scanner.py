@@ -1,5 +1,14 @@
 import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+
+from core.ignore import IgnoreChain
+
+# One supported file found by FileScanner.iter_files
+ScanEntry = namedtuple("ScanEntry", ["path", "language", "size"])
+
+
 class FileScanner:
    
     LANGUAGE_MAP = {
@@ -25,6 +34,12 @@ class FileScanner:
         '.gitignore', '.env', 'package-lock.json', 'yarn.lock'
     }
     
+    # Per-directory ignore files, applied like .gitignore (later files win)
+    IGNORE_FILE_NAMES = ('.gitignore', '.staticlensignore')
+
+    # Directory listings run on threads; os.scandir releases the GIL
+    DEFAULT_WORKERS = 8
+
     def scan_directory(self, root_path, progress_callback=None):
         """
         Scan directory for code files.
@@ -34,31 +49,145 @@ class FileScanner:
             progress_callback: Optional callback for progress updates
         
         Returns:
-            List of tuples (file_path, language)
+            List of tuples (file_path, language), sorted by path
         """
         files = []
-        root_path = Path(root_path)
-        
-        for root, dirs, filenames in os.walk(root_path):
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in self.IGNORE_DIRS]
-            
-            for filename in filenames:
-                if filename in self.IGNORE_FILES:
-                    continue
-                
-                ext = Path(filename).suffix.lower()
-                
-                if ext in self.LANGUAGE_MAP:
-                    file_path = os.path.join(root, filename)
-                    language = self.LANGUAGE_MAP[ext]
-                    files.append((file_path, language))
-                    
-                    if progress_callback:
-                        progress_callback(f"Found: {filename}")
-        
+
+        for entry in self.iter_files(root_path):
+            files.append((entry.path, entry.language))
+
+            if progress_callback:
+                progress_callback(f"Found: {os.path.basename(entry.path)}")
+
+        files.sort()
         return files
+
+    def iter_files(self, root_path, workers=None):
+        """
+        Walk root_path and yield a ScanEntry(path, language, size) per
+        supported file as soon as its directory has been listed.
+
+        Subtrees are listed concurrently, so the order is not stable.
+        IGNORE_DIRS and IGNORE_FILES are always skipped, and so is anything
+        excluded by a .gitignore or .staticlensignore in the directory or
+        any directory above it, up to root_path.
+        """
+        root_path = str(root_path)
+        chain = IgnoreChain()
+
+        if workers is None:
+            workers = self.DEFAULT_WORKERS
+
+        if workers <= 1:
+            stack = [(root_path, "", chain)]
+            while stack:
+                entries, subdirs = self._scan_one(*stack.pop())
+                yield from entries
+                stack.extend(reversed(subdirs))
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {pool.submit(self._scan_one, root_path, "", chain)}
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries, subdirs = future.result()
+                    yield from entries
+                    running.update(pool.submit(self._scan_one, *subdir) for subdir in subdirs)
+
+    def _scan_one(self, directory, rel_dir, chain):
+        """List one directory: its supported files and the subdirectories to visit."""
+        entries = []
+        subdirs = []
+
+        try:
+            with os.scandir(directory) as it:
+                children = list(it)
+        except OSError:
+            return entries, subdirs
+
+        names = {child.name for child in children}
+        chain = chain.load(directory, rel_dir, [n for n in self.IGNORE_FILE_NAMES if n in names])
+        prefix = rel_dir + "/" if rel_dir else ""
+
+        for child in children:
+            name = child.name
+            try:
+                if child.is_dir(follow_symlinks=False):
+                    if name in self.IGNORE_DIRS or chain.ignored(prefix + name, True):
+                        continue
+                    subdirs.append((child.path, prefix + name, chain))
+                    continue
+
+                if name in self.IGNORE_FILES:
+                    continue
+
+                dot = name.rfind('.')
+                language = self.LANGUAGE_MAP.get(name[dot:].lower()) if dot > 0 else None
+                if not language or chain.ignored(prefix + name, False) or not child.is_file():
+                    continue
+
+                entries.append(ScanEntry(child.path, language, child.stat().st_size))
+            except OSError:
+                # Vanished or unreadable while scanning
+                continue
+
+        return entries, subdirs
     
+    def language_for(self, rel_path, chain=None):
+        """
+        Language of a repository-relative path, or None if it has no
+        supported extension or sits in IGNORE_DIRS / IGNORE_FILES.
+
+        Exclusions by .gitignore and .staticlensignore files only apply
+        when chain, the IgnoreChain in effect in rel_path's directory, is
+        given; then the answer matches what iter_files keeps. See
+        language_at() for paths in a working tree.
+        """
+        parts = rel_path.replace(os.sep, '/').split('/')
+
+        if any(part in self.IGNORE_DIRS for part in parts[:-1]):
+            return None
+        if parts[-1] in self.IGNORE_FILES:
+            return None
+
+        language = self.LANGUAGE_MAP.get(Path(parts[-1]).suffix.lower())
+        if language is None or chain is None:
+            return language
+
+        # iter_files never descends into an ignored directory
+        for depth in range(1, len(parts)):
+            if chain.ignored('/'.join(parts[:depth]), True):
+                return None
+        if chain.ignored('/'.join(parts), False):
+            return None
+        return language
+
+    def language_at(self, root_path, rel_path, cache=None):
+        """
+        language_for() a path relative to the working tree root_path,
+        honoring the ignore files of its directory and those above it.
+
+        Args:
+            cache: Optional dict of IgnoreChains by directory, shared
+                between calls on the same tree while its ignore files do
+                not change
+        """
+        rel_dir = os.path.dirname(rel_path.replace(os.sep, '/'))
+        return self.language_for(rel_path, self.ignore_chain(root_path, rel_dir, cache))
+
+    def ignore_chain(self, root_path, rel_dir, cache=None):
+        """IgnoreChain in effect inside rel_dir of root_path, as iter_files builds it."""
+        if cache is not None and rel_dir in cache:
+            return cache[rel_dir]
+
+        parent = self.ignore_chain(root_path, os.path.dirname(rel_dir), cache) if rel_dir else IgnoreChain()
+        chain = parent.load(os.path.join(root_path, rel_dir), rel_dir, self.IGNORE_FILE_NAMES)
+
+        if cache is not None:
+            cache[rel_dir] = chain
+        return chain
+
     def get_file_stats(self, files):
         """Get statistics about scanned files."""
         stats = {
@@ -4,21 +4,61 @@ GitHub Repository Cloner
 import os
 import shutil
 import tempfile
-from git import Repo
+from git import Git, GitCommandError, Repo
 from pathlib import Path
 
+from core.file_scanner import FileScanner
+
+
+def _case_insensitive(text):
+    return "".join(f"[{c.lower()}{c.upper()}]" if c.isalpha() else c for c in text)
+
+
+def sparse_patterns(extensions, ignore_dirs=FileScanner.IGNORE_DIRS,
+                    ignore_files=FileScanner.IGNORE_FILE_NAMES):
+    """
+    Non-cone sparse-checkout patterns that check out files with the given
+    extensions (matched case-insensitively, like FileScanner does) and the
+    ignore files the scanner reads, anywhere outside ignore_dirs.
+    """
+    patterns = [f"*{_case_insensitive(ext)}" for ext in sorted(extensions)]
+    patterns.extend(ignore_files)
+    # Exclusions must come after the includes to override them
+    patterns.extend(f"!**/{name}/**" for name in sorted(ignore_dirs) if name != ".git")
+    return patterns
+
+
+def remote_head(repo_url):
+    """
+    Commit SHA the repository's HEAD points at, asked from the remote
+    without cloning (git ls-remote), or None if it cannot be resolved.
+    """
+    try:
+        output = Git().ls_remote(repo_url, "HEAD")
+    except GitCommandError:
+        return None
+    sha, _, _ = output.partition("\t")
+    return sha.strip() or None
+
 
 class GitHubCloner:
     def __init__(self):
         self.temp_dir = None
     
-    def clone_repo(self, repo_url, progress_callback=None):
+    def clone_repo(self, repo_url, progress_callback=None, bare=False, extensions=None):
         """
         Clone a GitHub repository to a temporary directory.
         
         Args:
             repo_url: GitHub repository URL
             progress_callback: Optional callback for progress updates
+            bare: Only fetch objects, without checking out a working tree
+            extensions: If given, make a blob-less partial clone and sparse
+                check out only files with these extensions, so other blobs
+                (images, datasets, binaries) are never downloaded. The
+                server must allow filters (GitHub does; a local bare repo
+                needs uploadpack.allowFilter). Ignored for bare clones,
+                which read every blob and would fetch them one at a time.
         
         Returns:
             Path to cloned repository
@@ -30,8 +70,15 @@ class GitHubCloner:
             if progress_callback:
                 progress_callback("Cloning repository...")
             
-            # Clone the repo (shallow clone for speed)
-            Repo.clone_from(repo_url, self.temp_dir, depth=1)
+            if extensions and not bare:
+                # Fetch commits and trees only; checkout then fetches just
+                # the blobs the sparse patterns select, in one batch
+                repo = Repo.clone_from(repo_url, self.temp_dir, depth=1, filter="blob:none", no_checkout=True)
+                repo.git.sparse_checkout("set", "--no-cone", *sparse_patterns(extensions))
+                repo.git.checkout()
+            else:
+                # Clone the repo (shallow clone for speed)
+                Repo.clone_from(repo_url, self.temp_dir, depth=1, bare=bare)
             
             if progress_callback:
                 progress_callback("Repository cloned successfully!")
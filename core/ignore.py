@@ -0,0 +1,142 @@
+"""
+.gitignore-style ignore rules, compiled to regular expressions
+"""
+import os
+import re
+
+
+def translate(pattern):
+    """Regex source for the path part of one gitignore pattern."""
+    i, n = 0, len(pattern)
+    parts = []
+
+    while i < n:
+        c = pattern[i]
+
+        if pattern.startswith("**/", i):
+            # Zero or more leading directories
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n:
+            parts.append(".*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[^", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    Patterns of one ignore file, matched against paths relative to the
+    directory that file is in. The last matching pattern wins, and a
+    negated (!) pattern re-includes what an earlier one excluded.
+    """
+
+    def __init__(self, lines):
+        # (regex, negated, directories only), in file order
+        self.rules = []
+
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            # Trailing spaces are ignored unless escaped
+            while line.endswith(" ") and not line.endswith("\\ "):
+                line = line[:-1]
+            if not line or line.startswith("#"):
+                continue
+
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+
+            # A slash anywhere but the end anchors the pattern to this directory
+            anchored = "/" in line
+            line = line.lstrip("/")
+            prefix = "" if anchored else "(?:.*/)?"
+
+            self.rules.append((re.compile(prefix + translate(line) + r"\Z"), negated, dir_only))
+
+        # Cheap rejection for the common case of no rule matching at all
+        self._any = re.compile("|".join(f"(?:{rx.pattern})" for rx, _, _ in self.rules)) if self.rules else None
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path, is_dir):
+        """True if ignored, False if re-included, None if no rule applies."""
+        if self._any is None or not self._any.match(rel_path):
+            return None
+
+        for regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negated
+
+        return None
+
+
+class IgnoreChain:
+    """
+    Ignore rules in effect inside one directory: those of its own ignore
+    files plus every ancestor's, deeper files taking precedence.
+    """
+
+    def __init__(self, layers=()):
+        # (directory prefix relative to the scan root, IgnoreRules)
+        self.layers = tuple(layers)
+
+    def extend(self, rel_dir, rules):
+        if rules is None or not rules.rules:
+            return self
+        prefix = rel_dir + "/" if rel_dir else ""
+        return IgnoreChain(self.layers + ((prefix, rules),))
+
+    def ignored(self, rel_path, is_dir):
+        result = False
+        for prefix, rules in self.layers:
+            if rel_path.startswith(prefix):
+                matched = rules.match(rel_path[len(prefix):], is_dir)
+                if matched is not None:
+                    result = matched
+        return result
+
+    def load(self, directory, rel_dir, names):
+        """Chain extended with the ignore files called names in directory."""
+        chain = self
+        for name in names:
+            chain = chain.extend(rel_dir, IgnoreRules.from_file(os.path.join(directory, name)))
+        return chain
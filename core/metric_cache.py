@@ -0,0 +1,220 @@
+"""
+Content-addressed on-disk metric cache
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Per-thread read-only connections of CacheReaders, by database path
+_readers = threading.local()
+
+
+class MetricCache:
+    """
+    SQLite cache of per-file metrics.
+
+    Entries are keyed by a hash of the file bytes, the language and a
+    fingerprint of the registered metrics, so an unchanged file is never
+    parsed twice and a metric change invalidates everything it produced.
+    The cache is size-bounded and evicts least recently used entries.
+    Its size is kept in the database itself, by triggers, so several
+    processes sharing one cache file evict against the same total.
+    """
+
+    DEFAULT_DIR = os.environ.get(
+        "STATICLENS_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "staticlens"),
+    )
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DB_NAME = "metrics.sqlite3"
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or self.DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                metrics TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.commit()
+        if not self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'usage'").fetchone():
+            self._create_usage()
+
+        if self.max_bytes and self.total_bytes() > self.max_bytes:
+            self._evict()
+            self._conn.commit()
+
+    def _create_usage(self):
+        # Running total of entry sizes, and the triggers keeping it, added
+        # to caches created before it existed from their current contents
+        self._conn.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS usage (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO usage (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM entries;
+            CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries
+            BEGIN UPDATE usage SET bytes = bytes + new.size; END;
+            CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries
+            BEGIN UPDATE usage SET bytes = bytes + new.size - old.size; END;
+            CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries
+            BEGIN UPDATE usage SET bytes = bytes - old.size; END;
+            COMMIT;
+            """
+        )
+
+    @property
+    def path(self):
+        return os.path.join(self.cache_dir, self.DB_NAME)
+
+    @staticmethod
+    def make_key(data: bytes, language: str, fingerprint: str) -> str:
+        """Cache key for file contents analyzed as language by a metric set."""
+        digest = hashlib.sha256(data).hexdigest()
+        return hashlib.sha256(f"{digest}:{language}:{fingerprint}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_blob_key(blob_sha: str, language: str, fingerprint: str) -> str:
+        """Cache key for a git blob, which is already content-addressed."""
+        return hashlib.sha256(f"blob:{blob_sha}:{language}:{fingerprint}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached metrics dict for key, or None on a miss."""
+        row = self._conn.execute("SELECT metrics FROM entries WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, metrics):
+        """Store metrics under key, evicting old entries past max_bytes."""
+        payload = json.dumps(metrics)
+
+        self._conn.execute(
+            """
+            INSERT INTO entries (key, metrics, size, last_used) VALUES (?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                metrics = excluded.metrics, size = excluded.size, last_used = excluded.last_used
+            """,
+            (key, payload, len(payload), time.time()),
+        )
+
+        if self.max_bytes and self.total_bytes() > self.max_bytes:
+            self._evict()
+
+    def reader(self):
+        """A CacheReader of this cache, for lookups in other processes or threads."""
+        return CacheReader(self.path)
+
+    def record(self, key, metrics, hit):
+        """
+        Account for a lookup made through a reader(): count it, mark a hit
+        as used, and store a miss's metrics (if it produced any).
+        """
+        if hit:
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return
+
+        self.misses += 1
+        if metrics is not None:
+            self.put(key, metrics)
+
+    def total_bytes(self):
+        """Size of every entry in the cache file, whichever process wrote it."""
+        return self._conn.execute("SELECT bytes FROM usage").fetchone()[0]
+
+    def _evict(self):
+        # Evict down to 90% so a full cache doesn't evict on every put
+        excess = self.total_bytes() - self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_used")
+
+        stale = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            stale.append((key,))
+            excess -= size
+        rows.close()
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def stats(self):
+        """Hit/miss counters for this instance plus current cache size."""
+        entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self.total_bytes(),
+        }
+
+    def clear(self):
+        self._conn.execute("DELETE FROM entries")
+        self._conn.commit()
+
+    def flush(self):
+        """Commit pending writes."""
+        self._conn.commit()
+
+    def close(self):
+        if self._conn:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CacheReader:
+    """
+    Read-only lookups in a MetricCache's database, e.g. by analysis workers
+    keying the files they read. Picklable; each thread opens its own
+    connection on first use and keeps it. Lookups see committed entries
+    only, and are neither counted nor marked as used: the MetricCache does
+    both in record().
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, key):
+        """Return the cached metrics dict for key, or None on a miss."""
+        connections = getattr(_readers, "connections", None)
+        if connections is None:
+            connections = _readers.connections = {}
+
+        conn = connections.get(self.path)
+        if conn is None:
+            conn = connections[self.path] = sqlite3.connect(self.path)
+
+        row = conn.execute("SELECT metrics FROM entries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
@@ -0,0 +1,274 @@
+"""
+Persistent cache of bare mirror clones for repeated repository scans
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from git import Repo
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): mirrors are used unlocked
+    fcntl = None
+
+
+def normalize_url(repo_url):
+    """
+    Canonical form of a repository URL, so that https and ssh spellings,
+    a trailing slash or .git, and embedded credentials map to one mirror.
+    """
+    url = repo_url.strip()
+
+    # scp-like ssh syntax: git@github.com:owner/repo.git
+    scp = re.match(r"^[\w.-]+@([\w.-]+):(?!//)(.*)$", url)
+    if scp:
+        host, path = scp.groups()
+    elif "://" in url:
+        scheme, rest = url.split("://", 1)
+        if scheme.lower() == "file":
+            host, path = "", rest
+        else:
+            host, _, path = rest.partition("/")
+            host = host.rsplit("@", 1)[-1].lower()
+            host = re.sub(r":(22|80|443)$", "", host)
+    else:
+        host, path = "", os.path.abspath(url)
+
+    path = path.rstrip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+
+    return f"{host}/{path.lstrip('/')}" if host else f"file:{path}"
+
+
+def strip_credentials(repo_url):
+    """
+    repo_url without the secrets embedded in it: the user and password of
+    scheme:// URLs (an ssh:// user name is kept, like the one of scp-like
+    ssh syntax, since it is not a secret).
+    """
+    match = re.match(r"^([a-z][a-z0-9+.-]*://)([^/@]*)@(.*)$", repo_url.strip(), re.IGNORECASE)
+    if not match:
+        return repo_url
+    scheme, userinfo, rest = match.groups()
+    if scheme.lower() == "ssh://":
+        user = userinfo.split(":", 1)[0]
+        return f"{scheme}{user}@{rest}" if user else f"{scheme}{rest}"
+    return scheme + rest
+
+
+class MirrorCache:
+    """
+    Bare mirrors of remote repositories, keyed by normalized URL.
+
+    The first use of a repository clones a mirror; later uses only fetch
+    what changed. Mirrors unused for max_age seconds, and the least
+    recently used ones past max_bytes, are removed.
+
+    Each mirror has two lock files (flock, so across processes too):
+
+    - the use lock (.lock) is held shared by every scan for as long as it
+      reads the mirror, and taken exclusively, without waiting, by
+      eviction; a mirror in use is never removed, and a scan arriving
+      during a removal waits for it and then clones afresh
+    - the update lock (.update.lock) is held exclusively only while a
+      mirror is cloned or fetched, so updates of one repository run one
+      at a time but never wait for scans, and scans never wait for them
+
+    A fetch may move refs under a running scan; scans resolve their
+    commit once up front and fetches never garbage-collect, so the
+    objects a scan reads stay in place.
+    """
+
+    DEFAULT_DIR = os.environ.get(
+        "STATICLENS_MIRROR_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "staticlens", "mirrors"),
+    )
+    DEFAULT_MAX_BYTES = 10 * 1024 * 1024 * 1024
+    DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir or self.DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, repo_url):
+        normalized = normalize_url(repo_url)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+        name = re.sub(r"[^A-Za-z0-9]+", "_", normalized)[-48:].strip("_")
+        return f"{name}-{digest}"
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".git", base + ".lock", base + ".json"
+
+    def _update_lock_path(self, key):
+        return os.path.join(self.cache_dir, key + ".update.lock")
+
+    @contextmanager
+    def mirror(self, repo_url, progress_callback=None, update=True):
+        """
+        Up-to-date bare mirror of repo_url, protected from eviction while
+        in use. See the class docstring for how scans and updates of the
+        same mirror interleave.
+
+        Yields:
+            Path to the bare repository
+        """
+        key = self.key(repo_url)
+        mirror_path, lock_path, meta_path = self._paths(key)
+
+        with open(lock_path, "a") as lock:
+            # Held for the whole scan; waits only for an eviction in progress
+            _lock(lock, exclusive=False)
+            try:
+                with open(self._update_lock_path(key), "a") as update_lock:
+                    _lock(update_lock, exclusive=True)
+                    try:
+                        if not os.path.isdir(mirror_path):
+                            if progress_callback:
+                                progress_callback("Cloning repository mirror...")
+                            self._clone(repo_url, mirror_path)
+                        elif update:
+                            if progress_callback:
+                                progress_callback("Fetching repository updates...")
+                            self._fetch(repo_url, mirror_path)
+
+                        self._write_meta(meta_path, repo_url, mirror_path)
+                    finally:
+                        _unlock(update_lock)
+
+                yield mirror_path
+            finally:
+                _unlock(lock)
+
+        self.evict(keep=key)
+
+    def _clone(self, repo_url, mirror_path):
+        # Clone next to the final path, then rename, so a failed clone never
+        # leaves a half-written mirror behind
+        staging = tempfile.mkdtemp(prefix=".clone-", dir=self.cache_dir)
+        try:
+            repo = Repo.clone_from(repo_url, staging, mirror=True)
+            # Credentials in the URL must not be stored in the cached config
+            repo.git.remote("set-url", "origin", strip_credentials(repo_url))
+            os.rename(staging, mirror_path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _fetch(self, repo_url, mirror_path):
+        # No auto gc: running scans may still read unreachable objects
+        git = Repo(mirror_path).git(c="gc.auto=0")
+        if strip_credentials(repo_url) == repo_url:
+            git.fetch("--prune", "origin")
+        else:
+            # The stored origin has no credentials: fetch from the given URL
+            # into the mirror's refs, as the origin refspec would
+            git.fetch("--prune", repo_url, "+refs/*:refs/*")
+
+    def _write_meta(self, meta_path, repo_url, mirror_path):
+        meta = {
+            "url": normalize_url(repo_url),
+            "last_used": time.time(),
+            "size": _dir_size(mirror_path),
+        }
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+    def entries(self):
+        """Cached mirrors as (key, url, last_used, size), least recently used first."""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            found.append((name[:-5], meta.get("url"), meta.get("last_used", 0), meta.get("size", 0)))
+
+        found.sort(key=lambda entry: entry[2])
+        return found
+
+    def evict(self, keep=None):
+        """
+        Remove stale mirrors, then least recently used ones past max_bytes.
+        Mirrors locked by another scan are left alone.
+
+        Returns:
+            Keys of the removed mirrors
+        """
+        entries = self.entries()
+        total = sum(size for _, _, _, size in entries)
+        now = time.time()
+        removed = []
+
+        for key, _, last_used, size in entries:
+            stale = self.max_age is not None and now - last_used > self.max_age
+            over = self.max_bytes is not None and total > self.max_bytes
+            if key == keep or not (stale or over):
+                continue
+            if self._remove(key):
+                removed.append(key)
+                total -= size
+
+        return removed
+
+    def _remove(self, key):
+        mirror_path, lock_path, meta_path = self._paths(key)
+
+        with open(lock_path, "a") as lock:
+            if not _lock(lock, exclusive=True, blocking=False):
+                return False
+            try:
+                shutil.rmtree(mirror_path, ignore_errors=True)
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+            finally:
+                _unlock(lock)
+
+        return True
+
+    def clear(self):
+        for key, _, _, _ in self.entries():
+            self._remove(key)
+
+
+def _lock(f, exclusive, blocking=True):
+    if fcntl is None:
+        return True
+
+    flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    if not blocking:
+        flags |= fcntl.LOCK_NB
+
+    try:
+        fcntl.flock(f.fileno(), flags)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,44 @@
+"""
+Source loading shared by the parsers and the analyzer
+"""
+import mmap
+import os
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_MIN_BYTES = 256 * 1024
+
+
+def load_source(file_path, mmap_min_bytes=MMAP_MIN_BYTES):
+    """
+    Contents of file_path as a buffer tree-sitter can parse without copying.
+
+    Large files are mapped read-only. A Tree parsed from the mapping keeps
+    it alive, and it is unmapped once the last reference is dropped, so
+    callers must not close it while nodes may still read their text.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+
+        if mmap_min_bytes is not None and size >= mmap_min_bytes:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Not mappable (pipe, special file, ...): fall back to reading
+                pass
+
+        return f.read()
+
+
+def as_buffer(source):
+    """
+    Normalize in-memory source for parsing: str is UTF-8 encoded, file-like
+    objects are read, and bytes-like objects (bytes, bytearray, memoryview,
+    mmap) are passed through as they are.
+    """
+    if isinstance(source, str):
+        return source.encode("utf-8")
+
+    if hasattr(source, "read") and not isinstance(source, mmap.mmap):
+        return source.read()
+
+    return source
@@ -7,19 +7,31 @@
 # cc=calculate_cyclomatic_complexity(tree)
 # print(cc)
 #source venv/bin/activate
+import hashlib
+import importlib.util
 import os
+from collections import deque
+from concurrent.futures import Future
 from engine.parser_manager import ParserManager
 from engine.metric_manager import MetricManager
 from core.file_scanner import FileScanner
-from core.github_clone import GitHubCloner
-import parsers.cpp_parser
-import parsers.python_parser
-import parsers.java_parser
-import parsers.js_parser
-
-import metrics.cyclomatic
-import metrics.halstead
-import metrics.oop_metrics
+from core.metric_cache import MetricCache
+from core.file_classifier import SKIP
+from core.source_loader import as_buffer, load_source
+from engine.instrumentation import add_stages, summarize_performance, timed
+from engine.node_taxonomy import taxonomy_digest
+from parsers.query_pack import query_pack_digest
+
+# Built-in grammars and metrics. Each module is imported, building its
+# tree-sitter Language and Parser, the first time a file needs it.
+ParserManager.declare("cpp", "parsers.cpp_parser")
+ParserManager.declare("python", "parsers.python_parser")
+ParserManager.declare("java", "parsers.java_parser")
+ParserManager.declare("javascript", "parsers.js_parser")
+
+MetricManager.declare("cyclomatic", "metrics.cyclomatic")
+MetricManager.declare("halstead", "metrics.halstead")
+MetricManager.declare("oop", "metrics.oop_metrics")
 
 EXTENSION_MAP = {
     "py": "python",
@@ -34,11 +46,92 @@ EXTENSION_MAP = {
     "jsx": "javascript",
 }
 
+# Bump when metric results change in a way metrics_fingerprint() cannot
+# see (e.g. a tree-sitter grammar upgrade), to invalidate every MetricCache
+CACHE_VERSION = 1
+
+# Modules, besides each metric's own, whose code shapes metric results;
+# their source is part of metrics_fingerprint(), as are the declared
+# parser modules and the query packs
+FINGERPRINT_MODULES = (
+    "core.source_loader",
+    "engine.metric_manager",
+    "engine.node_taxonomy",
+    "metrics.base_metric",
+    "metrics.class_model",
+    "parsers.query_pack",
+)
+
+# Below this many files the cost of starting worker processes outweighs
+# the parallel speedup, so analyze_files stays in-process.
+PARALLEL_MIN_FILES = 8
+
+
+def default_workers():
+    """Number of CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def metrics_fingerprint():
+    """Version of everything that shapes a file's metrics, for MetricCache keys."""
+    parsers = [
+        module if isinstance(module, str) else module.module
+        for _, module in sorted(ParserManager.declared.items())
+    ]
+    combined = (
+        f"{CACHE_VERSION}:{MetricManager.fingerprint()}:{query_pack_digest()}:{taxonomy_digest()}:"
+        f"{source_digest(list(FINGERPRINT_MODULES) + parsers)}"
+    )
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+def source_digest(modules):
+    """Hash of the source files of modules (dotted paths), found without importing them."""
+    digest = hashlib.sha256()
+
+    for name in modules:
+        digest.update(name.encode("utf-8"))
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            spec = None
+        origin = getattr(spec, "origin", None)
+        if origin and os.path.isfile(origin):
+            with open(origin, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
 
 def detect_language(filepath: str):
     _, ext = os.path.splitext(filepath)
     ext = ext[1:].lower()
-    return EXTENSION_MAP.get(ext)
+    language = EXTENSION_MAP.get(ext)
+    if language is None and ext:
+        language = ParserManager.language_for_extension(ext)
+    return language
+
+
+def load_plugins():
+    """
+    Declare installed parser and metric plugins, and let FileScanner pick
+    up the file extensions of plugin languages. Nothing is imported until
+    a plugin's language or metric is used.
+    """
+    ParserManager.load_plugins()
+    MetricManager.load_plugins()
+    for extension, language in ParserManager.extensions.items():
+        FileScanner.LANGUAGE_MAP.setdefault(f".{extension}", language)
+
+def analyzable_extensions():
+    """FileScanner extensions, plugin ones included, whose language has a parser."""
+    load_plugins()
+    return sorted(
+        ext for ext in FileScanner.LANGUAGE_MAP
+        if ParserManager.available(EXTENSION_MAP.get(ext[1:]) or ParserManager.extensions.get(ext[1:]))
+    )
 
 def print_tree(node, indent=0):
     print("  " * indent + node.type)
@@ -46,7 +139,11 @@ def print_tree(node, indent=0):
     for child in node.children:
         print_tree(child, indent + 1)
 
-def analyzer(file_path: str):
+def analyzer(file_path: str, metrics=None, instrument=None):
+    """
+    Analyze one file. With an Instrumentation as instrument, the result
+    also has a "performance" record (see engine.instrumentation).
+    """
     lang = detect_language(file_path)
 
     if not lang:
@@ -59,6 +156,9 @@ def analyzer(file_path: str):
         print("parser not registered")
         return None  # parser not registered
 
+    if instrument is not None:
+        return _analyze_instrumented(file_path, lang, parser, metrics, instrument)
+
     try:
         tree = parser(file_path)
     except Exception as e:
@@ -68,8 +168,130 @@ def analyzer(file_path: str):
             "error": f"Parsing failed: {str(e)}"
         }
     # print(tree.root_node)
+    return _run_metrics(tree, file_path, lang, metrics)
+
+
+def _analyze_instrumented(file_path, lang, parser, metrics, instrument):
+    probe = instrument.start(file_path)
+    source_parser = ParserManager.get_source_parser(lang)
+
+    try:
+        if source_parser is None:
+            with probe.stage("parse"):
+                tree = parser(file_path)
+        else:
+            with probe.stage("read"):
+                source = load_source(file_path)
+            probe.bytes = len(source)
+            with probe.stage("parse"):
+                tree = source_parser(source)
+    except Exception as e:
+        result = {
+            "file": file_path,
+            "language": lang,
+            "error": f"Parsing failed: {str(e)}"
+        }
+    else:
+        probe.observe_tree(tree)
+        result = _run_metrics(tree, file_path, lang, metrics, timings=probe.stages)
+
+    result["performance"] = probe.finish()
+    return result
+
+
+def analyze_source(source, language: str = None, name: str = None, metrics=None, instrument=None):
+    """
+    Analyze in-memory source without writing it to disk.
+
+    Args:
+        source: bytes, bytearray, memoryview, mmap, str or a binary file object
+        language: Language name; detected from name's extension if omitted
+        name: Reported as the result's "file"
+        metrics: Metric names to run (all if None)
+        instrument: Optional Instrumentation, as for analyzer()
+
+    Returns:
+        Same shape as analyzer(), or None if the language is unsupported
+    """
+    lang = language or (detect_language(name) if name else None)
+    source_parser = ParserManager.get_source_parser(lang) if lang else None
+
+    if not source_parser:
+        return None
+
+    if instrument is None:
+        try:
+            tree = source_parser(as_buffer(source))
+        except Exception as e:
+            return {
+                "file": name,
+                "language": lang,
+                "error": f"Parsing failed: {str(e)}"
+            }
+
+        return _run_metrics(tree, name, lang, metrics)
+
+    probe = instrument.start(name or "")
+
     try:
-        results = MetricManager.run_all(tree, file_path, lang)
+        with probe.stage("read"):
+            buffer = as_buffer(source)
+        probe.bytes = getattr(buffer, "nbytes", None) or len(buffer)
+        with probe.stage("parse"):
+            tree = source_parser(buffer)
+    except Exception as e:
+        result = {
+            "file": name,
+            "language": lang,
+            "error": f"Parsing failed: {str(e)}"
+        }
+    else:
+        probe.observe_tree(tree)
+        result = _run_metrics(tree, name, lang, metrics, timings=probe.stages)
+
+    result["performance"] = probe.finish()
+    return result
+
+
+def analyze_cached(file_path: str, metrics=None, instrument=None, reader=None, fingerprint=None):
+    """
+    analyzer() through a MetricCache, in whichever process runs it: the
+    file is read once, both to key the cache and, on a miss, to be parsed.
+
+    Args:
+        reader: The cache's CacheReader (MetricCache.reader())
+        fingerprint: The caller's metrics_fingerprint()
+
+    Returns:
+        (cache key or None, whether it was a hit, analyzer() result); the
+        caller passes key, metrics and hit to MetricCache.record()
+    """
+    lang = detect_language(file_path)
+    if not lang or ParserManager.get_source_parser(lang) is None:
+        return None, False, analyzer(file_path, metrics, instrument)
+
+    stages = {}
+    try:
+        with timed(stages, "read"):
+            source = load_source(file_path)
+    except OSError:
+        # Reported by the parser, as without a cache
+        return None, False, analyzer(file_path, metrics, instrument)
+
+    key = MetricCache.make_key(source, lang, metric_set_fingerprint(fingerprint, metrics))
+    hit = reader.get(key)
+    if hit is not None:
+        return key, True, {"file": file_path, "language": lang, "metrics": hit}
+
+    result = analyze_source(source, lang, file_path, metrics, instrument)
+    if instrument is not None:
+        add_stages(result["performance"], stages)
+    return key, False, result
+
+
+def _run_metrics(tree, file_path, lang, metrics=None, timings=None):
+    try:
+        results = MetricManager.run_all(tree, file_path, lang, metrics=metrics, timings=timings)
     except Exception as e:
         return {
             "file": file_path,
@@ -86,47 +308,302 @@ def analyzer(file_path: str):
 
 
 
-def analyze_files(files, progress_callback=None):
-   
-    results = []
-    total = len(files)
-    
-    for i, (file_path, language) in enumerate(files, 1):
+def iter_analyze_files(files, progress_callback=None, workers=None, cache=None, classifier=None, root_path=None,
+                       instrument=None, metrics=None):
+    """
+    Yield analyzer() results for (file_path, language) tuples as they finish.
+
+    Results come out in input order, with at most a small window of files in
+    flight, so memory does not grow with the number of files and a consumer
+    can start on the first result while the rest are being analyzed.
+
+    Args:
+        files: Iterable of (file_path, language, ...) tuples, e.g. from
+            FileScanner.scan_directory or FileScanner.iter_files
+        progress_callback: Optional callback called as (index, total, file_path);
+            total is None when files has no len()
+        workers: Number of worker processes. None uses every available CPU,
+            1 (or fewer files than PARALLEL_MIN_FILES) analyzes in-process.
+        cache: Optional MetricCache. Files whose contents, language and
+            metric set are already cached are returned without parsing.
+        classifier: Optional FileClassifier. Files it says to skip yield a
+            {"file", "language", "skipped": {...}} record instead of
+            metrics; flagged files that are analyzed carry a
+            "classification" entry.
+        root_path: Directory the files were scanned from, for the classifier
+        instrument: Optional Instrumentation; analyzed files then carry a
+            "performance" record (cache hits do not, they were not analyzed)
+        metrics: Metric names to run (all if None). A classifier's reduced
+            metric set narrows this further.
+    """
+    total = len(files) if hasattr(files, "__len__") else None
+    entries = plan_files(files, cache, classifier, root_path, instrument, metrics)
+
+    try:
+        for i, (file_path, verdict, result) in enumerate(_run_analyzer(entries, workers, total, file_task(cache)), 1):
+            result = settle_file(cache, verdict, result)
+            if progress_callback:
+                progress_callback(i, total, file_path)
+            if result:
+                yield result
+    finally:
+        if cache is not None:
+            cache.flush()
+
+
+def analyze_files(files, progress_callback=None, workers=None, cache=None, classifier=None, root_path=None,
+                  instrument=None, metrics=None):
+    """
+    Analyze a list of (file_path, language) tuples.
+
+    Same arguments as iter_analyze_files().
+
+    Returns:
+        List of analyzer() results in the same order as files
+    """
+    return list(iter_analyze_files(
+        files, progress_callback=progress_callback, workers=workers,
+        cache=cache, classifier=classifier, root_path=root_path, instrument=instrument, metrics=metrics,
+    ))
+
+
+def plan_files(files, cache, classifier, root_path, instrument=None, selected=None):
+    """
+    Decide, file by file, what analyzing files takes, without analyzing
+    or reading anything beyond what the classifier samples; for callers
+    that schedule the analysis themselves, like iter_analyze_files and
+    the HTTP service.
+
+    Yields:
+        (file_path, verdict, ready result, args) per file, in input order.
+        Skipped files come with their result ready and args None;
+        otherwise file_task(cache)(*args) produces the task output, which
+        settle_file() turns into the result.
+    """
+    reader = fingerprint = None
+    if cache is not None:
+        reader, fingerprint = cache.reader(), metrics_fingerprint()
+
+    for entry in files:
+        file_path = entry[0]
+        verdict = None
+        metrics = selected
+
+        if classifier is not None:
+            size = entry[2] if len(entry) > 2 else None
+            verdict = classifier.classify(file_path, size, root_path)
+
+            if verdict is not None and verdict.action == SKIP:
+                yield file_path, verdict, {
+                    "file": file_path,
+                    "language": detect_language(file_path),
+                    "skipped": {"kind": verdict.kind, "reason": verdict.reason}
+                }, None
+                continue
+
+            if verdict is not None:
+                metrics = narrow_metrics(selected, verdict.metrics)
+
+        if cache is None:
+            yield file_path, verdict, None, (file_path, metrics, instrument)
+        else:
+            yield file_path, verdict, None, (file_path, metrics, instrument, reader, fingerprint)
+
+
+def file_task(cache):
+    """The function plan_files() args are for: analyze_cached() with a cache, else analyzer()."""
+    return analyzer if cache is None else analyze_cached
+
+
+def settle_file(cache, verdict, output):
+    """
+    analyzer() result of a plan_files() ready result or task output. An
+    analyze_cached() lookup is recorded in cache, and the verdict of an
+    analyzed file attached as "classification".
+    """
+    result = output
+    if isinstance(output, tuple):
+        key, hit, result = output
+        if key:
+            cache.record(key, result.get("metrics") if result else None, hit)
+
+    if result and verdict is not None and "skipped" not in result:
+        result["classification"] = verdict.as_dict()
+    return result
+
+
+def narrow_metrics(selected, reduced):
+    """Metric names allowed by both a caller's selection and a classifier's reduced set."""
+    if reduced is None:
+        return selected
+    if selected is None:
+        return reduced
+    return [name for name in selected if name in reduced]
+
+
+def metric_set_fingerprint(fingerprint, metrics=None):
+    """Fingerprint for a subset of the metrics, cached apart from the full set."""
+    if metrics is None:
+        return fingerprint
+    return f"{fingerprint}:{','.join(sorted(metrics))}"
+
+
+def _run_analyzer(entries, workers=None, total=None, task=analyzer):
+    """
+    Yield (file_path, tag, result) for (file_path, tag, result, args)
+    entries, in order. Entries whose result is None get task(*args), run on
+    a process pool if worthwhile; the others are passed through.
+    """
+    if workers is None:
+        workers = default_workers()
+    if total is not None:
+        workers = min(workers, total)
+
+    if workers <= 1 or (total is not None and total < PARALLEL_MIN_FILES):
+        for file_path, tag, result, args in entries:
+            yield file_path, tag, result if result is not None else task(*args)
+        return
+
+    # Each worker imports this module once, which registers the parsers and
+    # metrics and builds that process's own tree-sitter Parser objects.
+    # Only a bounded window of files is in flight, oldest first, so output
+    # stays in input order and finished results never pile up.
+    from concurrent.futures import ProcessPoolExecutor
+
+    window = deque()
+    limit = workers * 8
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_path, tag, result, args in entries:
+            if result is None:
+                result = pool.submit(task, *args)
+            window.append((file_path, tag, result))
+
+            if len(window) >= limit:
+                yield _settle(window.popleft())
+
+        while window:
+            yield _settle(window.popleft())
+
+
+def _settle(entry):
+    file_path, tag, result = entry
+    if isinstance(result, Future):
+        result = result.result()
+    return file_path, tag, result
+
+
+def iter_analyze_directory(root_path: str, progress_callback=None, workers=None, cache=None, classifier=None,
+                           instrument=None, metrics=None):
+    """
+    Scan root_path and yield per-file analyzer() results as they finish.
+
+    Analysis starts while the directory walk is still running, so results
+    come in walk order rather than sorted by path. progress_callback, if
+    given, receives a message once scanning is done. With a classifier,
+    skipped files are yielded as records with a "skipped" entry.
+    """
+    load_plugins()
+    scanner = FileScanner()
+    scanned = 0
+
+    def files():
+        nonlocal scanned
+        for entry in scanner.iter_files(root_path):
+            scanned += 1
+            yield entry
+
         if progress_callback:
-            progress_callback(i, total, file_path)
-        
-        result = analyzer(file_path)
-        if result:
-            results.append(result)
-    
-    return results
+            progress_callback(f"Scanned {scanned} supported files")
+
+    yield from iter_analyze_files(
+        files(), workers=workers, cache=cache, classifier=classifier, root_path=root_path, instrument=instrument,
+        metrics=metrics,
+    )
 
 
-def analyze_directory(root_path: str, progress_callback=None):
+def analyze_directory(root_path: str, progress_callback=None, workers=None, cache=None, classifier=None,
+                      instrument=None, metrics=None):
    
+    load_plugins()
     scanner = FileScanner()
-    files = scanner.scan_directory(root_path)
+    # Same files and order as scan_directory(), plus sizes for the classifier
+    files = sorted(scanner.iter_files(root_path))
 
     if progress_callback:
         progress_callback(f"Scanned {len(files)} supported files")
 
-    results = analyze_files(files)
-    return {
+    results = analyze_files(
+        files, workers=workers, cache=cache, classifier=classifier, root_path=root_path, instrument=instrument,
+        metrics=metrics,
+    )
+    skipped = [result for result in results if "skipped" in result]
+    if skipped:
+        results = [result for result in results if "skipped" not in result]
+
+    output = {
         "root_path": root_path,
         "total_files_scanned": len(files),
         "total_files_analyzed": len(results),
         "results": results
     }
+    if classifier is not None:
+        output["skipped_files"] = skipped
+    if cache is not None:
+        output["cache"] = cache.stats()
+    if instrument is not None:
+        output["performance"] = summarize_performance(results)
+    return output
+
+
+def analyze_github_repo(repo_url: str, progress_callback=None, cleanup=True, workers=None, cache=None, classifier=None,
+                        checkout=True, mirrors=None, sparse=False, instrument=None, metrics=None):
+    """
+    Clone repo_url and analyze it. With checkout=False the clone is bare
+    and HEAD is analyzed straight from the object database.
+
+    With sparse=True a checkout clone is blob-less and sparse, so only
+    files with analyzable_extensions() are downloaded and written.
+
+    With a MirrorCache as mirrors, the repository's cached mirror is
+    fetched (or cloned on first use) and HEAD is analyzed from it, so no
+    temporary clone is made at all.
+
+    With an Instrumentation as instrument, results carry "performance"
+    records and the output a "performance" roll-up.
+    """
+    # engine.revision builds on this module; git is only needed here
+    from core.github_clone import GitHubCloner
+    from engine.revision import analyze_revision
+
+    if mirrors is not None:
+        with mirrors.mirror(repo_url, progress_callback=progress_callback) as mirror_path:
+            analysis_output = analyze_revision(
+                mirror_path, progress_callback=progress_callback, workers=workers, cache=cache,
+                classifier=classifier, instrument=instrument, metrics=metrics
+            )
+        analysis_output["repo_url"] = repo_url
+        analysis_output["mirror_path"] = mirror_path
+        return analysis_output
 
-
-def analyze_github_repo(repo_url: str, progress_callback=None, cleanup=True):
-    
     cloner = GitHubCloner()
     cloned_path = None
 
     try:
-        cloned_path = cloner.clone_repo(repo_url, progress_callback=progress_callback)
-        analysis_output = analyze_directory(cloned_path, progress_callback=progress_callback)
+        cloned_path = cloner.clone_repo(
+            repo_url, progress_callback=progress_callback, bare=not checkout,
+            extensions=analyzable_extensions() if sparse else None
+        )
+        if checkout:
+            analysis_output = analyze_directory(
+                cloned_path, progress_callback=progress_callback, workers=workers, cache=cache,
+                classifier=classifier, instrument=instrument, metrics=metrics
+            )
+        else:
+            analysis_output = analyze_revision(
+                cloned_path, progress_callback=progress_callback, workers=workers, cache=cache,
+                classifier=classifier, instrument=instrument, metrics=metrics
+            )
         analysis_output["repo_url"] = repo_url
         analysis_output["cloned_path"] = cloned_path
         return analysis_output
@@ -0,0 +1,277 @@
+"""
+Metric trends over a range of commits.
+
+Consecutive commits share almost all of their files, and identical file
+contents share a blob SHA. The commit trees are diffed against each other
+by object SHA, so unchanged directories are never walked twice, every
+distinct blob in the range is analyzed exactly once, and per-commit totals
+are rebuilt by applying each commit's changed files to running sums. The
+cost is close to analyzing the files that actually changed.
+"""
+from git import Repo
+
+from core.file_scanner import FileScanner
+from core.ignore import IgnoreChain
+from core.mirror_cache import MirrorCache
+from engine.analyzer import _run_analyzer, analyze_source
+from engine.revision import SYMLINK_MODE, plan_blobs, tree_ignore_chain
+
+# Per-blob numbers kept for trends, in this order
+TREND_FIELDS = ("functions", "cc_total", "max_cc", "volume", "bugs", "classes")
+
+
+def history_commits(repo, rev="HEAD", max_count=None, tags=False, first_parent=True):
+    """
+    Commits to chart, oldest first: the last max_count commits of rev
+    (following first parents only by default, for a linear trend), or
+    with tags=True the last max_count tagged commits by commit date.
+    """
+    if tags:
+        commits = {}
+        for tag in repo.tags:
+            try:
+                commit = tag.commit
+            except ValueError:
+                # Tag of a tree or blob
+                continue
+            commits[commit.hexsha] = (commit, tag.name)
+        ordered = sorted(commits.values(), key=lambda entry: entry[0].committed_date)
+        if max_count:
+            ordered = ordered[-max_count:]
+        return ordered
+
+    kwargs = {"first_parent": True} if first_parent else {}
+    commits = list(repo.iter_commits(rev, max_count=max_count, **kwargs))
+    commits.reverse()
+    return [(commit, None) for commit in commits]
+
+
+def diff_trees(old, new, scanner, prefix="", old_chain=None, new_chain=None, rules=None):
+    """
+    Yield (path, language, old blob, new blob) for supported files that
+    differ between two trees, either of which may be None. Each side is
+    filtered by its own ignore files (old_chain / new_chain are the
+    IgnoreChains in effect above the trees). Subtrees with equal SHAs
+    under the same ignore rules are skipped without being read.
+    """
+    if rules is None:
+        rules = {}
+    old_chain = old_chain or IgnoreChain()
+    new_chain = new_chain or IgnoreChain()
+    if old is not None:
+        old_chain = tree_ignore_chain(old, old_chain, scanner, rules)
+    if new is not None:
+        new_chain = tree_ignore_chain(new, new_chain, scanner, rules)
+
+    old_trees = _visible_trees(old, scanner, old_chain, prefix)
+    new_trees = _visible_trees(new, scanner, new_chain, prefix)
+    same_rules = old_chain.layers == new_chain.layers
+
+    for name in old_trees.keys() | new_trees.keys():
+        before, after = old_trees.get(name), new_trees.get(name)
+        if same_rules and before is not None and after is not None and before.hexsha == after.hexsha:
+            continue
+        yield from diff_trees(before, after, scanner, f"{prefix}{name}/", old_chain, new_chain, rules)
+
+    old_blobs = _supported_blobs(old, scanner, prefix, old_chain)
+    new_blobs = _supported_blobs(new, scanner, prefix, new_chain)
+
+    for path in old_blobs.keys() | new_blobs.keys():
+        before, after = old_blobs.get(path), new_blobs.get(path)
+        if before is not None and after is not None and before[1].hexsha == after[1].hexsha:
+            continue
+        language = (after or before)[0]
+        yield path, language, before and before[1], after and after[1]
+
+
+def _visible_trees(tree, scanner, chain, prefix):
+    if tree is None:
+        return {}
+    return {
+        subtree.name: subtree for subtree in tree.trees
+        if subtree.name not in scanner.IGNORE_DIRS and not chain.ignored(prefix + subtree.name, True)
+    }
+
+
+def _supported_blobs(tree, scanner, prefix, chain):
+    if tree is None:
+        return {}
+
+    blobs = {}
+    for blob in tree.blobs:
+        if blob.mode == SYMLINK_MODE:
+            continue
+        path = prefix + blob.name
+        language = scanner.language_for(path, chain)
+        if language:
+            blobs[path] = (language, blob)
+    return blobs
+
+
+def trend_point(result):
+    """TREND_FIELDS of one analyzed file, or None if it has no metrics."""
+    metrics = result.get("metrics") if result else None
+    if not metrics:
+        return None
+
+    per_function = metrics.get("cyclomatic_complexity", {}).get("per_function", {})
+    halstead = metrics.get("halstead", {})
+
+    return (
+        len(per_function),
+        sum(per_function.values()),
+        max(per_function.values(), default=0),
+        halstead.get("volume", 0),
+        halstead.get("estimated_bugs", 0),
+        metrics.get("oop_metrics", {}).get("number_of_classes", 0),
+    )
+
+
+class _Totals:
+    """Repo-level sums over the files present at a commit."""
+
+    def __init__(self):
+        self.files = 0
+        self.sums = [0] * len(TREND_FIELDS)
+        # Files per max_cc value, since a maximum cannot be subtracted
+        self.max_counts = {}
+
+    def apply(self, point, sign):
+        if point is None:
+            return
+        self.files += sign
+        for i, value in enumerate(point):
+            self.sums[i] += sign * value
+        count = self.max_counts.get(point[2], 0) + sign
+        if count:
+            self.max_counts[point[2]] = count
+        else:
+            del self.max_counts[point[2]]
+
+    def as_dict(self):
+        functions, cc_total, _, volume, bugs, classes = self.sums
+        return {
+            "files": self.files,
+            "functions": functions,
+            "max_cc": max(self.max_counts, default=0),
+            "avg_cc": round(cc_total / functions, 2) if functions else 0,
+            "volume": round(volume, 2),
+            "bugs": round(bugs, 3),
+            "classes": classes,
+        }
+
+
+def analyze_history(repo_path, rev="HEAD", max_count=50, tags=False, first_parent=True,
+                    progress_callback=None, workers=None, cache=None, classifier=None):
+    """
+    Metric trends over the last max_count commits of rev (or tags, see
+    history_commits()).
+
+    Returns:
+        Dict with
+          "commits": per commit, oldest first, its sha, date, tag and
+              repo-level totals
+          "blobs": TREND_FIELDS per distinct analyzed blob SHA
+          "files": per path, the [commit index, blob SHA] points where the
+              file changed; a None SHA means it was deleted
+        plus "blobs_analyzed", the repository's "repo_path" and "cache"
+        stats when a cache is given. File paths are repository-relative,
+        so "root_path" is "", as for analyze_revision().
+    """
+    repo = repo_path if isinstance(repo_path, Repo) else Repo(repo_path)
+    scanner = FileScanner()
+    selected = history_commits(repo, rev, max_count=max_count, tags=tags, first_parent=first_parent)
+
+    if progress_callback:
+        progress_callback(f"Diffing {len(selected)} commits...")
+
+    # Pass 1: per-commit file changes, and every distinct blob to analyze
+    changes = []
+    distinct = {}
+    previous = None
+    rules = {}
+    for commit, _ in selected:
+        changed = []
+        for path, language, before, after in diff_trees(previous, commit.tree, scanner, rules=rules):
+            changed.append((path, before and before.hexsha, after and after.hexsha))
+            if after is not None and after.hexsha not in distinct:
+                distinct[after.hexsha] = (path, language, after)
+        changes.append(changed)
+        previous = commit.tree
+
+    if progress_callback:
+        progress_callback(f"Analyzing {len(distinct)} distinct files...")
+
+    # Pass 2: analyze each blob once
+    points = {}
+    try:
+        entries = plan_blobs(list(distinct.values()), cache, classifier)
+        for _, (key, _, blob_sha), result in _run_analyzer(entries, workers, len(distinct), task=analyze_source):
+            if key and result and "metrics" in result:
+                cache.put(key, result["metrics"])
+            points[blob_sha] = trend_point(result)
+    finally:
+        if cache is not None:
+            cache.flush()
+
+    # Pass 3: replay the changes over running totals
+    totals = _Totals()
+    commits = []
+    files = {}
+    for index, ((commit, tag), changed) in enumerate(zip(selected, changes)):
+        for path, before, after in changed:
+            totals.apply(points.get(before), -1)
+            totals.apply(points.get(after), 1)
+            files.setdefault(path, []).append([index, after])
+
+        commits.append({
+            "commit": commit.hexsha,
+            "date": commit.committed_datetime.isoformat(),
+            "tag": tag,
+            "summary": totals.as_dict(),
+        })
+
+    output = {
+        "root_path": "",
+        "repo_path": repo.working_tree_dir or repo.git_dir,
+        "commits": commits,
+        "blobs": {sha: point for sha, point in points.items() if point is not None},
+        "files": files,
+        "blobs_analyzed": len(distinct),
+    }
+    if cache is not None:
+        output["cache"] = cache.stats()
+    return output
+
+
+def file_trend(history, path, field="cc_total"):
+    """
+    One file's field at every commit of an analyze_history() result, None
+    where the file is absent or has no metrics.
+    """
+    column = TREND_FIELDS.index(field)
+    series = [None] * len(history["commits"])
+    points = history["files"].get(path, [])
+
+    for i, (index, blob_sha) in enumerate(points):
+        end = points[i + 1][0] if i + 1 < len(points) else len(series)
+        point = history["blobs"].get(blob_sha) if blob_sha else None
+        value = point[column] if point else None
+        for j in range(index, end):
+            series[j] = value
+
+    return series
+
+
+def analyze_github_history(repo_url, mirrors=None, progress_callback=None, **kwargs):
+    """
+    analyze_history() of repo_url's default branch, through a MirrorCache
+    (so full history is fetched once and then kept up to date).
+    """
+    mirrors = mirrors or MirrorCache()
+
+    with mirrors.mirror(repo_url, progress_callback=progress_callback) as mirror_path:
+        output = analyze_history(mirror_path, progress_callback=progress_callback, **kwargs)
+
+    output["repo_url"] = repo_url
+    return output
@@ -0,0 +1,194 @@
+"""
+Incremental repository analysis driven by git diff.
+
+Only the files that changed between a base and a head revision are
+analyzed; their results are merged into the base revision's stored
+analyze_directory() output, so the result looks like a full scan of head.
+"""
+import os
+
+from git import Repo
+
+from core.file_scanner import FileScanner
+from engine.analyzer import analyze_directory, analyze_files
+
+
+def diff_files(repo, base, head=None):
+    """
+    List changes between two revisions (head=None means the working tree).
+
+    Returns:
+        List of (status, old_path, new_path) with status one of
+        A, M, D, R, C or T. old_path is None for additions, new_path is
+        None for deletions. Renames and copies keep their similarity score
+        in the status (e.g. R100).
+    """
+    args = ["--name-status", "-M", "-z", base]
+    if head:
+        args.append(head)
+
+    fields = repo.git.diff(*args).split("\0")
+    changes = []
+    i = 0
+
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in ("R", "C"):
+            changes.append((status, fields[i + 1], fields[i + 2]))
+            i += 3
+        elif status[0] == "A":
+            changes.append((status, None, fields[i + 1]))
+            i += 2
+        elif status[0] == "D":
+            changes.append((status, fields[i + 1], None))
+            i += 2
+        else:
+            changes.append((status, fields[i + 1], fields[i + 1]))
+            i += 2
+
+    return changes
+
+
+def untracked_files(repo):
+    """
+    Untracked files of the working tree that git does not ignore, as
+    additions in diff_files() form. git diff never reports them.
+    """
+    output = repo.git.ls_files("--others", "--exclude-standard", "-z")
+    return [("A", None, path) for path in output.split("\0") if path]
+
+
+def analyze_changes(repo_path: str, base: str, head: str = "HEAD", base_output=None,
+                    progress_callback=None, workers=None, cache=None, classifier=None):
+    """
+    Analyze head incrementally against stored results for base.
+
+    Args:
+        repo_path: Git working tree with head checked out
+        base: Base revision the stored results were produced from
+        head: Head revision (must be the checked-out commit), or None to
+            compare base against the working tree, untracked files included
+        base_output: analyze_directory() output for base, e.g. loaded with
+            reports.json_report.load_json_report. Without it, or when an
+            ignore file changed, the whole head tree is analyzed.
+        progress_callback: Optional callback for progress updates
+        workers: Number of worker processes for the changed files
+        cache: Optional MetricCache
+        classifier: Optional FileClassifier, as for analyze_directory();
+            pass the same one the base output was produced with
+
+    Returns:
+        analyze_directory()-shaped dict for head, plus base/head revisions
+        and the list of changed files
+    """
+    repo = Repo(repo_path)
+
+    if head and repo.commit(head).hexsha != repo.head.commit.hexsha:
+        raise ValueError(f"Revision {head} must be checked out in {repo_path}")
+
+    changes = diff_files(repo, base, head)
+    if not head:
+        changes.extend(untracked_files(repo))
+
+    if progress_callback:
+        progress_callback(f"Found {len(changes)} changed files between {base} and {head or 'working tree'}")
+
+    # New ignore rules can drop or bring back files that did not change
+    ignores_changed = any(
+        path and os.path.basename(path) in FileScanner.IGNORE_FILE_NAMES
+        for _, old_path, new_path in changes for path in (old_path, new_path)
+    )
+
+    if base_output is None or ignores_changed:
+        output = analyze_directory(
+            repo_path, progress_callback=progress_callback, workers=workers, cache=cache, classifier=classifier
+        )
+    else:
+        output = merge_changes(repo_path, changes, base_output, workers=workers, cache=cache, classifier=classifier)
+
+    output["base_revision"] = repo.commit(base).hexsha
+    output["head_revision"] = repo.commit(head).hexsha if head else None
+    output["changed_files"] = [
+        {"status": status, "old_path": old_path, "new_path": new_path}
+        for status, old_path, new_path in changes
+    ]
+    return output
+
+
+def merge_changes(repo_path, changes, base_output, workers=None, cache=None, classifier=None):
+    """
+    Re-analyze changed files and merge them into base_output's results.
+
+    Results come out sorted by path, like analyze_directory(). With a
+    classifier, changed files it skips join base_output's "skipped_files".
+    """
+    scanner = FileScanner()
+    ignores = {}
+    # analyze_revision() output has repository-relative files and no root
+    base_root = base_output.get("root_path", repo_path)
+
+    def by_path(records):
+        return {
+            (os.path.relpath(record["file"], base_root) if base_root else record["file"]).replace(os.sep, "/"): record
+            for record in records
+        }
+
+    # Stored results and skipped records keyed by repository-relative path
+    merged = by_path(base_output.get("results", []))
+    skipped = by_path(base_output.get("skipped_files", []))
+
+    to_analyze = []
+    for status, old_path, new_path in changes:
+        old_result = None
+        if old_path and status[0] != "C":
+            old_result = merged.pop(old_path, None)
+            skipped.pop(old_path, None)
+
+        if not new_path or not scanner.language_at(repo_path, new_path, ignores):
+            continue
+
+        # Pure rename: contents are unchanged, only the path moves. A
+        # classifier may judge the new path differently, so then re-analyze.
+        if status == "R100" and old_result is not None and classifier is None:
+            merged[new_path] = dict(old_result, file=os.path.join(repo_path, new_path))
+            continue
+
+        merged.pop(new_path, None)
+        skipped.pop(new_path, None)
+        to_analyze.append(new_path)
+
+    files = [
+        (os.path.join(repo_path, rel_path), scanner.language_at(repo_path, rel_path, ignores))
+        for rel_path in sorted(to_analyze)
+    ]
+    fresh = analyze_files(files, workers=workers, cache=cache, classifier=classifier, root_path=repo_path)
+
+    results = [
+        dict(result, file=os.path.join(repo_path, rel_path))
+        for rel_path, result in merged.items()
+    ]
+    skipped_files = [
+        dict(record, file=os.path.join(repo_path, rel_path))
+        for rel_path, record in skipped.items()
+    ]
+    for result in fresh:
+        (skipped_files if "skipped" in result else results).append(result)
+
+    results.sort(key=lambda result: result["file"])
+    skipped_files.sort(key=lambda record: record["file"])
+
+    # Files the base scan found but could not analyze are carried over as-is
+    unanalyzed = max(0, base_output.get("total_files_scanned", 0) - base_output.get("total_files_analyzed", 0)
+                     - len(base_output.get("skipped_files", [])))
+
+    output = {
+        "root_path": repo_path,
+        "total_files_scanned": len(results) + len(skipped_files) + unanalyzed,
+        "total_files_analyzed": len(results),
+        "results": results
+    }
+    if classifier is not None:
+        output["skipped_files"] = skipped_files
+    if cache is not None:
+        output["cache"] = cache.stats()
+    return output
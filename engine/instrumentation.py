@@ -0,0 +1,236 @@
+"""
+Opt-in performance instrumentation of the analysis pipeline.
+
+Pass an Instrumentation to analyzer() (or any analyze_* entry point) and
+every analyzed file gets a "performance" record: wall and CPU time of
+reading, parsing, the shared query-pack capture and each metric, plus the
+file's size in bytes and its syntax tree's node count. A deterministic
+sample of files can additionally be run under cProfile and tracemalloc.
+PerformanceSummary rolls the records up per run.
+"""
+import os
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(stages, name):
+    """Add the wall and CPU milliseconds of the with-block to stages[name]."""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        entry = stages.get(name)
+        if entry is None:
+            entry = stages[name] = {"wall_ms": 0.0, "cpu_ms": 0.0}
+        entry["wall_ms"] += (time.perf_counter() - wall) * 1000
+        entry["cpu_ms"] += (time.process_time() - cpu) * 1000
+
+
+def add_stages(record, stages):
+    """Fold stages timed before a file's FileProbe started (see timed()) into its record."""
+    for name, entry in stages.items():
+        stage = record["stages"].setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0})
+        for field in ("wall_ms", "cpu_ms"):
+            stage[field] = round(stage[field] + entry[field], 3)
+            record[field] = round(record[field] + entry[field], 3)
+
+
+class Instrumentation:
+    """
+    Settings for instrumented runs. Picklable, so it travels to worker
+    processes with each file.
+
+    Args:
+        profile_sample: Fraction of files (0 to 1) to also run under
+            cProfile and tracemalloc. Files are picked by a hash of their
+            path, so the same files are profiled on every run.
+        profile_top: Functions kept from each profile, by cumulative time
+    """
+
+    def __init__(self, profile_sample=0.0, profile_top=15):
+        self.profile_sample = profile_sample
+        self.profile_top = profile_top
+
+    def should_profile(self, file_path):
+        if self.profile_sample <= 0:
+            return False
+        return zlib.crc32(str(file_path).encode("utf-8")) % 10000 < self.profile_sample * 10000
+
+    def start(self, file_path):
+        return FileProbe(profile=self.should_profile(file_path), profile_top=self.profile_top)
+
+
+class FileProbe:
+    """Performance record of one file while it is analyzed."""
+
+    def __init__(self, profile=False, profile_top=15):
+        self.stages = {}
+        self.bytes = None
+        self.nodes = None
+        self.profile_top = profile_top
+        self._profiler = None
+        self._tracing = False
+
+        if profile:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            tracemalloc.reset_peak()
+            try:
+                import cProfile
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this process
+                self._profiler = None
+
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def stage(self, name):
+        return timed(self.stages, name)
+
+    def observe_tree(self, tree):
+        if tree is not None and tree.root_node is not None:
+            self.nodes = tree.root_node.descendant_count
+
+    def finish(self):
+        """Stop measuring and return the record attached as "performance"."""
+        wall = (time.perf_counter() - self._wall) * 1000
+        cpu = (time.process_time() - self._cpu) * 1000
+
+        record = {
+            "wall_ms": round(wall, 3),
+            "cpu_ms": round(cpu, 3),
+            "bytes": self.bytes,
+            "nodes": self.nodes,
+            "stages": {
+                name: {"wall_ms": round(entry["wall_ms"], 3), "cpu_ms": round(entry["cpu_ms"], 3)}
+                for name, entry in self.stages.items()
+            },
+        }
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            record["profile"] = _top_functions(self._profiler, self.profile_top)
+            self._profiler = None
+
+        if tracemalloc.is_tracing() and ("profile" in record or self._tracing):
+            _, peak = tracemalloc.get_traced_memory()
+            record["alloc_peak_kb"] = round(peak / 1024, 1)
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+        return record
+
+
+def _top_functions(profiler, top):
+    import pstats
+
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+
+    return [
+        {
+            "function": f"{os.path.basename(file_name)}:{line}({function})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (file_name, line, function), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+class PerformanceSummary:
+    """Running per-run totals over instrumented per-file results."""
+
+    def __init__(self, top=20):
+        self.top = top
+        self.files = 0
+        self.cached = 0
+        self.bytes = 0
+        self.nodes = 0
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.stages = {}
+        self.slowest = []
+        self.profiled = []
+
+    def add(self, result):
+        if not result or "skipped" in result:
+            return
+
+        performance = result.get("performance")
+        if performance is None:
+            # Served from the metric cache, or analyzed without instrumentation
+            self.cached += 1
+            return
+
+        self.files += 1
+        self.bytes += performance.get("bytes") or 0
+        self.nodes += performance.get("nodes") or 0
+        self.wall_ms += performance["wall_ms"]
+        self.cpu_ms += performance["cpu_ms"]
+
+        for name, entry in performance["stages"].items():
+            total = self.stages.get(name)
+            if total is None:
+                total = self.stages[name] = {"wall_ms": 0.0, "cpu_ms": 0.0, "files": 0}
+            total["wall_ms"] += entry["wall_ms"]
+            total["cpu_ms"] += entry["cpu_ms"]
+            total["files"] += 1
+
+        stages = performance["stages"]
+        self.slowest.append({
+            "file": result.get("file"),
+            "language": result.get("language"),
+            "wall_ms": performance["wall_ms"],
+            "cpu_ms": performance["cpu_ms"],
+            "bytes": performance.get("bytes"),
+            "nodes": performance.get("nodes"),
+            "slowest_stage": max(stages, key=lambda name: stages[name]["wall_ms"]) if stages else None,
+        })
+        # Keep memory bounded on huge runs
+        if len(self.slowest) > self.top * 4:
+            self._trim()
+
+        if "profile" in performance:
+            self.profiled.append(result.get("file"))
+
+    def _trim(self):
+        self.slowest.sort(key=lambda row: row["wall_ms"], reverse=True)
+        del self.slowest[self.top:]
+
+    def as_dict(self):
+        self._trim()
+        return {
+            "files": self.files,
+            "cached": self.cached,
+            "bytes": self.bytes,
+            "nodes": self.nodes,
+            "wall_ms": round(self.wall_ms, 3),
+            "cpu_ms": round(self.cpu_ms, 3),
+            "stages": {
+                name: {
+                    "wall_ms": round(entry["wall_ms"], 3),
+                    "cpu_ms": round(entry["cpu_ms"], 3),
+                    "files": entry["files"],
+                }
+                for name, entry in sorted(self.stages.items(), key=lambda item: item[1]["wall_ms"], reverse=True)
+            },
+            "slowest_files": list(self.slowest),
+            "profiled_files": list(self.profiled),
+        }
+
+
+def summarize_performance(results, top=20):
+    """PerformanceSummary of an iterable of per-file results, as a dict."""
+    summary = PerformanceSummary(top=top)
+    for result in results:
+        summary.add(result)
+    return summary.as_dict()
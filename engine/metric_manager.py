@@ -1,20 +1,258 @@
+import hashlib
+import importlib
+import os
+import sys
+from contextlib import nullcontext
+
+from tree_sitter import QueryCursor
+
+from engine.instrumentation import timed
+from engine.node_taxonomy import taxonomy_for
+from engine.parser_manager import ParserManager, iter_entry_points, load_entry_point
+
+
+# Package entry point group for third-party metrics, e.g. in pyproject.toml:
+#   [project.entry-points."staticlens.metrics"]
+#   maintainability = "staticlens_mi.metric"
+# The entry point's name is the metric name. Loading it must call
+# MetricManager.register(); if it names a callable, the callable is called.
+METRIC_ENTRY_POINT_GROUP = "staticlens.metrics"
+
+
+def _stage_label(metric):
+    return f"metric:{getattr(metric, 'name', None) or type(metric).__name__}"
+
+
+def _stage_timer(timings):
+    """stage(name) context manager adding to timings, see timed(); a no-op without timings or a name."""
+    if timings is None:
+        return lambda name: nullcontext()
+    return lambda name: timed(timings, name) if name else nullcontext()
+
+
+class Captures(dict):
+    """
+    Capture name -> nodes of one query pack run. Structures derived from
+    the captures (e.g. the class model) are built once through shared()
+    and reused by every metric consuming the same captures.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.derived = {}
+
+    def shared(self, key, build):
+        value = self.derived.get(key)
+        if value is None:
+            value = self.derived[key] = build()
+        return value
+
+
 class MetricManager:
 
     _metrics = []
 
+    # metric name -> module path or entry point, imported on first use
+    declared = {}
+    _imported = set()
+    _plugins_loaded = False
+
     @classmethod
     def register(cls, metric):
         cls._metrics.append(metric)
 
     @classmethod
-    def run_all(cls, tree, file_path, language):
+    def declare(cls, name, module):
+        """
+        Make a metric available without importing it: module (a dotted
+        path, or an entry point) is imported, and registers the metric, the
+        first time the metric is selected.
+        """
+        cls.declared.setdefault(name, module)
+
+    @classmethod
+    def load_plugins(cls):
+        """Declare the metrics of installed packages (METRIC_ENTRY_POINT_GROUP). Runs once."""
+        if cls._plugins_loaded:
+            return
+        cls._plugins_loaded = True
+
+        for entry_point in iter_entry_points(METRIC_ENTRY_POINT_GROUP):
+            cls.declare(entry_point.name, entry_point)
+
+    @classmethod
+    def _load(cls, names=None):
+        if names is None or any(name not in cls.declared for name in names):
+            cls.load_plugins()
+
+        for name, module in list(cls.declared.items()):
+            if name in cls._imported or (names is not None and name not in names):
+                continue
+            cls._imported.add(name)
+            if isinstance(module, str):
+                importlib.import_module(module)
+            else:
+                load_entry_point(module)
+
+    @classmethod
+    def _ordered(cls):
+        # Declaration order, whatever order the modules were imported in,
+        # so results always list metrics the same way
+        order = {name: i for i, name in enumerate(cls.declared)}
+        return sorted(cls._metrics, key=lambda metric: order.get(getattr(metric, "name", None), len(order)))
+
+    @classmethod
+    def registered(cls):
+        cls._load()
+        return cls._ordered()
 
+    @classmethod
+    def selected(cls, names=None):
+        """Registered metrics whose name is in names (all of them if None)."""
+        cls._load(names)
+        if names is None:
+            return cls._ordered()
+        return [metric for metric in cls._ordered() if getattr(metric, "name", None) in names]
+
+    @classmethod
+    def run_all(cls, tree, file_path, language, metrics=None, timings=None):
+        """
+        Run the selected metrics on tree. With a timings dict, the wall
+        and CPU time of the shared query-pack capture (and tree walk) and
+        of each metric's own work are added to it, see timed().
+        """
         results = {}
+        selected = cls.selected(metrics)
+        stage = _stage_timer(timings)
+        labels = {metric: _stage_label(metric) for metric in selected} if timings is not None else {}
 
-        for metric in cls._metrics:
-            output = metric.analyze(tree, file_path, language)
+        # Visitor metrics share one walk; legacy metrics keep their own analyze()
+        visitors = {}
+        for metric in selected:
+            if hasattr(metric, "visitor"):
+                with stage(labels.get(metric)):
+                    visitors[metric] = metric.visitor(tree, file_path, language)
+
+        if visitors:
+            cls.drive(tree, language, list(visitors.values()), timings, [labels.get(metric) for metric in visitors])
+
+        for metric in selected:
+            with stage(labels.get(metric)):
+                visitor = visitors.get(metric)
+                if visitor is not None:
+                    output = visitor.result()
+                else:
+                    output = metric.analyze(tree, file_path, language)
 
             if output:
                 results.update(output)
 
         return results
+
+    @classmethod
+    def fingerprint(cls):
+        """
+        Hash identifying the registered metric set and its implementation,
+        used to invalidate cached results when a metric changes.
+        """
+        digest = hashlib.sha256()
+
+        for metric in cls.registered():
+            metric_cls = type(metric)
+            digest.update(f"{metric_cls.__module__}.{metric_cls.__qualname__}".encode("utf-8"))
+            digest.update(str(getattr(metric, "version", "")).encode("utf-8"))
+
+            module_file = getattr(sys.modules.get(metric_cls.__module__), "__file__", None)
+            if module_file and os.path.exists(module_file):
+                with open(module_file, "rb") as f:
+                    digest.update(f.read())
+
+        return digest.hexdigest()
+
+    @classmethod
+    def drive(cls, tree, language, visitors, timings=None, labels=None):
+        """
+        Feed visitors from the language's query pack and/or one tree walk.
+
+        Visitors that declare captures consume the pack's captures; the
+        rest subscribe to node types and share a single walk. With a
+        timings dict, the capture and the walk are timed as stages, and
+        each visitor's consume() under its entry in labels.
+        """
+        stage = _stage_timer(timings)
+        labels = labels or [None] * len(visitors)
+        captured = [(v, label) for v, label in zip(visitors, labels) if v.captures is not None]
+        walked = [v for v in visitors if v.captures is None]
+
+        if captured:
+            with stage("capture"):
+                captures = cls.capture(tree, language)
+            for visitor, label in captured:
+                with stage(label):
+                    visitor.consume(captures)
+
+        # Walked visitors share one walk, so it is timed as a whole
+        if walked:
+            with stage("walk"):
+                cls.walk(tree, walked, language)
+
+    @classmethod
+    def capture(cls, tree, language):
+        """Run the language's query pack once; capture name -> nodes."""
+        query = ParserManager.get_query(language)
+
+        if query is None or not tree or not tree.root_node:
+            return Captures()
+
+        return Captures(QueryCursor(query).captures(tree.root_node))
+
+    @classmethod
+    def walk(cls, tree, visitors, language=None):
+        """
+        Walk the tree once with a TreeCursor, dispatching enter/leave events
+        to every visitor subscribed to the node's type or taxonomy flags.
+        """
+        if not tree or not tree.root_node:
+            return
+
+        taxonomy = taxonomy_for(language, tree)
+
+        # kind_id -> bound handlers, filled the first time a kind is seen
+        enter_table = {}
+        leave_table = {}
+        any_leave = any(visitor.wants_leave for visitor in visitors)
+
+        def handlers_for(node):
+            kind = node.kind_id
+            handlers = enter_table.get(kind)
+            if handlers is None:
+                subscribed = [v for v in visitors if v.subscribes(taxonomy.type_of(kind), taxonomy.flags_of(kind))]
+                handlers = [v.enter for v in subscribed]
+                enter_table[kind] = handlers
+                leave_table[kind] = [v.leave for v in subscribed if v.wants_leave]
+            return handlers
+
+        cursor = tree.walk()
+
+        while True:
+            node = cursor.node
+            for handler in handlers_for(node):
+                handler(node)
+
+            if cursor.goto_first_child():
+                continue
+
+            # Leaf: close it and every ancestor whose last child this was
+            while True:
+                if any_leave:
+                    for handler in leave_table[node.kind_id]:
+                        handler(node)
+
+                if cursor.goto_next_sibling():
+                    break
+
+                if not cursor.goto_parent():
+                    return
+
+                if any_leave:
+                    node = cursor.node
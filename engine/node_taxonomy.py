@@ -0,0 +1,123 @@
+"""
+Per-grammar node taxonomy: every node kind id of a tree-sitter Language
+mapped to bit flags, so metrics classify a node with a list lookup and a
+bitwise and instead of comparing node.type strings.
+
+Each parser module builds its grammar's NodeTaxonomy once, when it is
+loaded, and registers it next to the parse function and query pack.
+
+Which nodes the metrics count (functions, classes, decision points,
+operators, operands) is decided by the query packs in
+parsers/queries/<language>.scm. The flags here only cover the
+structural checks the metrics make on nodes the packs captured: walking
+C/C++ declarators down to a function's name, naming functions bound to a
+variable, and telling field declarations from method declarations.
+"""
+import hashlib
+
+from engine.parser_manager import ParserManager
+
+NAMED = 1 << 0                # named node, not an anonymous token
+METHOD = 1 << 1               # method definitions/declarations
+DECLARATOR = 1 << 2           # C/C++ declarators wrapping a declared name
+FUNCTION_DECLARATOR = 1 << 3  # declarator of a function prototype
+BINDING = 1 << 4              # declarator binding a name to a value
+IDENTIFIER = 1 << 5           # identifier-like nodes naming a declaration
+
+# flag -> node types carrying it, across all grammars. A type missing from
+# a grammar is simply never seen.
+KIND_FLAGS = {
+    METHOD: {
+        "method_declaration",       # Java
+        "method_definition",        # JavaScript
+        "function_definition",      # C++, Python (inside class)
+        "constructor_declaration",  # Java
+    },
+    DECLARATOR: {
+        # C++
+        "array_declarator", "attributed_declarator", "function_declarator", "init_declarator",
+        "new_declarator", "parenthesized_declarator", "pointer_declarator", "pointer_type_declarator",
+        "reference_declarator", "structured_binding_declarator", "variadic_declarator",
+        "abstract_array_declarator", "abstract_function_declarator", "abstract_parenthesized_declarator",
+        "abstract_pointer_declarator", "abstract_reference_declarator",
+        # Java, JavaScript
+        "variable_declarator",
+    },
+    FUNCTION_DECLARATOR: {
+        "function_declarator",           # C++
+        "abstract_function_declarator",  # C++
+    },
+    BINDING: {
+        "variable_declarator",  # Java, JavaScript: const f = () => ...
+    },
+    IDENTIFIER: {
+        "identifier",
+        # C++
+        "field_identifier", "qualified_identifier", "destructor_name", "operator_name", "template_function",
+    },
+}
+
+
+class NodeTaxonomy:
+    """
+    Node kinds of one grammar, indexed by kind_id. Index flags directly
+    only for kinds a query pack captured; any node may be an ERROR node.
+
+    Attributes:
+        flags: bit flags of each kind
+        types: node type of each kind ("" for ids without one)
+        type_bytes: the same types, UTF-8 encoded
+    """
+
+    def __init__(self, language):
+        count = language.node_kind_count
+        self.types = [language.node_kind_for_id(kind) or "" for kind in range(count)]
+        self.type_bytes = [kind_type.encode("utf-8") for kind_type in self.types]
+
+        by_type = {}
+        for flag, kind_types in KIND_FLAGS.items():
+            for kind_type in kind_types:
+                by_type[kind_type] = by_type.get(kind_type, 0) | flag
+
+        self.flags = [
+            by_type.get(self.types[kind], 0) | (NAMED if language.node_kind_is_named(kind) else 0)
+            for kind in range(count)
+        ]
+
+    def __len__(self):
+        return len(self.types)
+
+    def flags_of(self, kind):
+        """
+        Flags of a kind id. ERROR nodes have an id past the grammar's kinds,
+        so lookups on nodes that may be ERROR go through here.
+        """
+        return self.flags[kind] if kind < len(self.flags) else NAMED
+
+    def type_of(self, kind):
+        return self.types[kind] if kind < len(self.types) else "ERROR"
+
+    def kinds(self, flag):
+        """Kind ids carrying any of the bits in flag."""
+        return [kind for kind, flags in enumerate(self.flags) if flags & flag]
+
+
+def taxonomy_for(language, tree=None):
+    """
+    Taxonomy of a language's grammar. Parsers that did not register one
+    (e.g. from plugins) get one built from the tree's Language, once.
+    """
+    taxonomy = ParserManager.get_taxonomy(language)
+    if taxonomy is None and tree is not None:
+        taxonomy = NodeTaxonomy(tree.language)
+        if language is not None:
+            ParserManager.taxonomies[language] = taxonomy
+    return taxonomy
+
+
+def taxonomy_digest():
+    """Hash of KIND_FLAGS, so cached metrics follow taxonomy edits."""
+    digest = hashlib.sha256()
+    for flag in sorted(KIND_FLAGS):
+        digest.update(f"{flag}:{','.join(sorted(KIND_FLAGS[flag]))};".encode("utf-8"))
+    return digest.hexdigest()
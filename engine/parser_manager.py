@@ -1,11 +1,137 @@
+import importlib
+
+# Package entry point group for third-party parsers, e.g. in pyproject.toml:
+#   [project.entry-points."staticlens.parsers"]
+#   rust = "staticlens_rust.parser"
+# The entry point's name is the language. Loading it must call
+# ParserManager.register(); if it names a callable, the callable is called.
+PARSER_ENTRY_POINT_GROUP = "staticlens.parsers"
+
+# File extensions of plugin languages, known without importing the plugin:
+#   [project.entry-points."staticlens.extensions"]
+#   rs = "rust"
+# The entry point's name is the extension (without the dot), its value the
+# language, which must have a parser entry point.
+EXTENSION_ENTRY_POINT_GROUP = "staticlens.extensions"
+
+
+def load_entry_point(entry_point):
+    """Import an entry point and call it if it names a register() function."""
+    loaded = entry_point.load()
+    if entry_point.attr and callable(loaded):
+        loaded()
+    return loaded
+
+
+def iter_entry_points(group):
+    # importlib.metadata is slow to import; only plugin lookups need it
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        return list(found.select(group=group))
+    return list(found.get(group, []))  # Python < 3.10
+
 
 class ParserManager:
     registry = {}
+    source_parsers = {}
+    queries = {}
+    taxonomies = {}
+
+    # language -> module path or entry point, imported on first use
+    declared = {}
+    # extension (without the dot) -> language, for parsers added by plugins
+    extensions = {}
+    _plugins_loaded = False
 
     @classmethod
-    def register(cls, language, parser):
+    def register(cls, language, parser, source_parser=None, query=None, extensions=(), taxonomy=None):
         cls.registry[language] = parser
+        if source_parser is not None:
+            cls.source_parsers[language] = source_parser
+        if query is not None:
+            cls.queries[language] = query
+        if taxonomy is not None:
+            cls.taxonomies[language] = taxonomy
+        for extension in extensions:
+            cls.extensions.setdefault(extension.lstrip(".").lower(), language)
+
+    @classmethod
+    def declare(cls, language, module):
+        """
+        Make language available without loading it: module (a dotted path,
+        or an entry point) is imported, and registers its parser, the first
+        time a file of that language is parsed.
+        """
+        cls.declared.setdefault(language, module)
+
+    @classmethod
+    def available(cls, language):
+        """Whether language has a parser, without loading its grammar."""
+        return language in cls.registry or language in cls.declared
+
+    @classmethod
+    def _load(cls, language):
+        if language in cls.registry or language is None:
+            return
+
+        if language not in cls.declared:
+            cls.load_plugins()
+
+        module = cls.declared.get(language)
+        if module is None:
+            return
+        if isinstance(module, str):
+            importlib.import_module(module)
+        else:
+            load_entry_point(module)
+
+    @classmethod
+    def load_plugins(cls):
+        """
+        Declare the parsers of installed packages (PARSER_ENTRY_POINT_GROUP)
+        and their file extensions (EXTENSION_ENTRY_POINT_GROUP) from package
+        metadata alone. A plugin is imported the first time a file of its
+        language is parsed. Runs once.
+        """
+        if cls._plugins_loaded:
+            return
+        cls._plugins_loaded = True
+
+        for entry_point in iter_entry_points(PARSER_ENTRY_POINT_GROUP):
+            if entry_point.name not in cls.registry:
+                cls.declare(entry_point.name, entry_point)
+
+        for entry_point in iter_entry_points(EXTENSION_ENTRY_POINT_GROUP):
+            language = entry_point.value.strip()
+            if cls.available(language):
+                cls.extensions.setdefault(entry_point.name.lstrip(".").lower(), language)
+
+    @classmethod
+    def language_for_extension(cls, extension):
+        """Language a plugin declared or registered for extension, or None."""
+        extension = extension.lstrip(".").lower()
+        if extension not in cls.extensions:
+            cls.load_plugins()
+        return cls.extensions.get(extension)
 
     @classmethod
     def get_parser(cls, language):
+        cls._load(language)
         return cls.registry.get(language)
+
+    @classmethod
+    def get_source_parser(cls, language):
+        cls._load(language)
+        return cls.source_parsers.get(language)
+
+    @classmethod
+    def get_query(cls, language):
+        cls._load(language)
+        return cls.queries.get(language)
+
+    @classmethod
+    def get_taxonomy(cls, language):
+        cls._load(language)
+        return cls.taxonomies.get(language)
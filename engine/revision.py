@@ -0,0 +1,210 @@
+"""
+Analyze a git revision straight from the object database.
+
+The commit's tree is walked through GitPython and each supported blob is
+streamed from the repository (loose objects or pack files) into the
+parsers, so no working tree is checked out. Blob SHAs identify file
+contents: they key the metric cache without reading or hashing the blob,
+and are reported with every result.
+"""
+from git import Repo
+
+from core.file_classifier import SKIP
+from core.file_scanner import FileScanner
+from core.ignore import IgnoreChain, IgnoreRules
+from core.metric_cache import MetricCache
+from engine.analyzer import (
+    _run_analyzer, analyze_source, load_plugins, metric_set_fingerprint, metrics_fingerprint, narrow_metrics,
+)
+from engine.instrumentation import summarize_performance
+
+# Mode of symbolic links in git trees; their "contents" are the target path
+SYMLINK_MODE = 0o120000
+
+
+def tree_ignore_chain(tree, chain, scanner, rules=None):
+    """
+    chain extended with the .gitignore / .staticlensignore blobs directly
+    in the git tree, so a revision is filtered like its checkout would be.
+
+    Args:
+        rules: Optional dict memoizing IgnoreRules by blob SHA, so trees
+            sharing an ignore file also share (and compare equal on) its rules
+    """
+    names = scanner.IGNORE_FILE_NAMES
+    found = {blob.name: blob for blob in tree.blobs if blob.name in names and blob.mode != SYMLINK_MODE}
+
+    for name in names:
+        blob = found.get(name)
+        if blob is None:
+            continue
+        ignore = rules.get(blob.hexsha) if rules is not None else None
+        if ignore is None:
+            ignore = IgnoreRules(blob.data_stream.read().decode("utf-8", errors="replace").splitlines())
+            if rules is not None:
+                rules[blob.hexsha] = ignore
+        chain = chain.extend(tree.path, ignore)
+
+    return chain
+
+
+def iter_revision_files(repo, rev="HEAD", scanner=None):
+    """
+    Supported files in rev's tree, sorted by path. Ignore files in the
+    tree apply as they would to a checkout of it.
+
+    Returns:
+        List of (path, language, blob) with repository-relative paths
+    """
+    load_plugins()
+    scanner = scanner or FileScanner()
+    files = []
+    rules = {}
+    stack = [(repo.commit(rev).tree, IgnoreChain())]
+
+    while stack:
+        tree, chain = stack.pop()
+        chain = tree_ignore_chain(tree, chain, scanner, rules)
+
+        for subtree in tree.trees:
+            if subtree.name not in scanner.IGNORE_DIRS and not chain.ignored(subtree.path, True):
+                stack.append((subtree, chain))
+
+        for blob in tree.blobs:
+            if blob.mode == SYMLINK_MODE:
+                continue
+            language = scanner.language_for(blob.path, chain)
+            if language:
+                files.append((blob.path, language, blob))
+
+    files.sort(key=lambda entry: entry[0])
+    return files
+
+
+def iter_analyze_revision(repo_path, rev="HEAD", progress_callback=None, workers=None, cache=None, classifier=None,
+                          instrument=None, metrics=None):
+    """
+    Yield per-file results for rev without checking it out.
+
+    Results look like analyzer() output with the repository-relative path
+    as "file" and the blob SHA as "blob". Arguments are as for
+    iter_analyze_directory(); progress_callback gets a message once the
+    tree has been listed.
+    """
+    repo = repo_path if isinstance(repo_path, Repo) else Repo(repo_path)
+    files = iter_revision_files(repo, rev)
+
+    if progress_callback:
+        progress_callback(f"Found {len(files)} supported files in {repo.commit(rev).hexsha[:12]}")
+
+    entries = plan_blobs(files, cache, classifier, instrument, metrics)
+
+    try:
+        for _, (key, verdict, blob_sha), result in _run_analyzer(entries, workers, len(files), task=analyze_source):
+            if not result:
+                continue
+            if key and "metrics" in result:
+                cache.put(key, result["metrics"])
+            if verdict is not None and "skipped" not in result:
+                result["classification"] = verdict.as_dict()
+            result["blob"] = blob_sha
+            yield result
+    finally:
+        if cache is not None:
+            cache.flush()
+
+
+def plan_blobs(files, cache, classifier, instrument=None, selected=None, reader=None):
+    """
+    plan_files() for the (path, language, blob) entries of
+    iter_revision_files(). Blobs are only read when they have to be
+    classified or analyzed.
+
+    With a reader (cache.reader()), lookups go through it instead of the
+    cache, so planning may run on any thread, and cache hits come with
+    their key too: the caller accounts for every keyed result with
+    cache.record().
+
+    Yields:
+        (path, (cache key, verdict, blob sha), ready result,
+        analyze_source() args) per blob; callers attach the blob sha to
+        results as "blob"
+    """
+    fingerprint = metrics_fingerprint() if cache is not None else None
+
+    for path, language, blob in files:
+        data = None
+        verdict = None
+        metrics = selected
+
+        if classifier is not None:
+            data = blob.data_stream.read()
+            verdict = classifier.classify(path, blob.size, sample=data)
+
+            if verdict is not None and verdict.action == SKIP:
+                yield path, (None, verdict, blob.hexsha), {
+                    "file": path,
+                    "language": language,
+                    "skipped": {"kind": verdict.kind, "reason": verdict.reason}
+                }, None
+                continue
+
+            if verdict is not None:
+                metrics = narrow_metrics(selected, verdict.metrics)
+
+        key = None
+        if cache is not None:
+            key = MetricCache.make_blob_key(blob.hexsha, language, metric_set_fingerprint(fingerprint, metrics))
+            hit = (reader or cache).get(key)
+
+            if hit is not None:
+                yield path, (key if reader is not None else None, verdict, blob.hexsha), {
+                    "file": path,
+                    "language": language,
+                    "metrics": hit
+                }, None
+                continue
+
+        if data is None:
+            data = blob.data_stream.read()
+
+        yield path, (key, verdict, blob.hexsha), None, (data, language, path, metrics, instrument)
+
+
+def analyze_revision(repo_path, rev="HEAD", progress_callback=None, workers=None, cache=None, classifier=None,
+                     instrument=None, metrics=None):
+    """
+    Analyze rev from the object database.
+
+    Returns:
+        analyze_directory()-shaped dict, plus the resolved "revision" and
+        the repository's "repo_path". Every "file" is repository-relative,
+        so "root_path" is "" rather than a directory they could be
+        resolved against.
+    """
+    repo = repo_path if isinstance(repo_path, Repo) else Repo(repo_path)
+    commit = repo.commit(rev)
+
+    results = list(iter_analyze_revision(
+        repo, commit.hexsha, progress_callback=progress_callback,
+        workers=workers, cache=cache, classifier=classifier, instrument=instrument, metrics=metrics,
+    ))
+    skipped = [result for result in results if "skipped" in result]
+    if skipped:
+        results = [result for result in results if "skipped" not in result]
+
+    output = {
+        "root_path": "",
+        "repo_path": repo.working_tree_dir or repo.git_dir,
+        "revision": commit.hexsha,
+        "total_files_scanned": len(results) + len(skipped),
+        "total_files_analyzed": len(results),
+        "results": results
+    }
+    if classifier is not None:
+        output["skipped_files"] = skipped
+    if cache is not None:
+        output["cache"] = cache.stats()
+    if instrument is not None:
+        output["performance"] = summarize_performance(results)
+    return output
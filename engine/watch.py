@@ -0,0 +1,419 @@
+"""
+Watch mode: keep metrics live while files in a directory change.
+
+Every file keeps its source, its tree-sitter Tree and, per top-level unit
+(the root's direct children: functions, classes, statements), the state
+of each mergeable metric visitor. On a change the old tree is edited and
+reparsed incrementally, and only units whose byte ranges were touched are
+re-queried; the rest of the file's metric state is reused. Files with
+syntax errors before or after a change are reparsed from scratch.
+"""
+import os
+import threading
+import time
+
+from tree_sitter import QueryCursor
+
+from core.file_scanner import FileScanner
+from engine.analyzer import detect_language
+from engine.metric_manager import Captures, MetricManager
+from engine.parser_manager import ParserManager
+from metrics.base_metric import MergeableVisitor
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def point_at(source: bytes, offset: int):
+    """(row, column) of a byte offset, as tree-sitter counts them."""
+    row = source.count(b"\n", 0, offset)
+    column = offset - (source.rfind(b"\n", 0, offset) + 1)
+    return (row, column)
+
+
+def compute_edit(old: bytes, new: bytes):
+    """
+    Smallest single edit turning old into new.
+
+    Returns:
+        (start_byte, old_end_byte, new_end_byte), or None if equal
+    """
+    if old == new:
+        return None
+
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    return start, old_end, new_end
+
+
+def touches(node, start, end):
+    """Whether the byte range [start, end) changes node's span."""
+    if start == end:
+        # Pure deletion: a point inside or on the edge of the node
+        return node.start_byte <= start <= node.end_byte
+    return start < node.end_byte and end > node.start_byte
+
+
+def unit_metrics(language):
+    """Registered metrics that can be measured per unit and merged."""
+    metrics = []
+    for metric in MetricManager.registered():
+        if hasattr(metric, "visitor"):
+            probe = metric.visitor(None, None, language)
+            if isinstance(probe, MergeableVisitor) and probe.captures is not None:
+                metrics.append(metric)
+    return metrics
+
+
+class Unit:
+    """A top-level node's span and the metric visitors fed from it."""
+
+    __slots__ = ("start", "end", "row", "kind", "visitors")
+
+    def __init__(self, start, end, row, kind, visitors):
+        self.start = start
+        self.end = end
+        self.row = row
+        self.kind = kind
+        self.visitors = visitors
+
+
+class FileState:
+    __slots__ = ("language", "source", "tree", "units", "result")
+
+    def __init__(self, language, source, tree, units, result):
+        self.language = language
+        self.source = source
+        self.tree = tree
+        self.units = units
+        self.result = result
+
+
+class WatchSession:
+    """
+    Incrementally re-analyze files under root_path as they change.
+
+    Args:
+        root_path: Directory to watch
+        on_result: Optional callback called as (file_path, result) after a
+            file is (re)analyzed, and (file_path, None) once it is deleted
+        debounce: Seconds without new events before a batch is processed
+        poll_interval: Seconds between directory scans when polling
+        use_inotify: Use watchdog (inotify on Linux) when it is installed
+    """
+
+    def __init__(self, root_path, on_result=None, debounce=0.3, poll_interval=1.0, use_inotify=True):
+        self.root_path = os.path.abspath(root_path)
+        self.on_result = on_result
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and Observer is not None
+
+        self.scanner = FileScanner()
+        self.files = {}
+        self.stats = {"full_parses": 0, "incremental_parses": 0, "units_reused": 0, "units_recomputed": 0}
+
+        self._pending = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._signatures = {}
+
+    # ---- analysis ---------------------------------------------------------
+
+    def initial_scan(self):
+        """Analyze every supported file once and remember its tree."""
+        for file_path, _ in self.scanner.scan_directory(self.root_path):
+            self.update(file_path)
+            self._signatures[file_path] = self._signature(file_path)
+
+    def update(self, file_path):
+        """Re-analyze one file, incrementally if it was seen before."""
+        language = detect_language(file_path)
+        source_parser = ParserManager.get_source_parser(language) if language else None
+
+        if not source_parser:
+            return None
+
+        try:
+            with open(file_path, "rb") as f:
+                source = f.read()
+        except OSError:
+            return self.remove(file_path)
+
+        state = self.files.get(file_path)
+        if state is not None and state.language == language and state.source == source:
+            return state.result
+
+        try:
+            if state is None or state.language != language:
+                state = self._full_parse(file_path, language, source, source_parser)
+            else:
+                state = self._incremental_parse(file_path, state, source, source_parser)
+        except Exception as e:
+            self.files.pop(file_path, None)
+            result = {
+                "file": file_path,
+                "language": language,
+                "error": f"Metric calculation failed: {str(e)}"
+            }
+        else:
+            result = state.result
+
+        if self.on_result:
+            self.on_result(file_path, result)
+        return result
+
+    def remove(self, file_path):
+        if self.files.pop(file_path, None) is not None and self.on_result:
+            self.on_result(file_path, None)
+        self._signatures.pop(file_path, None)
+        return None
+
+    def results(self):
+        """Current analyze_directory()-shaped snapshot."""
+        results = [state.result for _, state in sorted(self.files.items())]
+        return {
+            "root_path": self.root_path,
+            "total_files_scanned": len(results),
+            "total_files_analyzed": len(results),
+            "results": results
+        }
+
+    def _full_parse(self, file_path, language, source, source_parser):
+        tree = source_parser(source)
+        units = [self._measure_unit(tree, language, node) for node in tree.root_node.children]
+        state = FileState(language, source, tree, units, None)
+        state.result = self._file_result(file_path, state)
+        self.files[file_path] = state
+        self.stats["full_parses"] += 1
+        self.stats["units_recomputed"] += len(units)
+        return state
+
+    def _incremental_parse(self, file_path, state, source, source_parser):
+        # Around ERROR nodes changed_ranges() misses units whose structure
+        # changed, and an incremental reparse may recover differently from
+        # a fresh one, so files with syntax errors are measured from scratch
+        if state.tree.root_node.has_error:
+            return self._full_parse(file_path, state.language, source, source_parser)
+
+        start, old_end, new_end = compute_edit(state.source, source)
+        old_tree = state.tree
+        old_tree.edit(
+            start_byte=start,
+            old_end_byte=old_end,
+            new_end_byte=new_end,
+            start_point=point_at(state.source, start),
+            old_end_point=point_at(state.source, old_end),
+            new_end_point=point_at(source, new_end),
+        )
+        tree = source_parser(source, old_tree)
+        if tree.root_node.has_error:
+            return self._full_parse(file_path, state.language, source, source_parser)
+
+        # Byte ranges whose text or syntactic structure changed
+        dirty = [(start, new_end)] + [
+            (r.start_byte, r.end_byte) for r in old_tree.changed_ranges(tree)
+        ]
+
+        # Old units that the edit did not touch, at their post-edit offsets
+        delta = new_end - old_end
+        clean = {}
+        for unit in state.units:
+            if unit.end <= start:
+                clean[(unit.start, unit.end, unit.kind)] = unit
+            elif unit.start >= old_end and unit.start > start:
+                clean[(unit.start + delta, unit.end + delta, unit.kind)] = unit
+
+        units = []
+        for node in tree.root_node.children:
+            key = (node.start_byte, node.end_byte, node.type)
+            unit = clean.get(key)
+            touched = any(touches(node, s, e) for s, e in dirty)
+
+            if unit is not None and not touched:
+                row = node.start_point[0]
+                if row != unit.row:
+                    # Lines were added or removed above the unit
+                    for visitor in unit.visitors.values():
+                        visitor.shift(row - unit.row)
+                unit.start, unit.end, unit.row = node.start_byte, node.end_byte, row
+                units.append(unit)
+                self.stats["units_reused"] += 1
+            else:
+                units.append(self._measure_unit(tree, state.language, node))
+                self.stats["units_recomputed"] += 1
+
+        state.source = source
+        state.tree = tree
+        state.units = units
+        state.result = self._file_result(file_path, state)
+        self.stats["incremental_parses"] += 1
+        return state
+
+    def _measure_unit(self, tree, language, node):
+        """Feed the mergeable metrics from the captures inside one unit."""
+        start, end = node.start_byte, node.end_byte
+        visitors = {metric: metric.visitor(tree, None, language) for metric in unit_metrics(language)}
+
+        query = ParserManager.get_query(language)
+        if visitors and query is not None:
+            cursor = QueryCursor(query)
+            cursor.set_byte_range(start, end)
+            captures = Captures({
+                name: [n for n in nodes if n.start_byte >= start and n.end_byte <= end]
+                for name, nodes in cursor.captures(tree.root_node).items()
+            })
+            for visitor in visitors.values():
+                visitor.consume(captures)
+
+        return Unit(start, end, node.start_point[0], node.type, visitors)
+
+    def _file_result(self, file_path, state):
+        metrics = {}
+        mergeable = unit_metrics(state.language)
+
+        for metric in MetricManager.registered():
+            if metric in mergeable:
+                visitor = metric.visitor(state.tree, file_path, state.language)
+                for unit in state.units:
+                    visitor.merge(unit.visitors[metric])
+                output = visitor.result()
+            else:
+                # Metrics that cannot be split by unit see the whole tree
+                output = metric.analyze(state.tree, file_path, state.language)
+
+            if output:
+                metrics.update(output)
+
+        return {
+            "file": file_path,
+            "language": state.language,
+            "metrics": metrics
+        }
+
+    # ---- file system events -----------------------------------------------
+
+    def notify(self, file_path):
+        """Queue a path for re-analysis once events settle."""
+        with self._lock:
+            self._pending.add(os.path.abspath(file_path))
+            self._last_event = time.monotonic()
+
+    def watches(self, file_path, ignores=None):
+        """
+        Whether file_path is one the session analyzes (as scan_directory
+        would find it), or an ignore file that decides which ones it does.
+        """
+        rel_path = os.path.relpath(file_path, self.root_path)
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return False
+        if os.path.basename(rel_path) in self.scanner.IGNORE_FILE_NAMES:
+            return True
+        return self.scanner.language_at(self.root_path, rel_path, ignores) is not None
+
+    def process_pending(self):
+        """Re-analyze queued files if no event arrived for `debounce` seconds."""
+        with self._lock:
+            if not self._pending or time.monotonic() - self._last_event < self.debounce:
+                return []
+            batch, self._pending = sorted(self._pending), set()
+
+        ignore_files = [p for p in batch if os.path.basename(p) in self.scanner.IGNORE_FILE_NAMES]
+        if ignore_files:
+            # Rules changed: queue every file that came into or out of scope
+            self.poll()
+            batch = [p for p in batch if p not in ignore_files]
+
+        ignores = {}
+        for file_path in batch:
+            if os.path.exists(file_path) and self.watches(file_path, ignores):
+                self.update(file_path)
+                self._signatures[file_path] = self._signature(file_path)
+            else:
+                self.remove(file_path)
+        return batch
+
+    def run(self):
+        """Block, keeping metrics live until stop() is called."""
+        if not self.files:
+            self.initial_scan()
+
+        observer = None
+        if self.use_inotify:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), self.root_path, recursive=True)
+            observer.start()
+
+        try:
+            next_poll = time.monotonic() + self.poll_interval
+            while not self._stop.wait(min(self.debounce, self.poll_interval) / 2):
+                if observer is None and time.monotonic() >= next_poll:
+                    self.poll()
+                    next_poll = time.monotonic() + self.poll_interval
+                self.process_pending()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self):
+        """Queue files whose size/mtime changed since the last scan."""
+        current = {
+            file_path: self._signature(file_path)
+            for file_path, _ in self.scanner.scan_directory(self.root_path)
+        }
+        for file_path, signature in current.items():
+            if self._signatures.get(file_path) != signature:
+                self.notify(file_path)
+        for file_path in set(self._signatures) - set(current):
+            self.notify(file_path)
+
+    @staticmethod
+    def _signature(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+class _EventHandler(FileSystemEventHandler):
+    # Reading a file while analyzing it raises opened/closed events too
+    EVENT_TYPES = {"created", "modified", "moved", "deleted"}
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self.EVENT_TYPES:
+            return
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path and self.session.watches(path):
+                self.session.notify(path)
+
+
+def watch_directory(root_path, on_result=None, **kwargs):
+    """Analyze root_path, then keep re-analyzing changed files until interrupted."""
+    session = WatchSession(root_path, on_result=on_result, **kwargs)
+    try:
+        session.run()
+    except KeyboardInterrupt:
+        pass
+    return session
@@ -1,11 +1,87 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Set
+
+from engine.metric_manager import MetricManager
 
 
 class BaseMetric(ABC):
     
+    # Short name used to select metrics, e.g. for a reduced metric set
+    name: Optional[str] = None
 
     @abstractmethod
     def analyze(self, tree: Any, file_path: str,lang:str) -> Dict:
        
         pass
+
+
+class MetricVisitor:
+    """
+    Per-file state of a metric driven by MetricManager.
+
+    A visitor that sets captures is fed by the language's query pack:
+    consume() receives a dict of capture name -> nodes, and the tree is not
+    walked for it. Otherwise node_types lists the node types the visitor
+    subscribes to and node_flags the engine.node_taxonomy flags (a node of
+    either is visited; neither set means every node). enter() is called in pre-order
+    for each subscribed node and, when wants_leave is set, leave() once
+    that node's subtree is finished.
+
+    Visitors that can be measured per part of a file derive from
+    MergeableVisitor instead.
+    """
+
+    captures: Optional[Set[str]] = None
+    node_types: Optional[Set[str]] = None
+    node_flags: int = 0
+    wants_leave = False
+
+    def consume(self, captures: Dict[str, List[Any]]) -> None:
+        pass
+
+    def subscribes(self, node_type: str, flags: int = 0) -> bool:
+        if self.node_types is None and not self.node_flags:
+            return True
+        return bool(flags & self.node_flags) or (self.node_types is not None and node_type in self.node_types)
+
+    def enter(self, node) -> None:
+        pass
+
+    def leave(self, node) -> None:
+        pass
+
+    def result(self) -> Dict:
+        return {}
+
+
+class MergeableVisitor(MetricVisitor, ABC):
+    """
+    Visitor whose state can be combined across parts of a file. merge()
+    folds in the state of another visitor of the same metric that consumed
+    a later, disjoint part of the file, and shift() moves any line numbers
+    it recorded when that part of the file moved. Watch mode uses them to
+    recompute only changed parts.
+    """
+
+    @abstractmethod
+    def merge(self, other: "MergeableVisitor") -> None:
+        pass
+
+    def shift(self, rows: int) -> None:
+        pass
+
+
+class VisitorMetric(BaseMetric):
+    """
+    Metric fed by MetricManager's single query-pack run or tree walk per file
+    instead of traversing the tree itself.
+    """
+
+    @abstractmethod
+    def visitor(self, tree: Any, file_path: str, lang: str) -> MetricVisitor:
+        pass
+
+    def analyze(self, tree: Any, file_path: str, lang: str) -> Dict:
+        visitor = self.visitor(tree, file_path, lang)
+        MetricManager.drive(tree, lang, [visitor])
+        return visitor.result()
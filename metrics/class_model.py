@@ -0,0 +1,148 @@
+"""
+Per-file class model built from the query pack's OOP captures in a single
+pass: every outermost class with its base classes, methods, fields and
+instance attributes.
+
+The model is built once per set of captures and shared, so every metric
+that consumes the same captures reuses it (see class_model()).
+"""
+from engine.node_taxonomy import FUNCTION_DECLARATOR, METHOD
+
+# Capture processing order for nodes with the same span
+CAPTURE_ORDER = ("class", "class.base", "method", "field", "init", "attribute.self", "attribute.this")
+
+# Every capture the model is built from
+CLASS_CAPTURES = frozenset(CAPTURE_ORDER) | {"class.derived"}
+
+
+def node_text(node):
+    return node.text.decode('utf-8') if isinstance(node.text, bytes) else str(node.text)
+
+
+def is_field(node, taxonomy):
+    """Check the field declaration (Java/C++) is not a method declaration."""
+    # Ensure it's not a method (has function declarator)
+    for child in node.children:
+        if taxonomy.flags_of(child.kind_id) & (FUNCTION_DECLARATOR | METHOD):
+            return False
+    return True
+
+
+class ClassRecord:
+    """
+    One outermost class.
+
+    Attributes:
+        node: the class node
+        derived: whether the class extends another (the @class.derived capture)
+        bases: base class names, for languages whose pack captures them
+        methods: method nodes directly in the class
+        fields: field declaration nodes (Java/C++)
+        attributes: instance attribute names (Python self.x in __init__,
+            JavaScript this.x anywhere in the class)
+    """
+
+    __slots__ = ("node", "derived", "bases", "methods", "fields", "attributes")
+
+    def __init__(self, node, derived):
+        self.node = node
+        self.derived = derived
+        self.bases = []
+        self.methods = []
+        self.fields = []
+        self.attributes = set()
+
+    @property
+    def name(self):
+        name = self.node.child_by_field_name("name")
+        return node_text(name) if name is not None else None
+
+
+class ClassModel:
+    """
+    Outermost classes of one file, in document order.
+
+    Methods and fields are recorded without looking into them, and nested
+    classes are skipped.
+    """
+
+    __slots__ = ("classes",)
+
+    def __init__(self, classes):
+        self.classes = classes
+
+    @classmethod
+    def build(cls, captures, taxonomy):
+        derived = {
+            (node.start_byte, node.end_byte) for node in captures.get("class.derived", ())
+        }
+
+        # Document order; an enclosing node sorts before what it contains.
+        # Nodes do not compare, so they are left out of the sort key.
+        events = sorted(
+            ((node.start_byte, -node.end_byte, order, kind, node)
+             for order, kind in enumerate(CAPTURE_ORDER)
+             for node in captures.get(kind, ())),
+            key=lambda event: event[:4],
+        )
+
+        classes = []
+        record = None
+        class_end = None    # end of the current class
+        blocker_end = None  # end of a method/field/nested class hiding its subtree
+        init_end = None     # end of the class's first __init__ (Python)
+        previous = None
+
+        for start, neg_end, order, kind, node in events:
+            # A node captured twice under one name (by two patterns) would
+            # otherwise hide itself, like a nested class or method body
+            if (start, neg_end, order) == previous:
+                continue
+            previous = (start, neg_end, order)
+
+            if class_end is not None and start >= class_end:
+                record = class_end = None
+
+            if record is None:
+                if kind == "class":
+                    record = ClassRecord(node, (start, -neg_end) in derived)
+                    classes.append(record)
+                    class_end = -neg_end
+                    blocker_end = init_end = None
+                continue
+
+            if blocker_end is not None and start >= blocker_end:
+                blocker_end = None
+
+            if blocker_end is None:
+                # Skip nested classes
+                if kind == "class":
+                    blocker_end = -neg_end
+                elif kind == "class.base":
+                    record.bases.append(node_text(node))
+                # Methods and fields hide their bodies
+                elif kind == "method":
+                    record.methods.append(node)
+                    blocker_end = -neg_end
+                elif kind == "field" and is_field(node, taxonomy):
+                    record.fields.append(node)
+                    blocker_end = -neg_end
+
+            if kind == "init":
+                if init_end is None:
+                    init_end = -neg_end
+            elif kind == "attribute.self":
+                if init_end is not None and start < init_end:
+                    record.attributes.add(node_text(node))
+            elif kind == "attribute.this":
+                record.attributes.add(node_text(node))
+
+        return cls(classes)
+
+
+def class_model(captures, taxonomy):
+    """ClassModel of the captures, built on first use and shared after."""
+    shared = getattr(captures, "shared", None)
+    if shared is None:
+        return ClassModel.build(captures, taxonomy)
+    return shared("class_model", lambda: ClassModel.build(captures, taxonomy))
@@ -2,67 +2,131 @@
 Formula: CC = 1 + number of decision points
 """
 
-from metrics.base_metric import BaseMetric
+from metrics.base_metric import MergeableVisitor, VisitorMetric
 from engine.metric_manager import MetricManager
+from engine.node_taxonomy import BINDING, DECLARATOR, IDENTIFIER, taxonomy_for
 
 
-class CyclomaticMetric(BaseMetric):
-    def analyze(self, tree, file_path: str, language: str) -> dict:
-        function_complexities = {}
-        
-        def count_decisions(node):
-            """Count decision points in a node."""
-            count = 0
-            node_type = node.type.lower()
-            
-            # Count if, for, while, case, catch
-            if any(x in node_type for x in ['if_statement', 'for_statement', 'while_statement', 
-                                             'case', 'catch']):
-                count += 1
-            
-            # Count && and ||
-            if node.type in ['&&', '||']:
-                count += 1
-            
-            # Recursively count in children
-            for child in node.children:
-                count += count_decisions(child)
-            
-            return count
-        
-        def find_functions(node):
-            """Find all functions and calculate their CC."""
-            # Check if this is a function
-            if 'function' in node.type or 'method' in node.type:
-                # Get function name
-                name = f"line_{node.start_point[0] + 1}"
-                for child in node.children:
-                    if 'identifier' in child.type:
-                        name = child.text.decode('utf-8')
-                        break
-                
-                # Calculate CC = 1 + decisions
-                cc = 1 + count_decisions(node)
-                function_complexities[name] = cc
-            
-            # Check children
-            for child in node.children:
-                find_functions(child)
-        
-        # Start analysis
-        if tree and tree.root_node:
-            find_functions(tree.root_node)
-        
+# Functions (including lambdas and closures) and decision points are the
+# @function and @decision captures of parsers/queries/<language>.scm
+
+
+def function_name(node, taxonomy):
+    """Best-effort name of a function node, or None if it is anonymous."""
+    name = node.child_by_field_name("name")
+
+    if name is None:
+        # C/C++ buries the name under a chain of (pointer, reference, ...)
+        # declarators; a lambda's abstract declarator ends without one
+        declarator = node.child_by_field_name("declarator")
+        while declarator is not None and taxonomy.flags_of(declarator.kind_id) & DECLARATOR:
+            inner = declarator.child_by_field_name("declarator")
+            if inner is None and declarator.named_child_count:
+                inner = declarator.named_children[-1]
+            declarator = inner
+        name = _identifier(declarator, taxonomy)
+
+    if name is None and node.parent is not None and taxonomy.flags_of(node.parent.kind_id) & BINDING:
+        # const f = () => ...  /  Runnable r = () -> ...
+        name = _identifier(node.parent.child_by_field_name("name"), taxonomy)
+
+    if name is None:
+        return None
+
+    return name.text.decode('utf-8')
+
+
+def _identifier(node, taxonomy):
+    """node if it is identifier-like, else None (parameter lists, return types, patterns, ...)."""
+    if node is not None and taxonomy.flags_of(node.kind_id) & IDENTIFIER:
+        return node
+    return None
+
+
+class CyclomaticVisitor(MergeableVisitor):
+    """
+    Stack-based per-function complexity over the query pack captures.
+
+    Every decision point is attributed only to its innermost enclosing
+    function, so nested functions, lambdas and closures are each counted
+    once, in a single pass over the sorted captures.
+    """
+
+    captures = {"function", "decision"}
+
+    def __init__(self, taxonomy=None):
+        self.taxonomy = taxonomy
+        # (name, row, [complexity]) in the order functions start
+        self.functions = []
+
+    def consume(self, captures):
+        # Document order; an enclosing node sorts before what it contains
+        events = sorted(
+            [(node.start_byte, -node.end_byte, 0, node) for node in captures.get("function", ())]
+            + [(node.start_byte, -node.end_byte, 1, node) for node in captures.get("decision", ())],
+            key=lambda event: event[:3],
+        )
+
+        # (end_byte, [complexity]) of every function enclosing the current node
+        stack = []
+
+        for start, neg_end, is_decision, node in events:
+            while stack and stack[-1][0] <= start:
+                stack.pop()
+
+            if is_decision:
+                if stack:
+                    stack[-1][1][0] += 1
+                continue
+
+            # CC = 1 + decisions, filled in as the body is consumed
+            frame = [1]
+            self.functions.append((function_name(node, self.taxonomy), node.start_point[0], frame))
+            stack.append((-neg_end, frame))
+
+    def merge(self, other):
+        self.functions.extend(other.functions)
+
+    def shift(self, rows):
+        self.functions = [(name, row + rows, frame) for name, row, frame in self.functions]
+
+    def result(self) -> dict:
+        per_function = {}
+        # Last suffix handed out per name, so many same-named functions stay linear
+        suffixes = {}
+        for name, row, frame in self.functions:
+            if name is None:
+                # Anonymous functions are named after their line
+                name = f"line_{row + 1}"
+            key = name
+            suffix = suffixes.get(name, 1)
+            while key in per_function:
+                # Overloads, methods of different classes, several lambdas...
+                suffix += 1
+                key = f"{name}#{suffix}"
+            suffixes[name] = suffix
+            per_function[key] = frame[0]
+
         # Return results
-        if not function_complexities:
+        if not per_function:
             return {"cyclomatic_complexity": {"per_function": {}}}
-        
+
         return {
             "cyclomatic_complexity": {
-                "max": max(function_complexities.values()),
-                "average": round(sum(function_complexities.values()) / len(function_complexities), 2)
+                "max": max(per_function.values()),
+                "average": round(sum(per_function.values()) / len(per_function), 2),
+                "per_function": per_function,
             }
         }
 
 
-MetricManager.register(CyclomaticMetric())
\ No newline at end of file
+class CyclomaticMetric(VisitorMetric):
+    name = "cyclomatic"
+
+    def visitor(self, tree, file_path: str, language: str) -> CyclomaticVisitor:
+        if tree is None:
+            return CyclomaticVisitor()
+        return CyclomaticVisitor(taxonomy_for(language, tree))
+
+
+MetricManager.register(CyclomaticMetric())
@@ -17,101 +17,139 @@ Estimated Bugs (B) = V / 3000
 """
 
 import math
-from collections import Counter
-from metrics.base_metric import BaseMetric
+from metrics.base_metric import MergeableVisitor, VisitorMetric
 from engine.metric_manager import MetricManager
-
-OPERATOR_TYPES = {
-    "binary_expression", "unary_expression", "update_expression",
-    "assignment_expression", "comparison_expression", "logical_expression",
-    "if_statement", "for_statement", "while_statement", "do_statement",
-    "switch_statement", "case", "return_statement", "throw_statement",
-    "call_expression", "new_expression", "delete_expression",
-    "+=", "-=", "*=", "/=", "%=", "&&", "||", "==", "!=", 
-    "<=", ">=", "<", ">", "+", "-", "*", "/", "%", "=",
-    "!", "&", "|", "^", "~", "++", "--", ".", "->", "::", 
-    "?", ":", ";", ",", "(", ")", "[", "]", "{", "}"
-}
-
-# Operand node types
-OPERAND_TYPES = {
-    "identifier", "number_literal", "string_literal", "char_literal",
-    "true", "false", "null", "nullptr", "this", "super",
-    "decimal_integer_literal", "hex_integer_literal", "float_literal"
-}
-
-# Keywords that are operators
-OPERATOR_KEYWORDS = {
-    "if", "else", "for", "while", "do", "switch", "case", "default",
-    "return", "break", "continue", "throw", "try", "catch", "finally",
-    "new", "delete", "sizeof", "typeof", "instanceof"
-}
-
-
-
-class HalsteadMetric(BaseMetric):
-
-    def analyze(self, tree, file_path: str, language: str) -> dict:
-        if not tree or not tree.root_node:
-            return self._empty_result()
-
-        operators = Counter()
-        operands = Counter()
-
-        def is_operator(node):
-            """Check if node is an operator."""
-            node_type = node.type
-            
-            # Check node type
-            if node_type in OPERATOR_TYPES:
-                return True
-            
-            # Check if it's a keyword operator
-            if len(node.children) == 0:
-                text = node.text.decode('utf-8') if isinstance(node.text, bytes) else str(node.text)
-                if text in OPERATOR_KEYWORDS:
-                    return True
-            
-            return False
-
-        def is_operand(node):
-           
-            return node.type in OPERAND_TYPES
-
-        def traverse(node):
-            """Traverse tree and collect operators/operands."""
-            
-            if len(node.children) == 0:
-                text = node.text.decode('utf-8') if isinstance(node.text, bytes) else str(node.text)
-                
-                
-                if not text.strip():
-                    return
-                
-              
-                if is_operand(node):
-                    operands[text] += 1
-                    return
-                
-              
-                if is_operator(node):
-                    operators[text] += 1
-                    return
-            
-       
+from engine.node_taxonomy import NAMED, taxonomy_for
+
+# Operators and operands are the @operator and @operand captures of
+# parsers/queries/<language>.scm. Leaf captures are counted by their text,
+# operator captures with children (binary_expression, if_statement, ...)
+# by their node type.
+#
+# Counting avoids per-token allocations: an anonymous token's text is its
+# node type, so those operators are tallied per kind_id in a list, and only
+# named leaves have their bytes read, once each, to key a dict. Texts are
+# decoded once per distinct token when the result is built.
+
+# How an anonymous operator kind is counted
+_UNCHECKED, _BY_KIND, _BY_TEXT = 0, 1, 2
+
+
+# language -> per-kind_id state: whether an anonymous kind's token text
+# matched its type, checked the first time the kind is seen, so an aliased
+# token whose text differs falls back to counting by text
+_anonymous_states = {}
+
+
+def anonymous_states(language, taxonomy):
+    states = _anonymous_states.get(language)
+    if states is None:
+        states = _anonymous_states[language] = [_UNCHECKED] * len(taxonomy)
+    return states
+
+
+class HalsteadVisitor(MergeableVisitor):
+    """
+    Count operators/operands from the query pack captures.
+
+    Visitors created without a tree (capability probes) cannot consume.
+    """
+
+    captures = {"operator", "operand"}
+
+    def __init__(self, taxonomy=None, states=None, has_error=False):
+        self.taxonomy = taxonomy
+        self.states = states
+        # Only trees with errors can hold zero-width MISSING tokens, whose
+        # text is empty although their type is not
+        self.has_error = has_error
+        self.operator_kinds = [0] * len(taxonomy) if taxonomy is not None else []
+        self.operator_texts = {}
+        self.operands = {}
+
+    def consume(self, captures):
+        operands = self.operands
+        for node in captures.get("operand", ()):
+            if node.child_count == 0:
+                text = node.text
+                operands[text] = operands.get(text, 0) + 1
+
+        taxonomy = self.taxonomy
+        flags = taxonomy.flags
+        anonymous = self.states
+        kinds = self.operator_kinds
+        texts = self.operator_texts
+        has_error = self.has_error
+
+        for node in captures.get("operator", ()):
+            kind = node.kind_id
+
+            if flags[kind] & NAMED:
+                if node.child_count:
+                    kinds[kind] += 1
+                    continue
             else:
-                if is_operator(node):
-                    
-                    operators[node.type] += 1
-            
-        
-            for child in node.children:
-                traverse(child)
-
-        traverse(tree.root_node)
-
-       
-
+                state = anonymous[kind]
+                if state == _BY_KIND and not (has_error and node.is_missing):
+                    kinds[kind] += 1
+                    continue
+                if state == _UNCHECKED and node.end_byte > node.start_byte:
+                    anonymous[kind] = _BY_KIND if node.text == taxonomy.type_bytes[kind] else _BY_TEXT
+
+            text = node.text
+            texts[text] = texts.get(text, 0) + 1
+
+    def merge(self, other):
+        kinds = self.operator_kinds
+        for kind, count in enumerate(other.operator_kinds):
+            if count:
+                kinds[kind] += count
+        _add_counts(self.operator_texts, other.operator_texts)
+        _add_counts(self.operands, other.operands)
+
+    def operator_counts(self):
+        """Operator counts keyed by text or node type, as strings."""
+        operators = {}
+        types = self.taxonomy.types if self.taxonomy is not None else ()
+        for kind, count in enumerate(self.operator_kinds):
+            if count:
+                key = types[kind]
+                if key.strip():
+                    operators[key] = operators.get(key, 0) + count
+        return _decoded(self.operator_texts, operators)
+
+    def operand_counts(self):
+        return _decoded(self.operands, {})
+
+    def result(self) -> dict:
+        return HalsteadMetric.from_counts(self.operator_counts(), self.operand_counts())
+
+
+def _add_counts(counts, other):
+    for key, count in other.items():
+        counts[key] = counts.get(key, 0) + count
+
+
+def _decoded(byte_counts, counts):
+    """Fold counts keyed by token bytes into counts keyed by text, dropping blank tokens."""
+    for key, count in byte_counts.items():
+        text = key.decode('utf-8')
+        if text.strip():
+            counts[text] = counts.get(text, 0) + count
+    return counts
+
+
+class HalsteadMetric(VisitorMetric):
+    name = "halstead"
+
+    def visitor(self, tree, file_path: str, language: str) -> HalsteadVisitor:
+        if tree is None:
+            return HalsteadVisitor()
+        taxonomy = taxonomy_for(language, tree)
+        return HalsteadVisitor(taxonomy, anonymous_states(language, taxonomy), tree.root_node.has_error)
+
+    @classmethod
+    def from_counts(cls, operators, operands) -> dict:
         n1 = len(operators)              # distinct operators
         n2 = len(operands)               # distinct operands
         N1 = sum(operators.values())     # total operators
@@ -122,7 +160,7 @@ class HalsteadMetric(BaseMetric):
 
         
         if vocabulary == 0:
-            return self._empty_result()
+            return cls._empty_result()
 
         volume = program_length * math.log2(vocabulary) if vocabulary > 0 else 0
         difficulty = (n1 / 2) * (N2 / n2) if n2 > 0 else 0
@@ -144,7 +182,8 @@ class HalsteadMetric(BaseMetric):
             }
         }
 
-    def _empty_result(self):
+    @staticmethod
+    def _empty_result():
         """Return empty result when no data."""
         return {
             "halstead": {
@@ -1,18 +1,32 @@
 from tree_sitter import Language, Parser
 import tree_sitter_cpp
 from engine.parser_manager import ParserManager
+from engine.node_taxonomy import NodeTaxonomy
+from core.source_loader import load_source
+from parsers.query_pack import load_query_pack
 
 CPP_LANGUAGE = Language(tree_sitter_cpp.language())
 
 parser = Parser(CPP_LANGUAGE)
+CPP_QUERY = load_query_pack(CPP_LANGUAGE, "cpp")
+CPP_TAXONOMY = NodeTaxonomy(CPP_LANGUAGE)
 
 
 def parse(file_path: str):
-    with open(file_path, "rb") as f:
-        source_code = f.read()
+    source_code = load_source(file_path)
 
     tree = parser.parse(source_code)
     return tree
 
 
-ParserManager.register("cpp", parse)
+def parse_source(source: bytes, old_tree=None):
+    """
+    Parse in-memory source. Pass the previous, already edited, Tree as
+    old_tree to let tree-sitter reuse its unchanged subtrees.
+    """
+    if old_tree is None:
+        return parser.parse(source)
+    return parser.parse(source, old_tree)
+
+
+ParserManager.register("cpp", parse, source_parser=parse_source, query=CPP_QUERY, taxonomy=CPP_TAXONOMY)
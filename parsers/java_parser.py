@@ -3,20 +3,34 @@
 from tree_sitter import Parser, Language
 import tree_sitter_java
 from engine.parser_manager import ParserManager
+from engine.node_taxonomy import NodeTaxonomy
+from core.source_loader import load_source
+from parsers.query_pack import load_query_pack
 JAVA_LANGUAGE = Language(tree_sitter_java.language())
 parser = Parser(JAVA_LANGUAGE)
+JAVA_QUERY = load_query_pack(JAVA_LANGUAGE, "java")
+JAVA_TAXONOMY = NodeTaxonomy(JAVA_LANGUAGE)
 
 
 def parse(file_path: str):
     """
     Parse a Java source file and return Tree-sitter tree.
     """
-    with open(file_path, "rb") as f:
-        source = f.read()
+    source = load_source(file_path)
 
     tree = parser.parse(source)
     return tree
 
 
+def parse_source(source: bytes, old_tree=None):
+    """
+    Parse in-memory source. Pass the previous, already edited, Tree as
+    old_tree to let tree-sitter reuse its unchanged subtrees.
+    """
+    if old_tree is None:
+        return parser.parse(source)
+    return parser.parse(source, old_tree)
+
+
 # Register parser
-ParserManager.register("java", parse)
+ParserManager.register("java", parse, source_parser=parse_source, query=JAVA_QUERY, taxonomy=JAVA_TAXONOMY)
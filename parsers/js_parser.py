@@ -3,21 +3,35 @@
 from tree_sitter import Parser, Language
 import tree_sitter_javascript
 from engine.parser_manager import ParserManager
+from engine.node_taxonomy import NodeTaxonomy
+from core.source_loader import load_source
+from parsers.query_pack import load_query_pack
 
 JS_LANGUAGE = Language(tree_sitter_javascript.language())
 parser = Parser(JS_LANGUAGE)
+JS_QUERY = load_query_pack(JS_LANGUAGE, "javascript")
+JS_TAXONOMY = NodeTaxonomy(JS_LANGUAGE)
 
 
 def parse(file_path: str):
     """
     Parse a JavaScript source file and return Tree-sitter tree.
     """
-    with open(file_path, "rb") as f:
-        source = f.read()
+    source = load_source(file_path)
 
     tree = parser.parse(source)
     return tree
 
 
+def parse_source(source: bytes, old_tree=None):
+    """
+    Parse in-memory source. Pass the previous, already edited, Tree as
+    old_tree to let tree-sitter reuse its unchanged subtrees.
+    """
+    if old_tree is None:
+        return parser.parse(source)
+    return parser.parse(source, old_tree)
+
+
 
-ParserManager.register("javascript", parse)
+ParserManager.register("javascript", parse, source_parser=parse_source, query=JS_QUERY, taxonomy=JS_TAXONOMY)
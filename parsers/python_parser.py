@@ -1,17 +1,31 @@
 from tree_sitter import Parser, Language
 import tree_sitter_python
 from engine.parser_manager import ParserManager
+from engine.node_taxonomy import NodeTaxonomy
+from core.source_loader import load_source
+from parsers.query_pack import load_query_pack
 
 PY_LANGUAGE = Language(tree_sitter_python.language())
 parser = Parser(PY_LANGUAGE)
+PY_QUERY = load_query_pack(PY_LANGUAGE, "python")
+PY_TAXONOMY = NodeTaxonomy(PY_LANGUAGE)
 
 
 def parse(file_path: str):
-    with open(file_path, "rb") as f:
-        source = f.read()
+    source = load_source(file_path)
 
     tree = parser.parse(source)
     return tree
 
 
-ParserManager.register("python", parse)
+def parse_source(source: bytes, old_tree=None):
+    """
+    Parse in-memory source. Pass the previous, already edited, Tree as
+    old_tree to let tree-sitter reuse its unchanged subtrees.
+    """
+    if old_tree is None:
+        return parser.parse(source)
+    return parser.parse(source, old_tree)
+
+
+ParserManager.register("python", parse, source_parser=parse_source, query=PY_QUERY, taxonomy=PY_TAXONOMY)
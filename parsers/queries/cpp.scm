@@ -0,0 +1,96 @@
+; StaticLens query pack: C / C++
+;
+; Captures consumed by the built-in metrics:
+;   @function  @decision                  cyclomatic
+;   @operator  @operand                   halstead
+;   @class  @class.derived  @class.base  @method
+;   @field                                oop
+
+; ---- Cyclomatic ----------------------------------------------------------
+
+[
+  (function_definition)
+  (lambda_expression)
+] @function
+
+[
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (catch_clause)
+  "case"
+] @decision
+
+(binary_expression
+  operator: ["&&" "||"] @decision)
+
+; ---- Halstead ------------------------------------------------------------
+
+[
+  (identifier)
+  (number_literal)
+  (string_literal)
+  (char_literal)
+  (true)
+  (false)
+  (null)
+  "nullptr"
+  (this)
+] @operand
+
+[
+  (binary_expression)
+  (unary_expression)
+  (update_expression)
+  (assignment_expression)
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (do_statement)
+  (switch_statement)
+  (return_statement)
+  (throw_statement)
+  (call_expression)
+  (new_expression)
+  (delete_expression)
+  "+=" "-=" "*=" "/=" "%=" "&&" "||" "==" "!="
+  "<=" ">=" "<" ">" "+" "-" "*" "/" "%" "="
+  "!" "&" "|" "^" "~" "++" "--" "." "->" "::"
+  "?" ":" ";" "," "(" ")" "[" "]" "{" "}"
+  "case"
+  "if" "else" "for" "while" "do" "switch" "default"
+  "return" "break" "continue" "throw" "try" "catch"
+  "new" "delete" "sizeof"
+] @operator
+
+; Leaf tokens whose text is an operator keyword
+([
+  (type_identifier)
+  (field_identifier)
+  (namespace_identifier)
+  (statement_identifier)
+  (string_content)
+] @operator
+  (#any-of? @operator
+    "if" "else" "for" "while" "do" "switch" "case" "default"
+    "return" "break" "continue" "throw" "try" "catch" "finally"
+    "new" "delete" "sizeof" "typeof" "instanceof"))
+
+; ---- OOP -----------------------------------------------------------------
+
+(class_specifier) @class
+
+(class_specifier
+  (base_class_clause)) @class.derived
+
+(class_specifier
+  (base_class_clause
+    [
+      (type_identifier)
+      (qualified_identifier)
+      (template_type)
+    ] @class.base))
+
+(function_definition) @method
+
+(field_declaration) @field
@@ -0,0 +1,89 @@
+; StaticLens query pack: Java
+;
+; Captures consumed by the built-in metrics:
+;   @function  @decision                  cyclomatic
+;   @operator  @operand                   halstead
+;   @class  @class.derived  @class.base  @method
+;   @field                                oop
+
+; ---- Cyclomatic ----------------------------------------------------------
+
+[
+  (method_declaration)
+  (constructor_declaration)
+  (compact_constructor_declaration)
+  (lambda_expression)
+] @function
+
+[
+  (if_statement)
+  (for_statement)
+  (enhanced_for_statement)
+  (while_statement)
+  (catch_clause)
+  "case"
+] @decision
+
+(binary_expression
+  operator: ["&&" "||"] @decision)
+
+; ---- Halstead ------------------------------------------------------------
+
+[
+  (identifier)
+  (decimal_integer_literal)
+  (hex_integer_literal)
+  (string_literal)
+  (true)
+  (false)
+  (this)
+  (super)
+] @operand
+
+[
+  (binary_expression)
+  (unary_expression)
+  (update_expression)
+  (assignment_expression)
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (do_statement)
+  (return_statement)
+  (throw_statement)
+  "+=" "-=" "*=" "/=" "%=" "&&" "||" "==" "!="
+  "<=" ">=" "<" ">" "+" "-" "*" "/" "%" "="
+  "!" "&" "|" "^" "~" "++" "--" "." "->" "::"
+  "?" ":" ";" "," "(" ")" "[" "]" "{" "}"
+  "case"
+  "if" "else" "for" "while" "do" "switch" "default"
+  "return" "break" "continue" "throw" "try" "catch" "finally"
+  "new" "instanceof"
+] @operator
+
+; Leaf tokens whose text is an operator keyword
+([
+  (type_identifier)
+  (string_fragment)
+] @operator
+  (#any-of? @operator
+    "if" "else" "for" "while" "do" "switch" "case" "default"
+    "return" "break" "continue" "throw" "try" "catch" "finally"
+    "new" "delete" "sizeof" "typeof" "instanceof"))
+
+; ---- OOP -----------------------------------------------------------------
+
+(class_declaration) @class
+
+(class_declaration
+  (superclass)) @class.derived
+
+(class_declaration
+  (superclass (_) @class.base))
+
+[
+  (method_declaration)
+  (constructor_declaration)
+] @method
+
+(field_declaration) @field
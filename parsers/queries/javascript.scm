@@ -0,0 +1,94 @@
+; StaticLens query pack: JavaScript
+;
+; Captures consumed by the built-in metrics:
+;   @function  @decision                  cyclomatic
+;   @operator  @operand                   halstead
+;   @class  @class.derived  @class.base  @method
+;   @attribute.this                       oop
+
+; ---- Cyclomatic ----------------------------------------------------------
+
+[
+  (function_declaration)
+  (function_expression)
+  (generator_function)
+  (generator_function_declaration)
+  (arrow_function)
+  (method_definition)
+] @function
+
+[
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (catch_clause)
+  "case"
+] @decision
+
+(binary_expression
+  operator: ["&&" "||"] @decision)
+
+; ---- Halstead ------------------------------------------------------------
+
+[
+  (identifier)
+  (true)
+  (false)
+  (null)
+  (this)
+  (super)
+] @operand
+
+[
+  (binary_expression)
+  (unary_expression)
+  (update_expression)
+  (assignment_expression)
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (do_statement)
+  (switch_statement)
+  (return_statement)
+  (throw_statement)
+  (call_expression)
+  (new_expression)
+  "+=" "-=" "*=" "/=" "%=" "&&" "||" "==" "!="
+  "<=" ">=" "<" ">" "+" "-" "*" "/" "%" "="
+  "!" "&" "|" "^" "~" "++" "--" "."
+  "?" ":" ";" "," "(" ")" "[" "]" "{" "}"
+  "case"
+  "if" "else" "for" "while" "do" "switch" "default"
+  "return" "break" "continue" "throw" "try" "catch" "finally"
+  "new" "delete" "typeof" "instanceof"
+] @operator
+
+; Leaf tokens whose text is an operator keyword
+([
+  (property_identifier)
+  (private_property_identifier)
+  (shorthand_property_identifier)
+  (statement_identifier)
+  (string_fragment)
+] @operator
+  (#any-of? @operator
+    "if" "else" "for" "while" "do" "switch" "case" "default"
+    "return" "break" "continue" "throw" "try" "catch" "finally"
+    "new" "delete" "sizeof" "typeof" "instanceof"))
+
+; ---- OOP -----------------------------------------------------------------
+
+(class_declaration) @class
+
+(class_declaration
+  (class_heritage)) @class.derived
+
+(class_declaration
+  (class_heritage (_) @class.base))
+
+(method_definition) @method
+
+(assignment_expression
+  (member_expression
+    object: (this)
+    property: (_) @attribute.this))
@@ -0,0 +1,66 @@
+; StaticLens query pack: Python
+;
+; Captures consumed by the built-in metrics:
+;   @function  @decision                  cyclomatic
+;   @operator  @operand                   halstead
+;   @class  @class.derived  @method
+;   @field  @init  @attribute.self        oop
+
+; ---- Cyclomatic ----------------------------------------------------------
+
+[
+  (function_definition)
+  (lambda)
+] @function
+
+[
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  "case"
+] @decision
+
+; ---- Halstead ------------------------------------------------------------
+
+[
+  (identifier)
+  (true)
+  (false)
+] @operand
+
+[
+  (if_statement)
+  (for_statement)
+  (while_statement)
+  (return_statement)
+  "+=" "-=" "*=" "/=" "%=" "==" "!="
+  "<=" ">=" "<" ">" "+" "-" "*" "/" "%" "="
+  "&" "|" "^" "~" "." "->"
+  ":" ";" "," "(" ")" "[" "]" "{" "}"
+  "case"
+  "if" "else" "for" "while" "return"
+  "break" "continue" "try" "finally"
+] @operator
+
+; Leaf tokens whose text is an operator keyword
+((string_content) @operator
+  (#any-of? @operator
+    "if" "else" "for" "while" "do" "switch" "case" "default"
+    "return" "break" "continue" "throw" "try" "catch" "finally"
+    "new" "delete" "sizeof" "typeof" "instanceof"))
+
+; ---- OOP -----------------------------------------------------------------
+
+(class_definition) @class
+
+(function_definition) @method
+
+((function_definition
+  name: (identifier) @_name) @init
+  (#eq? @_name "__init__"))
+
+(assignment
+  left: (attribute
+    object: (identifier) @_object
+    attribute: (identifier) @attribute.self)
+  (#eq? @_object "self"))
@@ -0,0 +1,32 @@
+"""
+Loads the per-language tree-sitter query packs in parsers/queries/.
+
+Each parser module compiles its pack once, against its own Language, and
+registers it next to the parse function. MetricManager runs the pack once
+per file and hands the captures to the metrics.
+"""
+import hashlib
+import os
+
+from tree_sitter import Query
+
+QUERY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries")
+
+
+def load_query_pack(language, name: str) -> Query:
+    """Compile parsers/queries/<name>.scm for the given tree-sitter Language."""
+    with open(os.path.join(QUERY_DIR, f"{name}.scm"), "r", encoding="utf-8") as f:
+        return Query(language, f.read())
+
+
+def query_pack_digest() -> str:
+    """Hash of every query pack, so cached metrics follow pack edits."""
+    digest = hashlib.sha256()
+
+    for name in sorted(os.listdir(QUERY_DIR)):
+        if name.endswith(".scm"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(QUERY_DIR, name), "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
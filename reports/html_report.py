@@ -1,104 +1,219 @@
-def generate_html_report(results, output_path: str = None):
+import hashlib
+import os
+import re
 
-    html_content = """
-    <html>
-    <head>
-        <title>Code Analysis Report</title>
-        <style>
-            body { font-family: Arial; margin: 40px; }
-            h1 { color: #2c3e50; }
-            .section { margin-bottom: 30px; }
-            table { border-collapse: collapse; width: 60%; }
-            th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }
-            th { background-color: #f4f4f4; }
-        </style>
-    </head>
-    <body>
-    <h1>Static Code Analysis Report</h1>
-    """
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
 
-    # If multiple files
-    if isinstance(results, list):
+from reports.summary import Summary
 
-        for file_result in results:
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
 
-            html_content += f"""
-            <div class="section">
-                <h2>File: {file_result.get("file")}</h2>
-                <p><strong>Language:</strong> {file_result.get("language")}</p>
-            """
+# Files per directory page of a sharded site
+DEFAULT_PAGE_SIZE = 200
 
-            metrics = file_result.get("metrics", {})
+# Stands in for the next-page link on a directory's last page written so far
+NEXT_MARKER = "<!-- next-page -->"
 
-            for metric_name, metric_values in metrics.items():
+_environment = None
 
-                html_content += f"""
-                <h3>{metric_name.replace('_', ' ').title()}</h3>
-                <table>
-                """
 
-                if isinstance(metric_values, dict):
-                    for key, value in metric_values.items():
-                        html_content += f"""
-                        <tr>
-                            <th>{key}</th>
-                            <td>{value}</td>
-                        </tr>
-                        """
-                else:
-                    html_content += f"""
-                    <tr>
-                        <th>{metric_name}</th>
-                        <td>{metric_values}</td>
-                    </tr>
-                    """
+def get_environment():
+    global _environment
+    if _environment is None:
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(["html"]),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+    return _environment
 
-                html_content += "</table>"
 
-            html_content += "</div>"
+def generate_html_report(results, output_path: str = None):
+    """
+    Render one or many per-file results as a single HTML page and return
+    it, also writing it to output_path if given. To write a large page
+    without holding it in memory use write_html_report(); for large
+    repositories, generate_html_site().
+    """
+    html_content = _report_template().render(results=_file_results(results))
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+
+    return html_content
 
-    # If single file
-    else:
 
-        html_content += f"""
-        <div class="section">
-            <h2>File: {results.get("file")}</h2>
-            <p><strong>Language:</strong> {results.get("language")}</p>
-        """
+def write_html_report(results, output_path: str):
+    """
+    Stream the generate_html_report() page straight to output_path as it
+    is rendered, consuming results lazily. Returns output_path.
+    """
+    _report_template().stream(results=_file_results(results)).dump(output_path, encoding="utf-8")
+    return output_path
 
-        metrics = results.get("metrics", {})
 
-        for metric_name, metric_values in metrics.items():
+def _report_template():
+    return get_environment().get_template("report.html")
 
-            html_content += f"""
-            <h3>{metric_name.replace('_', ' ').title()}</h3>
-            <table>
-            """
 
-            if isinstance(metric_values, dict):
-                for key, value in metric_values.items():
-                    html_content += f"""
-                    <tr>
-                        <th>{key}</th>
-                        <td>{value}</td>
-                    </tr>
-                    """
-            else:
-                html_content += f"""
-                <tr>
-                    <th>{metric_name}</th>
-                    <td>{metric_values}</td>
-                </tr>
-                """
+def _file_results(results):
+    # If single file
+    if isinstance(results, dict):
+        return [results]
+    return results
 
-            html_content += "</table>"
 
-        html_content += "</div>"
+def _contains(directory, name):
+    """Whether directory name lies at or below directory (both relative)."""
+    return directory == "." or name == directory or name.startswith(directory + os.sep)
 
-    html_content += "</body></html>"
 
-    if output_path:
-        with open(output_path, "w") as f:
-            f.write(html_content)
+class _DirectoryPages:
+    """Rows of one directory not yet written, plus its page count and totals."""
 
-    return html_content
+    def __init__(self, name):
+        self.name = name
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+        self.slug = f"{re.sub(r'[^A-Za-z0-9]+', '_', name)[-60:].strip('_') or 'root'}-{digest}"
+        self.rows = []
+        self.pages = 0
+        self.summary = Summary()
+
+    def href(self, page):
+        return f"{self.slug}-{page}.html"
+
+
+def generate_html_site(results, output_dir: str, root_path: str = None,
+                       page_size: int = DEFAULT_PAGE_SIZE, title: str = "Static Code Analysis Report"):
+    """
+    Write results as a sharded static site: index.html with repo-level and
+    per-directory summaries, and paginated per-directory pages under dirs/.
+
+    results may be a generator such as iter_analyze_directory(): a page is
+    rendered and written as soon as a directory has page_size more files,
+    and a directory's partial page once the input leaves its subtree. With
+    input sorted by path or in directory walk order, only the directories
+    above the current file hold rows, at most page_size each. Other orders
+    still produce a correct site: a directory seen again gets new pages
+    and its previous last page a link to them.
+
+    Args:
+        results: Iterable of per-file results, or an analyze_directory() dict
+        output_dir: Directory to write the site to
+        root_path: Directory file paths are shown relative to
+        page_size: Files per directory page
+        title: Title of the index page
+
+    Returns:
+        Path of the index page
+    """
+    summary = Summary()
+
+    if isinstance(results, dict) and "results" in results:
+        root_path = root_path or results.get("root_path")
+        summary.skipped = len(results.get("skipped_files", ()))
+        results = results["results"]
+
+    env = get_environment()
+    page_template = env.get_template("site_directory.html")
+    pages_dir = os.path.join(output_dir, "dirs")
+    os.makedirs(pages_dir, exist_ok=True)
+
+    next_link = env.get_template("_pager.html").module.next_link
+
+    def write_page(directory, rows, has_next):
+        directory.pages += 1
+        page = directory.pages
+        page_template.stream(
+            directory=directory.name,
+            page=page,
+            rows=rows,
+            prev_href=directory.href(page - 1) if page > 1 else None,
+            next_href=directory.href(page + 1) if has_next else None,
+            next_marker=Markup(NEXT_MARKER),
+        ).dump(os.path.join(pages_dir, directory.href(page)), encoding="utf-8")
+
+    def close(directory):
+        write_page(directory, directory.rows, has_next=False)
+        directory.rows = []
+
+    def reopen(directory):
+        # Link the directory's last page to the page about to follow it
+        path = os.path.join(pages_dir, directory.href(directory.pages))
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        link = str(next_link(directory.href(directory.pages + 1), directory.pages + 1))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html.replace(NEXT_MARKER, link, 1))
+
+    languages = {}
+    directories = {}
+    # Directories with unwritten rows: the current file's directory and
+    # those above it, outermost first
+    open_stack = []
+
+    for result in results:
+        if not result:
+            continue
+
+        # Files a FileClassifier skipped are only counted
+        if "skipped" in result:
+            summary.skipped += 1
+            continue
+
+        file_path = result.get("file", "")
+        rel_path = os.path.relpath(file_path, root_path) if root_path else file_path
+        name = os.path.dirname(rel_path) or "."
+
+        while open_stack and not _contains(open_stack[-1].name, name):
+            close(open_stack.pop())
+
+        directory = directories.get(name)
+        if directory is None:
+            directory = directories[name] = _DirectoryPages(name)
+            open_stack.append(directory)
+        elif not open_stack or open_stack[-1] is not directory:
+            reopen(directory)
+            open_stack.append(directory)
+
+        row_summary = Summary()
+        row_summary.add(result)
+        directory.rows.append({
+            "name": os.path.basename(rel_path),
+            "result": result,
+            "summary": row_summary.as_dict(),
+        })
+
+        summary.add(result)
+        directory.summary.add(result)
+        language = result.get("language") or "unknown"
+        languages[language] = languages.get(language, 0) + 1
+
+        # Hold one row back so a full page knows whether a next page exists
+        if len(directory.rows) > page_size:
+            write_page(directory, directory.rows[:page_size], has_next=True)
+            directory.rows = directory.rows[page_size:]
+
+    while open_stack:
+        close(open_stack.pop())
+
+    index_path = os.path.join(output_dir, "index.html")
+    env.get_template("site_index.html").stream(
+        title=title,
+        summary=summary.as_dict(),
+        languages=sorted(languages.items()),
+        directories=[
+            {
+                "name": directory.name,
+                "href": f"dirs/{directory.href(1)}",
+                "pages": directory.pages,
+                "summary": directory.summary.as_dict(),
+            }
+            for _, directory in sorted(directories.items())
+        ],
+    ).dump(index_path, encoding="utf-8")
+
+    return index_path
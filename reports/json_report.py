@@ -11,3 +11,47 @@ def generate_json_report(results: dict, output_path: str = None):
             f.write(json_data)
 
     return json_data
+
+
+
+def load_json_report(path: str):
+    """Load results previously written by generate_json_report."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_ndjson_report(results, output):
+    """
+    Write per-file results as newline-delimited JSON, one record per line.
+
+    Records are written and flushed as results arrive, so with a generator
+    such as iter_analyze_directory() memory stays constant in the number of
+    files and a reader tailing the output sees each file as it completes.
+
+    Args:
+        results: Iterable of per-file analyzer() results
+        output: Path or writable text file object
+
+    Returns:
+        Number of records written
+    """
+    if isinstance(output, str):
+        with open(output, "w") as f:
+            return write_ndjson_report(results, f)
+
+    count = 0
+    for result in results:
+        output.write(json.dumps(result, separators=(",", ":")))
+        output.write("\n")
+        output.flush()
+        count += 1
+
+    return count
+
+
+def iter_ndjson_report(path: str):
+    """Yield the records of a report written by write_ndjson_report."""
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,50 @@
+"""
+Totals over per-file results, for the HTML report and the command line
+(kept out of html_report so summaries do not import jinja2).
+"""
+
+
+class Summary:
+    """Running repo/directory-level totals over per-file results."""
+
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.errors = 0
+        self.functions = 0
+        self.cc_total = 0
+        self.max_cc = 0
+        self.volume = 0.0
+        self.bugs = 0.0
+        self.classes = 0
+
+    def add(self, result):
+        self.files += 1
+        if "error" in result:
+            self.errors += 1
+
+        metrics = result.get("metrics") or {}
+
+        per_function = metrics.get("cyclomatic_complexity", {}).get("per_function", {})
+        self.functions += len(per_function)
+        self.cc_total += sum(per_function.values())
+        self.max_cc = max(self.max_cc, max(per_function.values(), default=0))
+
+        halstead = metrics.get("halstead", {})
+        self.volume += halstead.get("volume", 0)
+        self.bugs += halstead.get("estimated_bugs", 0)
+
+        self.classes += metrics.get("oop_metrics", {}).get("number_of_classes", 0)
+
+    def as_dict(self):
+        return {
+            "files": self.files,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "functions": self.functions,
+            "max_cc": self.max_cc,
+            "avg_cc": round(self.cc_total / self.functions, 2) if self.functions else 0,
+            "volume": round(self.volume, 2),
+            "bugs": round(self.bugs, 3),
+            "classes": self.classes,
+        }
@@ -0,0 +1,3 @@
+"""
+Headless entry point of StaticLens: `python -m staticlens --help`.
+"""
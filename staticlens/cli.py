@@ -0,0 +1,316 @@
+"""
+Headless command line: analyze files, directories, git revisions and
+remote repositories, and write JSON, NDJSON, an HTML site or a summary.
+
+Only the analysis engine is imported, never the Streamlit dashboard, and
+grammars, git and the report templates are loaded only when a target or
+output format needs them, so an invocation starts in tens of milliseconds.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from reports.summary import Summary
+
+FORMATS = ("json", "ndjson", "html", "summary")
+
+# Exit statuses; 2 is argparse's own for bad arguments
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_ANALYSIS_ERRORS = 3
+EXIT_THRESHOLD = 4
+
+# Totals --fail-on can gate on, see reports.summary.Summary
+THRESHOLD_KEYS = ("errors", "functions", "max_cc", "avg_cc", "volume", "bugs", "classes")
+
+_URL = re.compile(r"^([a-z][a-z0-9+.-]*://|[\w.-]+@[\w.-]+:)", re.IGNORECASE)
+
+
+def is_repo_url(target):
+    """Whether target is a repository URL (scheme:// or scp-like ssh) rather than a path."""
+    return bool(_URL.match(target))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m staticlens",
+        description="Static code metrics for files, directories, git revisions and repositories.",
+    )
+    parser.add_argument(
+        "targets", nargs="+", metavar="TARGET",
+        help="source file, directory, local git repository (with --rev) or repository URL",
+    )
+    parser.add_argument("-f", "--format", choices=FORMATS, default="json", help="output format (default: json)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout); the site directory for --format html")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("-m", "--metrics", help="comma-separated metric names to run (default: all)")
+    parser.add_argument("--rev", help="analyze this revision of git targets from the object database")
+    parser.add_argument(
+        "--cache", nargs="?", const="", metavar="DIR",
+        help="reuse cached metrics for unchanged files (default directory if DIR is omitted)",
+    )
+    parser.add_argument("--classify", action="store_true", help="skip generated, minified and vendored files")
+    parser.add_argument("--sparse", action="store_true", help="clone repository URLs blob-less and sparse")
+    parser.add_argument(
+        "--mirror-dir", nargs="?", const="", metavar="DIR",
+        help="keep bare mirrors of repository URLs between runs",
+    )
+    parser.add_argument("--instrument", action="store_true", help="record per-stage timings")
+    parser.add_argument(
+        "--profile-sample", type=float, default=0.0, metavar="FRACTION",
+        help="with --instrument, also profile this fraction of files",
+    )
+    parser.add_argument(
+        "--fail-on-error", action="store_true",
+        help=f"exit with status {EXIT_ANALYSIS_ERRORS} if any file failed to parse or analyze",
+    )
+    parser.add_argument(
+        "--fail-on", action="append", type=_threshold, default=[], metavar="TOTAL=LIMIT",
+        help=f"exit with status {EXIT_THRESHOLD} if a total over all targets exceeds LIMIT, "
+             f"e.g. max_cc=20 (repeatable; totals: {', '.join(THRESHOLD_KEYS)})",
+    )
+    return parser
+
+
+def _threshold(text):
+    key, _, limit = text.partition("=")
+    key = key.strip()
+    if key not in THRESHOLD_KEYS:
+        raise argparse.ArgumentTypeError(f"unknown total {key!r} (available: {', '.join(THRESHOLD_KEYS)})")
+    try:
+        return key, float(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r}: LIMIT must be a number")
+
+
+def _options(args):
+    """Keyword arguments shared by the analyze_* entry points."""
+    options = {"workers": args.workers}
+
+    if args.metrics:
+        options["metrics"] = [name.strip() for name in args.metrics.split(",") if name.strip()]
+
+    if args.cache is not None:
+        from core.metric_cache import MetricCache
+        options["cache"] = MetricCache(args.cache or None)
+
+    if args.classify:
+        from core.file_classifier import FileClassifier
+        options["classifier"] = FileClassifier()
+
+    if args.instrument:
+        from engine.instrumentation import Instrumentation
+        options["instrument"] = Instrumentation(profile_sample=args.profile_sample)
+
+    return options
+
+
+def _check_metrics(names):
+    # Importing the analyzer declares the built-in metrics
+    from engine.analyzer import MetricManager
+
+    MetricManager.load_plugins()
+    unknown = [name for name in names if name not in MetricManager.declared]
+    if unknown:
+        known = ", ".join(sorted(MetricManager.declared))
+        raise ValueError(f"unknown metric(s): {', '.join(unknown)} (available: {known})")
+
+
+def _analyze_target(target, args, options, stream):
+    """
+    Analyze one target.
+
+    Returns:
+        analyze_directory()-shaped output; with stream=True its "results"
+        is a generator, so records can be written as they finish
+    """
+    from engine import analyzer as engine
+
+    if is_repo_url(target):
+        if args.rev is None and args.mirror_dir is None:
+            return engine.analyze_github_repo(target, sparse=args.sparse, **options)
+        return _analyze_remote_revision(target, args, options)
+
+    if args.rev is not None:
+        from engine.revision import analyze_revision, iter_analyze_revision
+        if stream:
+            # Revision files are repository-relative, see analyze_revision()
+            return {"root_path": "", "repo_path": target, "revision": args.rev,
+                    "results": iter_analyze_revision(target, args.rev, **options)}
+        return analyze_revision(target, args.rev, **options)
+
+    if os.path.isdir(target):
+        if stream:
+            return {"root_path": target, "results": engine.iter_analyze_directory(target, **options)}
+        return engine.analyze_directory(target, **options)
+
+    if not os.path.isfile(target):
+        raise ValueError(f"{target}: no such file or directory")
+
+    language = engine.detect_language(target)
+    if not language or not engine.ParserManager.available(language):
+        raise ValueError(f"{target}: unsupported file type")
+
+    results = engine.analyze_files([(target, language)], **options)
+    return {
+        "root_path": os.path.dirname(target),
+        "total_files_scanned": 1,
+        "total_files_analyzed": len([result for result in results if "skipped" not in result]),
+        "results": results,
+    }
+
+
+def _analyze_remote_revision(url, args, options):
+    """
+    A revision of a remote repository needs its history, so it is read
+    from a bare mirror: the --mirror-dir one, or a temporary one.
+    """
+    import shutil
+    import tempfile
+
+    from core.mirror_cache import MirrorCache
+    from engine.revision import analyze_revision
+
+    temporary = None
+    if args.mirror_dir is None:
+        temporary = tempfile.mkdtemp(prefix="staticlens_mirror_")
+    mirrors = MirrorCache(temporary or args.mirror_dir or None)
+
+    try:
+        with mirrors.mirror(url) as mirror_path:
+            output = analyze_revision(mirror_path, args.rev or "HEAD", **options)
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    output["repo_url"] = url
+    return output
+
+
+class _Totals:
+    """Sums every target's results (errors included) while passing them through."""
+
+    def __init__(self):
+        self.summary = Summary()
+
+    def watch(self, results):
+        for result in results:
+            if result:
+                self.summary.add(result)
+            yield result
+
+    def exceeded(self, thresholds):
+        """The (total, value, limit) of thresholds that were exceeded."""
+        totals = self.summary.as_dict()
+        return [(key, totals[key], limit) for key, limit in thresholds if totals[key] > limit]
+
+
+def _open_output(path):
+    if path is None or path == "-":
+        return sys.stdout, False
+    return open(path, "w", encoding="utf-8"), True
+
+
+def _write_summary(outputs, out):
+    for output in outputs:
+        summary = Summary()
+        for result in output["results"]:
+            summary.add(result)
+        summary.skipped = len(output.get("skipped_files", ()))
+        totals = summary.as_dict()
+
+        label = output.get("repo_url") or output.get("root_path") or output.get("repo_path") or "-"
+        if output.get("revision"):
+            label = f"{label}@{output['revision'][:12]}"
+        out.write(f"{label}\n")
+        for key, value in totals.items():
+            out.write(f"  {key:<10} {value}\n")
+
+        performance = output.get("performance")
+        if performance:
+            out.write(f"  {'wall_ms':<10} {performance['wall_ms']}\n")
+            for stage, entry in performance["stages"].items():
+                out.write(f"    {stage:<20} {entry['wall_ms']:>12.3f} ms\n")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.format == "html" and not args.output:
+        parser.error("--format html needs --output DIR")
+
+    try:
+        options = _options(args)
+        if "metrics" in options:
+            _check_metrics(options["metrics"])
+    except ValueError as e:
+        parser.error(str(e))
+
+    counter = _Totals()
+
+    try:
+        if args.format == "ndjson":
+            from reports.json_report import write_ndjson_report
+
+            out, close = _open_output(args.output)
+            try:
+                for target in args.targets:
+                    output = _analyze_target(target, args, options, stream=True)
+                    write_ndjson_report(counter.watch(output["results"]), out)
+            finally:
+                if close:
+                    out.close()
+
+        elif args.format == "html":
+            from reports.html_report import generate_html_site
+
+            def results():
+                for target in args.targets:
+                    yield from _analyze_target(target, args, options, stream=True)["results"]
+
+            # Revision files are already repository-relative
+            single_directory = len(args.targets) == 1 and args.rev is None and os.path.isdir(args.targets[0])
+            root_path = args.targets[0] if single_directory else None
+            index = generate_html_site(counter.watch(results()), args.output, root_path=root_path)
+            print(index, file=sys.stderr)
+
+        else:
+            outputs = []
+            for target in args.targets:
+                output = _analyze_target(target, args, options, stream=False)
+                output["results"] = list(counter.watch(output["results"]))
+                outputs.append(output)
+
+            out, close = _open_output(args.output)
+            try:
+                if args.format == "summary":
+                    _write_summary(outputs, out)
+                else:
+                    document = outputs[0] if len(outputs) == 1 else {"targets": outputs}
+                    json.dump(document, out, indent=4)
+                    out.write("\n")
+            finally:
+                if close:
+                    out.close()
+
+    except ValueError as e:
+        print(f"staticlens: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    except Exception as e:
+        print(f"staticlens: {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+
+    errors = counter.summary.errors
+    if args.fail_on_error and errors:
+        print(f"staticlens: {errors} file(s) failed to analyze", file=sys.stderr)
+        return EXIT_ANALYSIS_ERRORS
+
+    exceeded = counter.exceeded(args.fail_on)
+    for key, value, limit in exceeded:
+        print(f"staticlens: {key} is {value}, over the limit of {limit:g}", file=sys.stderr)
+    if exceeded:
+        return EXIT_THRESHOLD
+    return EXIT_OK
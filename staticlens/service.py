@@ -0,0 +1,806 @@
+"""
+Asynchronous analysis service: a small HTTP/JSON API over the analysis
+engine, so a team shares one queue of analyses instead of running each
+inside a dashboard session.
+
+  python -m staticlens.service [--host 127.0.0.1] [--port 8765] [-j N]
+
+Endpoints:
+
+  POST   /jobs            submit {"target": repository URL, directory or
+                          archive path, "metrics": [...], "classify": bool,
+                          "sparse": bool, "instrument": bool}, or upload a
+                          zip/tar archive as the body (options as query
+                          parameters); answers with the job
+  GET    /jobs            every known job
+  GET    /jobs/ID         status and progress
+  GET    /jobs/ID/result  analyze_directory()-shaped output, once done
+  GET    /jobs/ID/events  NDJSON stream of per-file results as they
+                          finish, then a final status line
+  DELETE /jobs/ID         cancel a job, or forget a finished one
+  GET    /health          service status
+
+Submitting what an unfinished job is already analyzing returns that job.
+Files of every job are analyzed on one bounded process pool; clones,
+mirror fetches, archive extraction, directory scans and each job's file
+planning run on threads, so they overlap with the analysis of other jobs.
+Only cloning remote URLs needs the network: directories, archives and
+file:// URLs work offline.
+
+Directory, archive and file:// targets must lie inside the allowed roots
+(--root, by default the directory the service was started in), so a
+client cannot have the service read arbitrary paths.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import secrets
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from core.archive import extract_archive, is_archive
+from core.file_scanner import FileScanner
+from engine.analyzer import (
+    MetricManager, analyzable_extensions, analyze_source, default_workers, file_task, load_plugins, plan_files,
+)
+from engine.instrumentation import summarize_performance
+from staticlens.cli import is_repo_url
+
+# Job states
+QUEUED = "queued"
+FETCHING = "fetching"
+ANALYZING = "analyzing"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Files planned (classification, blob cache lookups) per trip to a planner thread
+PLAN_BATCH = 32
+
+MAX_HEADERS = 100
+DEFAULT_MAX_UPLOAD = 512 * 1024 * 1024
+
+_OPTION_FLAGS = ("classify", "sparse", "instrument")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def parse_options(fields):
+    """Validated analysis options of a submission (JSON body or query parameters)."""
+    options = {flag: _flag(fields.get(flag, False)) for flag in _OPTION_FLAGS}
+
+    metrics = fields.get("metrics")
+    if isinstance(metrics, str):
+        metrics = [name.strip() for name in metrics.split(",") if name.strip()]
+    if metrics is not None:
+        if not isinstance(metrics, list) or not all(isinstance(name, str) for name in metrics):
+            raise HTTPError(400, '"metrics" must be a list of metric names')
+        MetricManager.load_plugins()
+        unknown = [name for name in metrics if name not in MetricManager.declared]
+        if unknown:
+            raise HTTPError(400, f"unknown metric(s): {', '.join(unknown)}")
+        metrics = sorted(set(metrics))
+    options["metrics"] = metrics
+
+    return options
+
+
+class Job:
+    """One analysis: its request, state and per-file results so far."""
+
+    def __init__(self, job_id, kind, target, options, key):
+        self.id = job_id
+        self.kind = kind
+        self.target = target
+        self.options = options
+        self.key = key
+
+        self.status = QUEUED
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        # Submissions answered by this job, coalesced ones included
+        self.requests = 1
+
+        self.files_total = None
+        self.files_done = 0
+        self.errors = 0
+        self.results = []
+        # Extra top-level output fields (repo_url, revision, ...)
+        self.info = {}
+
+        self.task = None
+        self.upload = None
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        """Wake everything waiting on this job's next change."""
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def set_status(self, status):
+        self.status = status
+        self.notify()
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "kind": self.kind,
+            "target": self.target,
+            "options": self.options,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "requests": self.requests,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "errors": self.errors,
+            "error": self.error,
+        }
+
+    def output(self):
+        """analyze_directory()-shaped output of a finished job."""
+        results = [result for result in self.results if "skipped" not in result]
+        output = {
+            "job": self.id,
+            "target": self.target,
+            **self.info,
+            "total_files_scanned": self.files_total,
+            "total_files_analyzed": len(results),
+            "results": results,
+        }
+        if self.options["classify"]:
+            output["skipped_files"] = [result for result in self.results if "skipped" in result]
+        if self.options["instrument"]:
+            output["performance"] = summarize_performance(results)
+        return output
+
+
+class _Source:
+    """A job's files, planned lazily, and the task analyzing each one."""
+
+    def __init__(self, total, plan, task, root=None, blobs=False):
+        self.total = total
+        self.plan = plan
+        self.task = task
+        # Results are reported relative to root (temporary checkouts)
+        self.root = root
+        # Planned by plan_blobs() rather than plan_files()
+        self.blobs = blobs
+
+
+class AnalysisService:
+    """
+    Job queue over the analysis engine.
+
+    Args:
+        workers: Analysis processes shared by all jobs (default: one per CPU)
+        max_jobs: Jobs fetching or analyzing at once; the rest wait queued
+        max_fetches: Clones, fetches and extractions at once
+        cache_dir: Use a MetricCache in this directory ("" for its default
+            directory); None disables caching
+        mirror_dir: Keep bare mirrors of repository URLs in this directory
+            ("" for the default) and fetch instead of cloning; None clones
+        work_dir: Where archives are extracted (default: system temp)
+        keep_jobs: Finished jobs kept for polling; older ones are forgotten
+        allowed_roots: Directories that directory, archive and file:// targets
+            must be inside (default: the current working directory)
+        max_upload: Largest accepted request body, in bytes
+    """
+
+    def __init__(self, workers=None, max_jobs=2, max_fetches=2, cache_dir=None, mirror_dir=None, work_dir=None,
+                 keep_jobs=100, allowed_roots=None, max_upload=DEFAULT_MAX_UPLOAD):
+        self.workers = workers or default_workers()
+        self.max_jobs = max_jobs
+        self.max_fetches = max_fetches
+        self.cache_dir = cache_dir
+        self.mirror_dir = mirror_dir
+        self.work_dir = work_dir
+        self.keep_jobs = keep_jobs
+        if allowed_roots is None:
+            allowed_roots = [os.getcwd()]
+        self.allowed_roots = [os.path.realpath(root) for root in allowed_roots]
+        self.max_upload = max_upload
+
+        self.jobs = {}
+        # Coalescing key -> unfinished job
+        self._active = {}
+
+        self.cache = None
+        self.mirrors = None
+        self._pool = None
+        self._planners = None
+        self._cache_thread = None
+        self._job_slots = None
+        self._fetch_slots = None
+
+    async def start(self):
+        load_plugins()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Jobs plan their files in parallel, looking the cache up through
+        # readers; the metric cache's own SQLite connection may only be used
+        # by the thread that opened it, so one thread owns it and does the
+        # (cheap) bookkeeping and writes
+        self._planners = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="staticlens-planner")
+        self._cache_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="staticlens-cache")
+        self._job_slots = asyncio.Semaphore(self.max_jobs)
+        self._fetch_slots = asyncio.Semaphore(self.max_fetches)
+
+        loop = asyncio.get_running_loop()
+        if self.cache_dir is not None:
+            from core.metric_cache import MetricCache
+            self.cache = await loop.run_in_executor(self._cache_thread, MetricCache, self.cache_dir or None)
+        if self.mirror_dir is not None:
+            from core.mirror_cache import MirrorCache
+            self.mirrors = MirrorCache(self.mirror_dir or None)
+
+    async def close(self):
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.cache is not None:
+            await asyncio.get_running_loop().run_in_executor(self._cache_thread, self.cache.close)
+        self._planners.shutdown()
+        self._cache_thread.shutdown()
+        self._pool.shutdown(cancel_futures=True)
+
+    # ---- Jobs --------------------------------------------------------------
+
+    def submit(self, target, options):
+        """
+        Queue an analysis of a repository URL, directory or archive path.
+
+        Returns:
+            (job, coalesced), coalesced being True when an unfinished job
+            for the same target and options was returned instead
+        """
+        if not isinstance(target, str) or not target.strip():
+            raise HTTPError(400, 'missing "target"')
+        target = target.strip()
+
+        if is_repo_url(target):
+            from core.mirror_cache import normalize_url
+            url = urlsplit(target)
+            if url.scheme.lower() == "file":
+                # A local repository: the same rule as for directories
+                self._check_path(url.path, target)
+            return self._submit("repo", target, options, normalize_url(target))
+
+        path = self._check_path(target)
+        if os.path.isdir(path):
+            return self._submit("directory", path, options, path)
+        if os.path.isfile(path) and is_archive(path):
+            return self._submit("archive", path, options, path)
+        raise HTTPError(400, f"{target}: not a repository URL, directory or archive")
+
+    def submit_upload(self, data, name, options):
+        """Queue the analysis of an uploaded archive's bytes."""
+        digest = hashlib.sha256(data).hexdigest()
+        job, coalesced = self._submit("upload", name or f"upload-{digest[:12]}", options, f"sha256:{digest}")
+
+        if not coalesced:
+            # Unpacked from memory, then dropped
+            job.upload = data
+        return job, coalesced
+
+    def _check_path(self, path, target=None):
+        path = os.path.realpath(path)
+        if not any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in self.allowed_roots):
+            raise HTTPError(403, f"{target or path}: outside the allowed roots")
+        return path
+
+    def _submit(self, kind, target, options, identity):
+        key = json.dumps([kind, identity, options], sort_keys=True)
+        job = self._active.get(key)
+        if job is not None:
+            job.requests += 1
+            return job, True
+
+        job = Job(secrets.token_hex(8), kind, target, options, key)
+        self.jobs[job.id] = job
+        self._active[key] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job, False
+
+    def cancel(self, job):
+        """Cancel an unfinished job, or forget a finished one."""
+        if job.status in FINISHED:
+            self.jobs.pop(job.id, None)
+        elif job.task is not None:
+            job.task.cancel()
+
+    def _forget_old(self):
+        finished = [job for job in self.jobs.values() if job.status in FINISHED]
+        for job in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[job.id]
+
+    async def _run(self, job):
+        try:
+            async with self._job_slots:
+                job.started = time.time()
+                async with self._source(job) as source:
+                    await self._analyze(job, source)
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); _analyze replaced the pool
+            job.status, job.error = FAILED, "an analysis worker process died"
+        except Exception as e:
+            job.status, job.error = FAILED, str(e) or type(e).__name__
+        finally:
+            job.finished = time.time()
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            job.upload = None
+            job.notify()
+            self._forget_old()
+
+    # ---- Sources -----------------------------------------------------------
+
+    @asynccontextmanager
+    async def _source(self, job):
+        """Fetch or unpack the job's target and yield its _Source."""
+        if job.kind == "directory":
+            yield await self._directory_source(job, job.target)
+
+        elif job.kind in ("archive", "upload"):
+            extracted = tempfile.mkdtemp(prefix="staticlens_job_", dir=self.work_dir)
+            try:
+                async with self._fetch_slots:
+                    job.set_status(FETCHING)
+                    archive = io.BytesIO(job.upload) if job.upload is not None else job.target
+                    await asyncio.to_thread(extract_archive, archive, extracted)
+                    job.upload = None
+                yield await self._directory_source(job, extracted, relative=True)
+            finally:
+                await asyncio.to_thread(shutil.rmtree, extracted, True)
+
+        elif self.mirrors is not None:
+            mirror = self.mirrors.mirror(job.target)
+            async with self._fetch_slots:
+                job.set_status(FETCHING)
+                mirror_path = await asyncio.to_thread(mirror.__enter__)
+            try:
+                yield await self._mirror_source(job, mirror_path)
+            finally:
+                await asyncio.to_thread(mirror.__exit__, None, None, None)
+
+        else:
+            from core.github_clone import GitHubCloner
+
+            cloner = GitHubCloner()
+            extensions = analyzable_extensions() if job.options["sparse"] else None
+            try:
+                async with self._fetch_slots:
+                    job.set_status(FETCHING)
+                    cloned_path = await asyncio.to_thread(cloner.clone_repo, job.target, extensions=extensions)
+                job.info["repo_url"] = job.target
+                yield await self._directory_source(job, cloned_path, relative=True)
+            finally:
+                await asyncio.to_thread(cloner.cleanup)
+
+    def _analysis_options(self, job):
+        options = job.options
+        classifier = instrument = None
+        if options["classify"]:
+            from core.file_classifier import FileClassifier
+            classifier = FileClassifier()
+        if options["instrument"]:
+            from engine.instrumentation import Instrumentation
+            instrument = Instrumentation()
+        return classifier, instrument, options["metrics"]
+
+    async def _directory_source(self, job, root, relative=False):
+        files = await asyncio.to_thread(lambda: sorted(FileScanner().iter_files(root)))
+        job.files_total = len(files)
+        if not relative:
+            job.info["root_path"] = root
+
+        classifier, instrument, metrics = self._analysis_options(job)
+        plan = plan_files(files, self.cache, classifier, root, instrument, metrics)
+        return _Source(len(files), plan, file_task(self.cache), root if relative else None)
+
+    async def _mirror_source(self, job, mirror_path):
+        from git import Repo
+        from engine.revision import iter_revision_files, plan_blobs
+
+        def listing():
+            repo = Repo(mirror_path)
+            return repo.commit("HEAD").hexsha, iter_revision_files(repo, "HEAD")
+
+        revision, files = await asyncio.to_thread(listing)
+        job.files_total = len(files)
+        job.info.update(repo_url=job.target, revision=revision)
+
+        classifier, instrument, metrics = self._analysis_options(job)
+        reader = self.cache.reader() if self.cache is not None else None
+        plan = plan_blobs(files, self.cache, classifier, instrument, metrics, reader=reader)
+        return _Source(len(files), plan, analyze_source, blobs=True)
+
+    # ---- Analysis ----------------------------------------------------------
+
+    async def _analyze(self, job, source):
+        """
+        Plan files in batches on a planner thread and analyze them on the
+        shared pool, keeping a bounded window of this job's files in flight
+        so concurrent jobs interleave. Results are recorded in plan order.
+        """
+        loop = asyncio.get_running_loop()
+        job.set_status(ANALYZING)
+
+        # The pool this job submits to, even if another job replaces it
+        pool = self._pool
+        window = deque()
+        limit = self.workers * 2
+        planned = True
+
+        try:
+            while True:
+                while planned and len(window) < limit:
+                    batch = await loop.run_in_executor(self._planners, _take, source.plan, PLAN_BATCH)
+                    planned = len(batch) == PLAN_BATCH
+                    for _, tag, result, args in batch:
+                        if result is None:
+                            result = loop.run_in_executor(pool, source.task, *args)
+                        window.append((tag, result))
+
+                if not window:
+                    break
+
+                tag, result = window.popleft()
+                ready = not isinstance(result, asyncio.Future)
+                if not ready:
+                    result = await result
+                self._record(job, source, tag, result, ready)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            raise
+        finally:
+            for _, result in window:
+                if isinstance(result, asyncio.Future):
+                    result.cancel()
+            if self.cache is not None:
+                await loop.run_in_executor(self._cache_thread, self.cache.flush)
+
+    def _replace_pool(self, broken):
+        """Swap a broken pool for a new one, once, whichever job saw it break first."""
+        if self._pool is broken:
+            # Reap the dead pool's remaining workers and its management thread
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def _record(self, job, source, tag, result, ready):
+        job.files_done += 1
+
+        # Cache bookkeeping is queued on the cache thread, never awaited
+        if source.blobs:
+            key, verdict, blob_sha = tag
+            if key:
+                # Keyed ready results are hits found by plan_blobs()' reader
+                metrics = None if ready else (result or {}).get("metrics")
+                self._cache_thread.submit(self.cache.record, key, metrics, ready)
+        else:
+            verdict, blob_sha = tag, None
+            if isinstance(result, tuple):
+                # analyze_cached() output
+                key, hit, result = result
+                if key:
+                    self._cache_thread.submit(self.cache.record, key, result.get("metrics") if result else None, hit)
+
+        if result:
+            if verdict is not None and "skipped" not in result:
+                result["classification"] = verdict.as_dict()
+            if blob_sha is not None:
+                result["blob"] = blob_sha
+            if source.root is not None and result.get("file"):
+                result["file"] = os.path.relpath(result["file"], source.root)
+            if "error" in result:
+                job.errors += 1
+            job.results.append(result)
+
+        job.notify()
+
+    # ---- HTTP --------------------------------------------------------------
+
+    async def handle(self, reader, writer):
+        """asyncio.start_server callback: answer one request per connection."""
+        try:
+            try:
+                method, path, query, headers, body = await _read_request(reader, self.max_upload)
+                await self._route(method, path, query, headers, body, writer)
+            except HTTPError as e:
+                await _send_json(writer, e.status, {"error": e.message})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                await _send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _route(self, method, path, query, headers, body, writer):
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return await _send_json(writer, 200, await self.health())
+
+        if parts == ["jobs"]:
+            if method == "GET":
+                return await _send_json(writer, 200, {"jobs": [job.as_dict() for job in self.jobs.values()]})
+            if method == "POST":
+                job, coalesced = self._submit_request(query, headers, body)
+                return await _send_json(writer, 200 if coalesced else 202, {**job.as_dict(), "coalesced": coalesced})
+            raise HTTPError(405, "use GET or POST")
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, f"no job {parts[1]}")
+            action = parts[2] if len(parts) == 3 else None
+
+            if action is None and method == "GET":
+                return await _send_json(writer, 200, job.as_dict())
+            if action is None and method == "DELETE":
+                self.cancel(job)
+                return await _send_json(writer, 200, job.as_dict())
+            if action == "result" and method == "GET":
+                if job.status == DONE:
+                    return await _send_json(writer, 200, job.output())
+                if job.status in FINISHED:
+                    raise HTTPError(410, f"job {job.status}: {job.error or 'no result'}")
+                raise HTTPError(409, f"job is {job.status}")
+            if action == "events" and method == "GET":
+                return await self._stream_events(job, writer)
+
+        raise HTTPError(404, f"no route for {method} {path}")
+
+    def _submit_request(self, query, headers, body):
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+
+        if content_type in ("", "application/json"):
+            try:
+                fields = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "body is not valid JSON")
+            if not isinstance(fields, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            return self.submit(fields.get("target"), parse_options(fields))
+
+        # Anything else is an archive upload; options come from the query
+        if not body:
+            raise HTTPError(400, "empty upload")
+        fields = {name: values[-1] for name, values in query.items()}
+        return self.submit_upload(body, fields.get("name"), parse_options(fields))
+
+    async def _stream_events(self, job, writer):
+        """Replay the job's results, then follow it until it finishes."""
+        await _send_head(writer, 200, "application/x-ndjson", chunked=True)
+
+        sent = 0
+        status = None
+        while True:
+            changed = job.changed
+
+            while sent < len(job.results):
+                await _send_chunk(writer, {"event": "result", "result": job.results[sent]})
+                sent += 1
+
+            if job.status in FINISHED:
+                await _send_chunk(writer, {"event": "end", "job": job.as_dict()})
+                break
+            if job.status != status:
+                status = job.status
+                await _send_chunk(writer, {"event": "status", "job": job.as_dict()})
+
+            await changed.wait()
+
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def health(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+
+        cache = None
+        if self.cache is not None:
+            cache = await asyncio.get_running_loop().run_in_executor(self._cache_thread, self.cache.stats)
+
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "max_jobs": self.max_jobs,
+            "jobs": counts,
+            "cache": cache,
+        }
+
+
+def _take(iterator, count):
+    return list(islice(iterator, count))
+
+
+async def _read_request(reader, max_body):
+    """Parse one HTTP/1.1 request: (method, path, query, headers, body)."""
+    try:
+        line = await reader.readline()
+    except ValueError:
+        raise HTTPError(414, "request line too long")
+    if not line:
+        raise ConnectionError("client closed the connection")
+
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+
+    headers = {}
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            raise HTTPError(431, "header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "send a Content-Length instead of a chunked body")
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length")
+    if length < 0:
+        raise HTTPError(400, "bad Content-Length")
+    if length > max_body:
+        raise HTTPError(413, f"body larger than {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), headers, body
+
+
+async def _send_head(writer, status, content_type, length=None, chunked=False):
+    lines = [
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+        f"Content-Type: {content_type}",
+        "Connection: close",
+        "Cache-Control: no-store",
+    ]
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    elif length is not None:
+        lines.append(f"Content-Length: {length}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+
+async def _send_json(writer, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await _send_head(writer, status, "application/json", length=len(body))
+    writer.write(body)
+    await writer.drain()
+
+
+async def _send_chunk(writer, payload):
+    data = json.dumps(payload).encode("utf-8") + b"\n"
+    writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, ready=None, **options):
+    """
+    Run the service until SIGINT or SIGTERM (or until cancelled), then
+    cancel unfinished jobs and remove their temporary checkouts.
+    options are AnalysisService arguments. ready, if given, is called
+    with the listening (host, port).
+    """
+    service = AnalysisService(**options)
+    await service.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # No signal handlers on this platform or off the main thread
+            pass
+
+    try:
+        server = await asyncio.start_server(service.handle, host, port)
+        async with server:
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[:2])
+            await stop.wait()
+    finally:
+        await service.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m staticlens.service",
+        description="HTTP job service analyzing repositories, directories and archives.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on; 0 picks a free one (default: 8765)")
+    parser.add_argument("-j", "--workers", type=int, help="analysis processes (default: one per CPU)")
+    parser.add_argument("--max-jobs", type=int, default=2, help="jobs fetching or analyzing at once (default: 2)")
+    parser.add_argument("--max-fetches", type=int, default=2, help="clones and extractions at once (default: 2)")
+    parser.add_argument(
+        "--cache", nargs="?", const="", metavar="DIR",
+        help="reuse cached metrics across jobs (default directory if DIR is omitted)",
+    )
+    parser.add_argument(
+        "--mirror-dir", nargs="?", const="", metavar="DIR",
+        help="keep bare mirrors of repository URLs and fetch instead of cloning",
+    )
+    parser.add_argument("--work-dir", help="where archives are extracted (default: system temp)")
+    parser.add_argument(
+        "--root", action="append", metavar="DIR",
+        help="only accept directory, archive and file:// targets inside DIR "
+             "(repeatable; default: the current directory)",
+    )
+    parser.add_argument("--keep-jobs", type=int, default=100, help="finished jobs kept for polling (default: 100)")
+    parser.add_argument(
+        "--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD // (1024 * 1024),
+        help="largest accepted upload in MiB",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def ready(address):
+        print(f"staticlens service listening on http://{address[0]}:{address[1]}", file=sys.stderr)
+
+    asyncio.run(serve(
+        args.host, args.port, ready=ready,
+        workers=args.workers, max_jobs=args.max_jobs, max_fetches=args.max_fetches,
+        cache_dir=args.cache, mirror_dir=args.mirror_dir, work_dir=args.work_dir,
+        keep_jobs=args.keep_jobs, allowed_roots=args.root, max_upload=args.max_upload_mb * 1024 * 1024,
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
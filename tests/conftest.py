@@ -0,0 +1,138 @@
+import os
+
+import pytest
+from git import Repo
+
+
+class GitTree:
+    """A throwaway git working tree for tests."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.repo = Repo.init(self.path)
+        with self.repo.config_writer() as config:
+            config.set_value("user", "name", "test")
+            config.set_value("user", "email", "test@example.com")
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.path, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def remove(self, rel_path):
+        os.remove(os.path.join(self.path, rel_path))
+
+    def commit(self, message="commit"):
+        self.repo.git.add("-A")
+        self.repo.git.commit("-m", message, "--allow-empty")
+        return self.repo.head.commit.hexsha
+
+
+@pytest.fixture
+def git_tree(tmp_path):
+    return GitTree(tmp_path / "repo")
+
+
+def comparable(output):
+    """Per-file (path, metrics) of an analyze_directory()-shaped output, in order."""
+    root = output["root_path"]
+    return [
+        (os.path.relpath(result["file"], root) if root else result["file"], result.get("metrics"))
+        for result in output["results"]
+    ]
+
+
+# One small file per language with classes, methods, nested functions and
+# lambdas, so metric tests exercise every kind of capture
+SAMPLES = {
+    "python": (
+        "py",
+        "class Base:\n"
+        "    pass\n"
+        "\n"
+        "class Shape(Base):\n"
+        "    def __init__(self, w, h):\n"
+        "        self.w = w\n"
+        "        self.h = h\n"
+        "\n"
+        "    def area(self):\n"
+        "        if self.w > 0 and self.h > 0:\n"
+        "            return self.w * self.h\n"
+        "        return 0\n"
+        "\n"
+        "def outer(xs):\n"
+        "    def inner(x):\n"
+        "        return x if x > 0 else -x\n"
+        "    key = lambda x: x % 3 or 1\n"
+        "    for x in xs:\n"
+        "        while x > 10:\n"
+        "            x -= inner(x)\n"
+        "    return sorted(xs, key=key)\n",
+    ),
+    "javascript": (
+        "js",
+        "class Shape extends Base {\n"
+        "  constructor(w, h) { this.w = w; this.h = h; }\n"
+        "  area() { return this.w > 0 && this.h > 0 ? this.w * this.h : 0; }\n"
+        "}\n"
+        "function outer(xs) {\n"
+        "  function inner(x) { if (x < 0) { return -x; } return x; }\n"
+        "  const twice = (x) => x > 1 ? x * 2 : x;\n"
+        "  for (const x of xs) { while (x > 10) { x -= inner(x); } }\n"
+        "  return xs.map((x) => twice(x) || 0);\n"
+        "}\n",
+    ),
+    "java": (
+        "java",
+        "class Shape extends Base {\n"
+        "  int w;\n"
+        "  int h;\n"
+        "  int area() { if (w > 0 && h > 0) { return w * h; } return 0; }\n"
+        "  int sum(java.util.List<Integer> xs) {\n"
+        "    java.util.function.Function<Integer, Integer> abs = (x) -> x < 0 ? -x : x;\n"
+        "    int total = 0;\n"
+        "    for (int x : xs) { while (x > 10) { x -= abs.apply(x); } total += x; }\n"
+        "    return total;\n"
+        "  }\n"
+        "}\n",
+    ),
+    "cpp": (
+        "cpp",
+        "class Shape : public Base {\n"
+        "  int w;\n"
+        "  int h;\n"
+        " public:\n"
+        "  int area() { if (w > 0 && h > 0) { return w * h; } return 0; }\n"
+        "};\n"
+        "int outer(int n) {\n"
+        "  auto twice = [](int q) { return q > 1 ? q * 2 : q; };\n"
+        "  int total = 0;\n"
+        "  for (int i = 0; i < n; i++) { while (total > 10) { total -= twice(i); } }\n"
+        "  return total;\n"
+        "}\n",
+    ),
+}
+
+
+def write_samples(root, copies=1):
+    """Write copies of every sample under root; returns the relative paths."""
+    paths = []
+    for copy in range(copies):
+        for language, (extension, source) in SAMPLES.items():
+            rel_path = os.path.join(f"pkg{copy}", f"{language}_sample.{extension}")
+            path = os.path.join(str(root), rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(source)
+            paths.append(rel_path)
+    return sorted(paths)
+
+
+@pytest.fixture
+def sample_dir(tmp_path):
+    """A directory holding three copies of every language sample."""
+    root = tmp_path / "samples"
+    write_samples(root, copies=3)
+    return str(root)
@@ -0,0 +1,11 @@
+from conftest import comparable
+
+from engine.analyzer import PARALLEL_MIN_FILES, analyze_directory
+
+
+def test_worker_pool_matches_in_process_analysis(sample_dir):
+    serial = analyze_directory(sample_dir, workers=1)
+    assert serial["total_files_analyzed"] >= PARALLEL_MIN_FILES
+
+    parallel = analyze_directory(sample_dir, workers=2)
+    assert comparable(parallel) == comparable(serial)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.corpus import EMITTERS, PROFILES, _Emitter, generate_corpus
+from engine.analyzer import analyze_files, detect_language
+
+SCALE = 0.02
+
+
+def test_emitters_implement_every_part():
+    with pytest.raises(TypeError):
+        _Emitter()
+    assert sorted(EMITTERS) == ["cpp", "java", "javascript", "python"]
+
+
+def test_corpus_is_deterministic_and_parses(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), seed=3, scale=SCALE)
+    second = generate_corpus(str(tmp_path / "b"), seed=3, scale=SCALE)
+    assert sorted(first) == sorted(PROFILES)
+
+    paths = [path for profile in PROFILES for path in first[profile]]
+    for path, other in zip(paths, (path for profile in PROFILES for path in second[profile])):
+        with open(path, "rb") as f, open(other, "rb") as g:
+            assert f.read() == g.read()
+
+    results = analyze_files([(path, detect_language(path)) for path in paths], workers=1)
+    assert len(results) == len(paths)
+    assert all("metrics" in result for result in results)
+    assert all(result["metrics"]["cyclomatic_complexity"]["per_function"] for result in results)
+
+
+def test_generate_run_and_compare(tmp_path, capsys):
+    corpus = str(tmp_path / "corpus")
+    assert main(["generate", corpus, "--scale", str(SCALE)]) == 0
+    assert "small:" in capsys.readouterr().out
+
+    baseline = str(tmp_path / "baseline.json")
+    assert main(["run", "--corpus", corpus, "--output", baseline, "--repeat", "1", "--profile", "nested"]) == 0
+    with open(baseline) as f:
+        data = json.load(f)
+    stages = data["profiles"]["nested"]
+    assert stages["_corpus"]["files"] == 40
+    assert all(entry["seconds"] > 0 for stage, entry in stages.items() if not stage.startswith("_"))
+
+    assert main(["compare", baseline, baseline]) == 0
+    assert "REGRESSION" not in capsys.readouterr().out
+
+    for stage, entry in stages.items():
+        if not stage.startswith("_"):
+            entry["seconds"] = entry["seconds"] * 2 + 1
+    slower = str(tmp_path / "slower.json")
+    with open(slower, "w") as f:
+        json.dump(data, f)
+    assert main(["compare", baseline, slower]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,134 @@
+import pytest
+from conftest import SAMPLES
+
+from benchmarks.corpus import generate_file
+from engine.analyzer import detect_language
+from engine.metric_manager import Captures, MetricManager
+from engine.node_taxonomy import taxonomy_for
+from engine.parser_manager import ParserManager
+from metrics.class_model import ClassModel, is_field, node_text
+from metrics.oop_metrics import OOPVisitor
+
+# Nested classes, several __init__s, fields next to method prototypes,
+# and this.x assignments outside the constructor
+EXTRA = {
+    "python": "class A(B):\n    x = 1\n    def __init__(self):\n        self.a = 1\n        self.a = 2\n"
+              "        class Inner:\n            def __init__(self):\n                self.hidden = 1\n"
+              "    def __init__(self, b):\n        self.b = b\n    def m(self):\n        self.c = 3\n"
+              "class C:\n    pass\n",
+    "javascript": "class A extends B {\n  constructor() { super(); this.a = 1; }\n  m() { this.b = 2;\n"
+                  "    class Inner { n() { this.hidden = 1; } }\n  }\n  static s() {}\n}\n"
+                  "const C = class { k() { this.c = 1; } };\n",
+    "java": "class A extends B implements I {\n  int a, b;\n  void m() {}\n  A() {}\n"
+            "  class Inner { int hidden; void n() {} }\n  interface J { void j(); }\n}\n"
+            "interface I { int f(); }\nenum E { X, Y; void e() {} }\n",
+    "cpp": "class A : public B, private C {\n  int a;\n  int (*callback)(int);\n  void f(int);\n"
+           "  void g() {}\n  class Inner { int hidden; void n() {} };\n};\n"
+           "struct S { int x; S() {} };\nclass D {};\n",
+}
+
+
+def reference_oop(captures, taxonomy):
+    """OOP numbers counted in a single pass over the captures, as before the class model."""
+    derived = {(node.start_byte, node.end_byte) for node in captures.get("class.derived", ())}
+    order = ("class", "method", "field", "init", "attribute.self", "attribute.this")
+    events = sorted(
+        ((node.start_byte, -node.end_byte, index, kind, node)
+         for index, kind in enumerate(order) for node in captures.get(kind, ())),
+        key=lambda event: event[:4],
+    )
+
+    classes = []
+    inheritance = 0
+    class_end = blocker_end = init_end = None
+    methods = attributes = 0
+    instance_attributes = set()
+
+    for start, neg_end, _, kind, node in events:
+        if class_end is not None and start >= class_end:
+            classes.append((methods, attributes + len(instance_attributes)))
+            class_end = None
+
+        if class_end is None:
+            if kind == "class":
+                inheritance += (start, -neg_end) in derived
+                class_end = -neg_end
+                blocker_end = init_end = None
+                methods = attributes = 0
+                instance_attributes = set()
+            continue
+
+        if blocker_end is not None and start >= blocker_end:
+            blocker_end = None
+
+        if blocker_end is None:
+            if kind == "class":
+                blocker_end = -neg_end
+            elif kind == "method":
+                methods += 1
+                blocker_end = -neg_end
+            elif kind == "field" and is_field(node, taxonomy):
+                attributes += 1
+                blocker_end = -neg_end
+
+        if kind == "init":
+            if init_end is None:
+                init_end = -neg_end
+        elif kind == "attribute.self":
+            if init_end is not None and start < init_end:
+                instance_attributes.add(node_text(node))
+        elif kind == "attribute.this":
+            instance_attributes.add(node_text(node))
+
+    if class_end is not None:
+        classes.append((methods, attributes + len(instance_attributes)))
+    return classes, inheritance
+
+
+def parsed(tmp_path, language, source, index=0):
+    path = str(tmp_path / f"source{index}.{SAMPLES[language][0]}")
+    with open(path, "w") as f:
+        f.write(source)
+    tree = ParserManager.get_parser(detect_language(path))(path)
+    return tree, MetricManager.capture(tree, language), taxonomy_for(language, tree)
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_oop_numbers_match_single_pass_counting(tmp_path, language):
+    sources = [SAMPLES[language][1], EXTRA[language], generate_file(language, "classes", 0, scale=0.1)]
+
+    for index, source in enumerate(sources):
+        _, captures, taxonomy = parsed(tmp_path, language, source, index)
+        classes, inheritance = reference_oop(captures, taxonomy)
+
+        visitor = OOPVisitor(taxonomy)
+        visitor.consume(captures)
+        assert [(c["methods"], c["attributes"]) for c in visitor.classes] == classes, index
+        assert visitor.num_inheritance == inheritance, index
+        assert classes
+
+
+def test_class_model(tmp_path):
+    _, captures, taxonomy = parsed(tmp_path, "cpp", EXTRA["cpp"])
+    model = ClassModel.build(captures, taxonomy)
+
+    # Structs are not classes to the C++ pack
+    assert [record.name for record in model.classes] == ["A", "D"]
+    first = model.classes[0]
+    assert first.derived and first.bases == ["B", "C"]
+    fields = [node_text(node) for node in first.fields]
+    # Prototypes, function pointers included, are not fields
+    assert fields[0] == "int a;" and "void f(int);" not in fields and "int (*callback)(int);" not in fields
+    assert [node_text(node) for node in first.methods] == ["void g() {}"]
+
+
+def test_duplicate_captures_are_counted_once(tmp_path):
+    _, captures, taxonomy = parsed(tmp_path, "java", EXTRA["java"])
+    once = ClassModel.build(captures, taxonomy)
+
+    # The same node captured twice under one name (e.g. by two patterns)
+    twice = Captures({kind: list(nodes) * 2 for kind, nodes in captures.items()})
+    model = ClassModel.build(twice, taxonomy)
+
+    assert [(len(r.methods), len(r.fields), r.derived) for r in model.classes] == \
+        [(len(r.methods), len(r.fields), r.derived) for r in once.classes]
@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from conftest import write_samples
+
+from engine.metric_manager import MetricManager
+from staticlens.cli import EXIT_ANALYSIS_ERRORS, EXIT_FAILURE, EXIT_OK, EXIT_THRESHOLD, main
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(capsys, *argv):
+    status = main(["-j", "1", *argv])
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def summary_totals(text):
+    return {key: value for key, value in (line.split() for line in text.splitlines()[1:])}
+
+
+def test_json(sample_dir, capsys):
+    status, out, _ = run(capsys, sample_dir)
+    output = json.loads(out)
+    assert status == EXIT_OK
+    assert output["total_files_analyzed"] == 12
+    assert all("metrics" in result for result in output["results"])
+
+
+def test_json_of_several_targets_and_metric_selection(sample_dir, tmp_path, capsys):
+    single = os.path.join(sample_dir, "pkg0", "python_sample.py")
+    path = str(tmp_path / "out.json")
+    status, _, _ = run(capsys, sample_dir, single, "-m", "halstead", "-o", path)
+    with open(path) as f:
+        output = json.load(f)
+    assert status == EXIT_OK
+    assert [target["total_files_analyzed"] for target in output["targets"]] == [12, 1]
+    assert set(output["targets"][1]["results"][0]["metrics"]) == {"halstead"}
+
+
+def test_ndjson(sample_dir, capsys):
+    status, out, _ = run(capsys, sample_dir)
+    expected = {result["file"] for result in json.loads(out)["results"]}
+
+    status, out, _ = run(capsys, sample_dir, "-f", "ndjson")
+    assert status == EXIT_OK
+    assert {json.loads(line)["file"] for line in out.splitlines()} == expected
+
+
+def test_html(sample_dir, tmp_path, capsys):
+    site = str(tmp_path / "site")
+    status, _, err = run(capsys, sample_dir, "-f", "html", "-o", site)
+    assert status == EXIT_OK
+    assert err.strip() == os.path.join(site, "index.html")
+    with open(os.path.join(site, "index.html")) as f:
+        index = f.read()
+    assert ">pkg0<" in index and sample_dir not in index
+
+
+def test_summary(sample_dir, capsys):
+    status, out, _ = run(capsys, sample_dir, "-f", "summary")
+    assert status == EXIT_OK
+    assert out.splitlines()[0] == sample_dir
+    totals = summary_totals(out)
+    assert totals["files"] == "12" and totals["errors"] == "0"
+
+
+def test_summary_does_not_import_jinja(sample_dir):
+    code = (
+        "import sys; from staticlens.cli import main; "
+        f"main(['-j', '1', '-f', 'summary', {sample_dir!r}]); "
+        "assert 'jinja2' not in sys.modules and 'streamlit' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True)
+
+
+def test_revision(git_tree, tmp_path, capsys, monkeypatch):
+    write_samples(git_tree.path, copies=1)
+    head = git_tree.commit()
+    git_tree.remove("pkg0/python_sample.py")
+    monkeypatch.chdir(tmp_path)
+
+    status, out, _ = run(capsys, git_tree.path, "--rev", head, "-f", "summary")
+    assert status == EXIT_OK
+    assert out.splitlines()[0] == f"{git_tree.path}@{head[:12]}"
+    assert summary_totals(out)["files"] == "4"
+
+    status, out, _ = run(capsys, git_tree.path, "--rev", head, "-f", "ndjson")
+    assert sorted(json.loads(line)["file"] for line in out.splitlines())[0] == "pkg0/cpp_sample.cpp"
+
+    # Repository-relative paths are not resolved against the current directory
+    site = str(tmp_path / "site")
+    status, _, _ = run(capsys, git_tree.path, "--rev", head, "-f", "html", "-o", site)
+    with open(os.path.join(site, "index.html")) as f:
+        index = f.read()
+    assert status == EXIT_OK
+    assert ">pkg0<" in index and ".." not in index
+
+
+def test_fail_on_thresholds(sample_dir, capsys):
+    status, out, _ = run(capsys, sample_dir, "-f", "summary")
+    max_cc = int(summary_totals(out)["max_cc"])
+
+    assert run(capsys, sample_dir, "-f", "summary", "--fail-on", f"max_cc={max_cc}")[0] == EXIT_OK
+
+    status, _, err = run(capsys, sample_dir, "-f", "ndjson", "--fail-on", f"max_cc={max_cc - 1}",
+                         "--fail-on", "classes=1000")
+    assert status == EXIT_THRESHOLD
+    assert "max_cc" in err and "classes" not in err
+
+    with pytest.raises(SystemExit) as exc:
+        main([sample_dir, "--fail-on", "nonsense=1"])
+    assert exc.value.code == 2
+
+
+def test_fail_on_error(sample_dir, capsys, monkeypatch):
+    run_all = MetricManager.run_all.__func__
+
+    def failing(cls, tree, file_path, *args, **kwargs):
+        if file_path.endswith("java_sample.java"):
+            raise RuntimeError("boom")
+        return run_all(cls, tree, file_path, *args, **kwargs)
+
+    monkeypatch.setattr(MetricManager, "run_all", classmethod(failing))
+
+    status, out, _ = run(capsys, sample_dir, "-f", "summary")
+    assert status == EXIT_OK and summary_totals(out)["errors"] == "3"
+
+    status, _, err = run(capsys, sample_dir, "-f", "summary", "--fail-on-error")
+    assert status == EXIT_ANALYSIS_ERRORS
+    assert "3 file(s)" in err
+
+    assert run(capsys, sample_dir, "-f", "summary", "--fail-on", "errors=2")[0] == EXIT_THRESHOLD
+
+
+def test_bad_targets_and_arguments(tmp_path, capsys):
+    status, _, err = run(capsys, str(tmp_path / "missing"))
+    assert status == EXIT_FAILURE
+    assert "no such file or directory" in err
+
+    (tmp_path / "notes.txt").write_text("text")
+    assert run(capsys, str(tmp_path / "notes.txt"))[0] == EXIT_FAILURE
+
+    for argv in ([str(tmp_path), "-f", "html"], [str(tmp_path), "-m", "nonsense"], [str(tmp_path), "-f", "xml"]):
+        with pytest.raises(SystemExit) as exc:
+            main(argv)
+        assert exc.value.code == 2
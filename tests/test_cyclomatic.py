@@ -0,0 +1,51 @@
+import pytest
+from conftest import SAMPLES
+
+from engine.analyzer import analyze_source
+
+# Each decision counts only for its innermost function; anonymous
+# functions are named after their line
+PER_FUNCTION = {
+    "python": {"__init__": 1, "area": 2, "outer": 3, "inner": 1, "line_17": 1},
+    "javascript": {"constructor": 1, "area": 2, "outer": 2, "inner": 2, "twice": 1, "line_9": 2},
+    "java": {"area": 3, "sum": 3, "abs": 1},
+    "cpp": {"area": 3, "outer": 3, "line_8": 1},
+}
+
+
+def per_function(source, language):
+    result = analyze_source(source, language, metrics=["cyclomatic"])
+    return result["metrics"]["cyclomatic_complexity"]["per_function"]
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_decisions_attributed_to_innermost_function(language):
+    assert per_function(SAMPLES[language][1], language) == PER_FUNCTION[language]
+
+
+def test_cpp_declarator_names():
+    source = (
+        "int *ptr(int a) { return 0; }\n"
+        "int &ref(int a) { return a; }\n"
+        "int Foo::method(int a) { if (a) { return a; } return 0; }\n"
+        "Foo::~Foo() { }\n"
+        "int (*fptr(int a))(int) { return 0; }\n"
+        "auto l = [](int q) { if (q < 0) { return -q; } return q; };\n"
+        "auto t = [](int q) -> int { return q; };\n"
+    )
+    assert per_function(source, "cpp") == {
+        "ptr": 1, "ref": 1, "Foo::method": 2, "Foo::~Foo": 1, "fptr": 1, "line_6": 2, "line_7": 1,
+    }
+
+
+def test_nested_lambdas_count_separately():
+    source = (
+        "function outer(xs) {\n"
+        "  return xs.map((x) => {\n"
+        "    const inner = (y) => y > 0 && y < 9;\n"
+        "    if (x) { return inner(x); }\n"
+        "    return 0;\n"
+        "  });\n"
+        "}\n"
+    )
+    assert per_function(source, "javascript") == {"outer": 1, "line_2": 2, "inner": 2}
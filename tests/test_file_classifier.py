@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from core.file_classifier import FULL, REDUCED, SKIP, FileClassifier
+from engine.analyzer import analyze_directory
+
+PY = "def f(x):\n    return x\n"
+
+
+def write(root, rel_path, text):
+    path = os.path.join(str(root), rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+@pytest.mark.parametrize("rel_path, text, kind", [
+    ("src/app.py", PY, None),
+    ("vendor/lib/x.py", PY, "vendored"),
+    ("third_party/y.js", "var a = 1;\n", "vendored"),
+    ("api/service_pb2.py", PY, "generated"),
+    ("api/parser.generated.cpp", "int a;\n", "generated"),
+    ("src/gen.py", "# @generated by tool\n" + PY, "generated"),
+    ("src/api.java", "// Code generated by protoc. DO NOT EDIT.\nclass A {}\n", "generated"),
+    ("static/app.min.js", "var a=1;\n", "minified"),
+    ("static/app.js", "var a=1;" * 1000 + "\n", "minified"),
+    ("src/strings.js", "var s = '" + "x" * 3000 + "';\n" + "var a = 1;\n" * 300, None),
+    ("src/big.py", PY * 500, "oversized"),
+], ids=lambda value: value if isinstance(value, str) and len(value) < 40 else "")
+def test_detect(tmp_path, rel_path, text, kind):
+    path = write(tmp_path, rel_path, text)
+    assert FileClassifier(max_bytes=10000).detect(path, root_path=str(tmp_path))[0] == kind
+
+
+def test_vendor_dirs_only_count_below_root(tmp_path):
+    root = tmp_path / "vendor" / "project"
+    path = write(root, "src/app.py", PY)
+    assert FileClassifier().classify(path, root_path=str(root)) is None
+    assert FileClassifier().classify(path).kind == "vendored"
+
+
+def test_sample_stands_in_for_the_file():
+    classifier = FileClassifier()
+    verdict = classifier.classify("blob/x.py", size=10, sample=b"# DO NOT EDIT\n" + PY.encode())
+    assert (verdict.kind, verdict.action, verdict.metrics) == ("generated", SKIP, None)
+
+
+def test_policies(tmp_path):
+    big = write(tmp_path, "big.py", PY * 50)
+    vendored = write(tmp_path, "vendor/v.py", PY)
+
+    default = FileClassifier(max_bytes=1000)
+    verdict = default.classify(big, root_path=str(tmp_path))
+    assert (verdict.action, verdict.metrics) == (REDUCED, ("cyclomatic",))
+    assert default.classify(vendored, root_path=str(tmp_path)).action == SKIP
+
+    custom = FileClassifier(
+        policy={"vendored": FULL, "oversized": SKIP}, max_bytes=1000, reduced_metrics=("halstead",),
+    )
+    assert custom.classify(big, root_path=str(tmp_path)).action == SKIP
+    verdict = custom.classify(vendored, root_path=str(tmp_path))
+    assert (verdict.kind, verdict.action, verdict.metrics) == ("vendored", FULL, None)
+
+    with pytest.raises(ValueError):
+        FileClassifier(policy={"generated": "ignore"})
+
+
+def test_analysis_applies_verdicts(tmp_path):
+    write(tmp_path, "app.py", PY)
+    write(tmp_path, "vendor/v.py", PY)
+    write(tmp_path, "big.py", PY * 50)
+
+    output = analyze_directory(str(tmp_path), workers=1, classifier=FileClassifier(max_bytes=1000))
+    results = {os.path.basename(result["file"]): result for result in output["results"]}
+    skipped = [os.path.basename(result["file"]) for result in output["skipped_files"]]
+
+    assert skipped == ["v.py"]
+    assert output["skipped_files"][0]["skipped"] == {"kind": "vendored", "reason": "inside vendor/"}
+    assert "classification" not in results["app.py"]
+    assert results["big.py"]["classification"]["kind"] == "oversized"
+    assert list(results["big.py"]["metrics"]) == ["cyclomatic_complexity"]
+    assert list(results["app.py"]["metrics"]) == ["cyclomatic_complexity", "halstead", "oop_metrics"]
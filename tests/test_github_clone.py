@@ -0,0 +1,41 @@
+import os
+
+from conftest import GitTree
+
+from core.github_clone import GitHubCloner, sparse_patterns
+from engine.analyzer import analyzable_extensions
+
+
+def checked_out(root):
+    found = set()
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [name for name in dirs if name != ".git"]
+        found.update(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/") for name in files)
+    return found
+
+
+def test_sparse_patterns():
+    patterns = sparse_patterns([".py", ".hpp"], ignore_dirs={".git", "node_modules"}, ignore_files=[".gitignore"])
+    assert patterns == ["*.[hH][pP][pP]", "*.[pP][yY]", ".gitignore", "!**/node_modules/**"]
+
+
+def test_analyzable_extensions():
+    extensions = analyzable_extensions()
+    assert {".py", ".js", ".jsx", ".java", ".c", ".cpp", ".h", ".hpp"} <= set(extensions)
+    assert extensions == sorted(extensions)
+
+
+def test_sparse_clone_checks_out_analyzable_files(tmp_path):
+    origin = GitTree(tmp_path / "origin")
+    origin.repo.git.config("uploadpack.allowFilter", "true")
+    for rel_path in ("a.py", "B.PY", "lib/c.cpp", "docs/readme.md", "img/logo.png",
+                     "node_modules/dep/index.js", ".gitignore"):
+        origin.write(rel_path, "x = 1\n")
+    origin.commit()
+
+    cloner = GitHubCloner()
+    try:
+        path = cloner.clone_repo(f"file://{origin.path}", extensions=analyzable_extensions())
+        assert checked_out(path) == {"a.py", "B.PY", "lib/c.cpp", ".gitignore"}
+    finally:
+        cloner.cleanup()
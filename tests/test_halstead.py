@@ -0,0 +1,62 @@
+from collections import Counter
+
+import pytest
+from conftest import SAMPLES
+
+from benchmarks.corpus import PROFILES, generate_file
+from engine.analyzer import detect_language
+from engine.metric_manager import MetricManager
+from engine.parser_manager import ParserManager
+from metrics.halstead import HalsteadMetric
+
+EXTENSIONS = {language: extension for language, (extension, _) in SAMPLES.items()}
+
+# Syntax errors leave ERROR nodes and zero-width MISSING tokens in the tree
+BROKEN = {
+    "python": "def f(a:\n    return (a +\nclass\n",
+    "javascript": "function f(a { return a + ; }\nlet x = [1, 2\n",
+    "java": "class A { int f(int a { return a + ; }\n",
+    "cpp": "int f(int a { return a + ; }\nclass B : public {\n",
+}
+
+
+def text_counted(tree, language):
+    """Halstead numbers counted the original way: str-keyed Counters of decoded leaf text."""
+    operators, operands = Counter(), Counter()
+    captures = MetricManager.capture(tree, language)
+
+    for node in captures.get("operand", ()):
+        if node.child_count == 0:
+            text = node.text.decode("utf-8")
+            if text.strip():
+                operands[text] += 1
+
+    for node in captures.get("operator", ()):
+        if node.child_count == 0:
+            text = node.text.decode("utf-8")
+            if text.strip():
+                operators[text] += 1
+        else:
+            operators[node.type] += 1
+
+    return HalsteadMetric.from_counts(operators, operands)
+
+
+def sources(language):
+    yield SAMPLES[language][1]
+    yield BROKEN[language]
+    for profile in PROFILES:
+        yield generate_file(language, profile, 0, scale=0.05)
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_kind_counting_matches_text_counting(tmp_path, language):
+    for i, source in enumerate(sources(language)):
+        path = str(tmp_path / f"source{i}.{EXTENSIONS[language]}")
+        with open(path, "w") as f:
+            f.write(source)
+
+        tree = ParserManager.get_parser(detect_language(path))(path)
+        expected = text_counted(tree, language)
+        assert MetricManager.run_all(tree, path, language, metrics=["halstead"]) == expected, path
+        assert expected["halstead"]["vocabulary"] > 0
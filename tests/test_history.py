@@ -0,0 +1,59 @@
+from conftest import SAMPLES
+
+from engine.history import analyze_history, file_trend, trend_point
+from engine.revision import analyze_revision
+
+
+def expected_summary(output):
+    """Repo-level totals of an analyze_revision() output, computed directly."""
+    points = [point for point in map(trend_point, output["results"]) if point is not None]
+    functions = sum(point[0] for point in points)
+    return {
+        "files": len(points),
+        "functions": functions,
+        "max_cc": max((point[2] for point in points), default=0),
+        "avg_cc": round(sum(point[1] for point in points) / functions, 2) if functions else 0,
+        "volume": round(sum(point[3] for point in points), 2),
+        "bugs": round(sum(point[4] for point in points), 3),
+        "classes": sum(point[5] for point in points),
+    }
+
+
+def test_history_totals_match_each_revision(git_tree):
+    def sample(language):
+        return SAMPLES[language][1]
+
+    git_tree.write("a.py", sample("python"))
+    git_tree.write("src/b.js", sample("javascript"))
+    git_tree.commit()
+
+    # Modify, add in a new directory, and a copy with an identical blob
+    git_tree.write("a.py", sample("python") + "\ndef extra(x):\n    return x if x else -x\n")
+    git_tree.write("lib/C.java", sample("java"))
+    git_tree.write("src/copy.js", sample("javascript"))
+    git_tree.commit()
+
+    # Delete, rename, and an ignore file hiding a directory
+    git_tree.remove("src/b.js")
+    git_tree.remove("lib/C.java")
+    git_tree.write("lib/Renamed.java", sample("java"))
+    git_tree.write("vendor/d.cpp", sample("cpp"))
+    git_tree.write(".gitignore", "vendor/\n")
+    git_tree.commit()
+
+    # Dropping the ignore file brings the directory back unchanged
+    git_tree.remove(".gitignore")
+    git_tree.commit()
+
+    history = analyze_history(git_tree.path, workers=1)
+    assert history["root_path"] == ""
+    assert len(history["commits"]) == 4
+
+    for commit in history["commits"]:
+        revision = analyze_revision(git_tree.path, commit["commit"], workers=1)
+        assert commit["summary"] == expected_summary(revision), commit["commit"]
+
+    # The java sample and the js copy are analyzed once each
+    assert history["blobs_analyzed"] == 5
+    assert file_trend(history, "src/b.js", "functions")[2:] == [None, None]
+    assert file_trend(history, "vendor/d.cpp", "classes")[:3] == [None, None, None]
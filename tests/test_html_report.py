@@ -0,0 +1,78 @@
+import os
+import re
+
+from reports.html_report import NEXT_MARKER, generate_html_report, generate_html_site, write_html_report
+
+
+def result(rel_path, root):
+    return {"file": os.path.join(root, rel_path), "language": "python", "metrics": {}}
+
+
+def rows_written(site):
+    pages_dir = os.path.join(site, "dirs")
+    count = 0
+    for name in os.listdir(pages_dir):
+        with open(os.path.join(pages_dir, name), encoding="utf-8") as f:
+            count += len(re.findall(r'<a id="f\d+">', f.read()))
+    return count
+
+
+def held_rows(paths, root, site, peak):
+    """Yield results for paths, recording how many rows are not yet written."""
+    for consumed, rel_path in enumerate(paths):
+        if os.path.isdir(os.path.join(site, "dirs")):
+            peak.append(consumed - rows_written(site))
+        yield result(rel_path, root)
+
+
+def tree_paths(order):
+    paths = []
+    for top in range(20):
+        paths += [f"d{top:02}/f{i}.py" for i in range(3)]
+        for sub in range(3):
+            paths += [f"d{top:02}/s{sub}/f{i}.py" for i in range(3)]
+    return sorted(paths) if order == "sorted" else paths
+
+
+def test_partial_pages_are_flushed_when_the_input_moves_on(tmp_path):
+    root = str(tmp_path / "src")
+    for order in ("sorted", "walk"):
+        site = str(tmp_path / order)
+        peak = []
+        paths = tree_paths(order)
+        generate_html_site(held_rows(paths, root, site, peak), site, root_path=root, page_size=2)
+
+        # Only the current directory and its parent hold rows (page_size + 1 each)
+        assert max(peak) <= 2 * 3
+        assert rows_written(site) == len(paths)
+
+
+def test_directory_seen_again_continues_its_pages(tmp_path):
+    root = str(tmp_path / "src")
+    site = str(tmp_path / "site")
+    paths = ["a/x.py", "b/y.py", "a/z.py"]
+    generate_html_site([result(path, root) for path in paths], site, root_path=root)
+
+    pages = sorted(name for name in os.listdir(os.path.join(site, "dirs")) if name.startswith("a-"))
+    assert len(pages) == 2
+    with open(os.path.join(site, "dirs", pages[0]), encoding="utf-8") as f:
+        first = f.read()
+    assert f'href="{pages[1]}"' in first
+    assert NEXT_MARKER not in first
+    assert rows_written(site) == len(paths)
+
+
+def test_report_returns_html_and_writes_it(tmp_path):
+    results = [result(f"f{i}.py", str(tmp_path)) for i in range(3)]
+    path = str(tmp_path / "report.html")
+
+    html = generate_html_report(results, path)
+    assert html == generate_html_report(results)
+    assert html.count("f1.py") == 1
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == html
+
+    streamed = str(tmp_path / "streamed.html")
+    assert write_html_report(iter(results), streamed) == streamed
+    with open(streamed, encoding="utf-8") as f:
+        assert f.read() == html
@@ -0,0 +1,100 @@
+import os
+
+from conftest import comparable
+
+from engine.analyzer import analyze_directory
+from engine.history import analyze_history
+from engine.incremental import analyze_changes
+from engine.revision import analyze_revision
+from engine.watch import WatchSession
+
+PY = "def f(x):\n    if x:\n        return 1\n    return 2\n"
+
+
+def build(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write("b.py", PY)
+    git_tree.write(".staticlensignore", "skipme/\n")
+    git_tree.write("skipme/d.py", PY)
+    git_tree.write("sub/.gitignore", "gen_*.py\n!gen_keep.py\n")
+    git_tree.write("sub/gen_x.py", PY)
+    git_tree.write("sub/gen_keep.py", PY)
+    git_tree.write("sub/c.py", PY)
+    # Committed despite .gitignore, as generated files often are
+    git_tree.repo.git.add("-A", "-f")
+    return git_tree.commit()
+
+
+def paths(output):
+    root = output["root_path"]
+    return sorted(os.path.relpath(os.path.join(root, result["file"]), root) for result in output["results"])
+
+
+def test_revision_matches_full_scan(git_tree):
+    build(git_tree)
+    full = analyze_directory(git_tree.path, workers=1)
+    assert paths(full) == ["a.py", "b.py", "sub/c.py", "sub/gen_keep.py"]
+    assert paths(analyze_revision(git_tree.path, workers=1)) == paths(full)
+
+
+def test_incremental_matches_full_scan(git_tree):
+    base = build(git_tree)
+    base_output = analyze_directory(git_tree.path, workers=1)
+
+    git_tree.write("skipme/d.py", PY + "\ndef g():\n    return 3\n")
+    git_tree.write("sub/gen_x.py", PY + "\n")
+    git_tree.write("a.py", PY + "\n")
+    git_tree.repo.git.add("-A", "-f")
+    git_tree.commit()
+
+    merged = analyze_changes(git_tree.path, base, base_output=base_output, workers=1)
+    assert comparable(merged) == comparable(analyze_directory(git_tree.path, workers=1))
+
+
+def test_incremental_with_changed_ignore_file_matches_full_scan(git_tree):
+    base = build(git_tree)
+    base_output = analyze_directory(git_tree.path, workers=1)
+
+    git_tree.write(".staticlensignore", "skipme/\nb.py\n")
+    git_tree.commit()
+
+    merged = analyze_changes(git_tree.path, base, base_output=base_output, workers=1)
+    assert comparable(merged) == comparable(analyze_directory(git_tree.path, workers=1))
+
+
+def test_history_follows_ignore_files(git_tree):
+    build(git_tree)
+    git_tree.write("skipme/e.py", PY)
+    git_tree.commit()
+    # Unchanged b.py leaves the scan, skipme/ comes back
+    git_tree.write(".staticlensignore", "b.py\n")
+    git_tree.commit()
+
+    history = analyze_history(git_tree.path, workers=1)
+    counts = [commit["summary"]["files"] for commit in history["commits"]]
+    assert counts == [4, 4, 5]
+    assert len(paths(analyze_directory(git_tree.path, workers=1))) == counts[-1]
+    assert "skipme/d.py" in history["files"] and "b.py" in history["files"]
+
+
+def test_watch_skips_ignored_files(git_tree):
+    build(git_tree)
+    session = WatchSession(git_tree.path)
+    assert not session.watches(os.path.join(git_tree.path, "skipme", "d.py"))
+    assert not session.watches(os.path.join(git_tree.path, "sub", "gen_x.py"))
+    assert session.watches(os.path.join(git_tree.path, "sub", "gen_keep.py"))
+    assert session.watches(os.path.join(git_tree.path, ".staticlensignore"))
+
+
+def test_watch_rescans_when_an_ignore_file_changes(git_tree):
+    build(git_tree)
+    session = WatchSession(git_tree.path, debounce=0)
+    session.initial_scan()
+    assert len(session.results()["results"]) == 4
+
+    ignore_file = git_tree.write(".staticlensignore", "a.py\n")
+    session.notify(ignore_file)
+    session.process_pending()
+    session.process_pending()
+
+    assert paths(session.results()) == ["b.py", "skipme/d.py", "sub/c.py", "sub/gen_keep.py"]
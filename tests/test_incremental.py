@@ -0,0 +1,57 @@
+from conftest import comparable
+
+from core.file_classifier import FileClassifier
+from engine.analyzer import analyze_directory
+from engine.incremental import analyze_changes
+
+PY = "def f(x):\n    if x:\n        return 1\n    return 2\n"
+
+
+def test_merged_results_sorted_like_full_scan(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write("b.py", PY)
+    base = git_tree.commit()
+    base_output = analyze_directory(git_tree.path, workers=1)
+
+    # a.py is re-analyzed and must not be appended after the reused b.py
+    git_tree.write("a.py", PY + "\ndef g(y):\n    return y or 1\n")
+    git_tree.commit()
+
+    merged = analyze_changes(git_tree.path, base, base_output=base_output, workers=1)
+    full = analyze_directory(git_tree.path, workers=1)
+    assert [path for path, _ in comparable(merged)] == ["a.py", "b.py"]
+    assert comparable(merged) == comparable(full)
+
+
+def test_working_tree_includes_untracked_files(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write(".gitignore", "ignored.py\n")
+    base = git_tree.commit()
+    base_output = analyze_directory(git_tree.path, workers=1)
+
+    git_tree.write("new.py", PY)
+    git_tree.write("ignored.py", PY)
+
+    merged = analyze_changes(git_tree.path, base, head=None, base_output=base_output, workers=1)
+    assert [path for path, _ in comparable(merged)] == ["a.py", "new.py"]
+    assert {"status": "A", "old_path": None, "new_path": "new.py"} in merged["changed_files"]
+
+
+def test_classifier_skips_are_carried_through(git_tree):
+    classifier = FileClassifier()
+    git_tree.write("a.py", PY)
+    git_tree.write("vendor/lib.py", PY)
+    base = git_tree.commit()
+    base_output = analyze_directory(git_tree.path, workers=1, classifier=classifier)
+    assert len(base_output["skipped_files"]) == 1
+
+    git_tree.write("vendor/other.py", PY)
+    git_tree.write("b.py", PY)
+    git_tree.commit()
+
+    merged = analyze_changes(git_tree.path, base, base_output=base_output, workers=1, classifier=classifier)
+    full = analyze_directory(git_tree.path, workers=1, classifier=classifier)
+    assert comparable(merged) == comparable(full)
+    assert merged["skipped_files"] == full["skipped_files"]
+    assert merged["total_files_scanned"] == full["total_files_scanned"]
+    assert merged["total_files_analyzed"] == full["total_files_analyzed"]
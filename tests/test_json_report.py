@@ -0,0 +1,24 @@
+import io
+
+from engine.analyzer import analyze_directory, iter_analyze_directory
+from reports.json_report import iter_ndjson_report, write_ndjson_report
+
+
+def test_ndjson_round_trip(sample_dir, tmp_path):
+    path = str(tmp_path / "report.ndjson")
+    count = write_ndjson_report(iter_analyze_directory(sample_dir, workers=1), path)
+
+    records = list(iter_ndjson_report(path))
+    assert count == len(records)
+    key = lambda result: result["file"]
+    assert sorted(records, key=key) == sorted(analyze_directory(sample_dir, workers=1)["results"], key=key)
+
+
+def test_ndjson_keeps_each_record_on_one_line():
+    output = io.StringIO()
+    records = [{"file": "a.py", "metrics": {"n": 1}}, {"file": "b\nc.py", "error": "x"}]
+
+    assert write_ndjson_report(iter(records), output) == 2
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 2
+    assert output.getvalue().endswith("\n")
@@ -0,0 +1,95 @@
+import engine.analyzer as analyzer_module
+from conftest import comparable
+
+from core.metric_cache import MetricCache
+from engine.analyzer import FINGERPRINT_MODULES, analyze_directory, source_digest
+
+
+def analyze(sample_dir, cache, **options):
+    output = analyze_directory(sample_dir, workers=1, cache=cache, **options)
+    return output, dict(output["cache"])
+
+
+def test_hits_after_first_run(sample_dir, tmp_path):
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        first, stats = analyze(sample_dir, cache)
+        assert (stats["hits"], stats["misses"]) == (0, first["total_files_analyzed"])
+
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        second, stats = analyze(sample_dir, cache)
+        assert (stats["hits"], stats["misses"]) == (first["total_files_analyzed"], 0)
+    assert comparable(second) == comparable(first)
+
+
+def test_worker_processes_key_and_look_up_files(sample_dir, tmp_path):
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        first = analyze_directory(sample_dir, workers=2, cache=cache)
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        second = analyze_directory(sample_dir, workers=2, cache=cache)
+
+    assert second["cache"]["hits"] == second["total_files_analyzed"]
+    assert comparable(second) == comparable(first) == comparable(analyze_directory(sample_dir, workers=1))
+
+
+def test_changed_file_metric_set_and_version_miss(sample_dir, tmp_path, monkeypatch):
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        output, before = analyze(sample_dir, cache)
+        total = output["total_files_analyzed"]
+
+        def misses(**options):
+            nonlocal before
+            _, stats = analyze(sample_dir, cache, **options)
+            count, before = stats["misses"] - before["misses"], stats
+            return count
+
+        with open(output["results"][0]["file"], "a") as f:
+            f.write("\n// edited\n# edited\n")
+        assert misses() == 1
+        assert misses() == 0
+        assert misses(metrics=["cyclomatic"]) == total
+
+        monkeypatch.setattr(analyzer_module, "CACHE_VERSION", analyzer_module.CACHE_VERSION + 1)
+        assert misses() == total
+
+
+def test_fingerprint_follows_supporting_modules(tmp_path, monkeypatch):
+    assert {"metrics.class_model", "engine.node_taxonomy"} <= set(FINGERPRINT_MODULES)
+
+    module = tmp_path / "fingerprinted_helper.py"
+    module.write_text("COUNT = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    before = source_digest(["fingerprinted_helper"])
+
+    module.write_text("COUNT = 2\n")
+    assert source_digest(["fingerprinted_helper"]) != before
+
+
+def test_evicts_least_recently_used(tmp_path):
+    with MetricCache(str(tmp_path), max_bytes=1000) as cache:
+        for i in range(5):
+            cache.put(f"k{i}", {"v": "x" * 190})
+        # k0 is the oldest entry but used again, so k1 and k2 go first
+        assert cache.get("k0") is not None
+        cache.put("k5", {"v": "x" * 190})
+
+        assert cache.evictions == 2
+        assert [cache.get(f"k{i}") is not None for i in range(6)] == [True, False, False, True, True, True]
+        assert cache.total_bytes() <= 900
+
+
+def test_size_is_shared_between_instances(tmp_path):
+    first = MetricCache(str(tmp_path), max_bytes=1000)
+    second = MetricCache(str(tmp_path), max_bytes=1000)
+    try:
+        for i in range(10):
+            first.put(f"a{i}", {"v": "x" * 50})
+            first.flush()
+            second.put(f"b{i}", {"v": "x" * 50})
+            second.flush()
+
+        # Each instance alone wrote less than max_bytes, together more
+        assert first.evictions + second.evictions > 0
+        assert first.total_bytes() == second.total_bytes() <= 1000
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from conftest import SAMPLES
+
+from engine.analyzer import detect_language
+from engine.metric_manager import MetricManager
+from engine.parser_manager import ParserManager
+from metrics.base_metric import MetricVisitor
+
+
+def parse_sample(tmp_path, language):
+    extension, source = SAMPLES[language]
+    path = str(tmp_path / f"sample.{extension}")
+    with open(path, "w") as f:
+        f.write(source)
+    return ParserManager.get_parser(detect_language(path))(path), path
+
+
+class NodeLog(MetricVisitor):
+    """Walked visitor recording enter/leave events of the types it subscribes to."""
+
+    wants_leave = True
+
+    def __init__(self, node_types=None):
+        self.node_types = node_types
+        self.events = []
+
+    def enter(self, node):
+        self.events.append(("enter", node.type, node.start_byte))
+
+    def leave(self, node):
+        self.events.append(("leave", node.type, node.start_byte))
+
+
+def recursive_log(node, node_types, events):
+    subscribed = node_types is None or node.type in node_types
+    if subscribed:
+        events.append(("enter", node.type, node.start_byte))
+    for child in node.children:
+        recursive_log(child, node_types, events)
+    if subscribed:
+        events.append(("leave", node.type, node.start_byte))
+    return events
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_shared_run_matches_each_metric_alone(tmp_path, language):
+    tree, path = parse_sample(tmp_path, language)
+
+    alone = {}
+    for metric in MetricManager.registered():
+        alone.update(metric.analyze(tree, path, language))
+
+    assert MetricManager.run_all(tree, path, language) == alone
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_shared_walk_matches_recursive_traversal(tmp_path, language):
+    tree, _ = parse_sample(tmp_path, language)
+    subsets = [None, {"identifier"}, {"identifier", "binary_expression", "return_statement"}]
+    visitors = [NodeLog(node_types) for node_types in subsets]
+
+    MetricManager.walk(tree, visitors, language)
+
+    for visitor, node_types in zip(visitors, subsets):
+        assert visitor.events == recursive_log(tree.root_node, node_types, [])
+        assert visitor.events
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_timed_run_matches_untimed(tmp_path, language):
+    tree, path = parse_sample(tmp_path, language)
+    timings = {}
+
+    assert MetricManager.run_all(tree, path, language, timings=timings) == MetricManager.run_all(tree, path, language)
+    assert set(timings) == {"capture", "metric:cyclomatic", "metric:halstead", "metric:oop"}
+    assert all(entry["wall_ms"] >= 0 and entry["cpu_ms"] >= 0 for entry in timings.values())
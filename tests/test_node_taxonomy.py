@@ -0,0 +1,97 @@
+import pytest
+from conftest import SAMPLES
+
+from benchmarks.corpus import PROFILES, generate_file
+from engine.analyzer import detect_language
+from engine.node_taxonomy import BINDING, DECLARATOR, KIND_FLAGS, METHOD, NAMED, NodeTaxonomy
+from engine.parser_manager import ParserManager
+from metrics.class_model import is_field
+
+LANGUAGES = sorted(SAMPLES)
+
+# The string sets and tests the metrics used before the taxonomy
+OLD_METHOD_NODES = {"method_declaration", "method_definition", "function_definition", "constructor_declaration"}
+
+FIELDS = {
+    "java": "class A {\n  int a, b = 2;\n  Runnable r = () -> {};\n  static final String S = \"s\";\n"
+            "  int[] xs;\n  java.util.function.Function<Integer, Integer> f = x -> x;\n}\n",
+    "cpp": "template <typename T>\nclass A {\n  int a, *b, &c;\n  int (*callback)(int);\n  void f(int);\n"
+           "  virtual int g() const = 0;\n  static constexpr int n = 3;\n  std::function<int(int)> h;\n"
+           "  auto l = [](int x) { return x; };\n  A(int);\n  ~A();\n  operator bool() const;\n"
+           "  T values[4];\n  friend void swap(A&, A&);\n};\n",
+}
+
+
+def taxonomy(language):
+    ParserManager.get_parser(language)
+    return ParserManager.get_taxonomy(language)
+
+
+def parse(tmp_path, language, source, index=0):
+    path = str(tmp_path / f"source{index}.{SAMPLES[language][0]}")
+    with open(path, "w") as f:
+        f.write(source)
+    return ParserManager.get_parser(detect_language(path))(path)
+
+
+def nodes(node):
+    yield node
+    for child in node.children:
+        yield from nodes(child)
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_flags_match_the_string_checks_they_replace(language):
+    table = taxonomy(language)
+    # Hidden kinds (supertypes, helper rules) never appear in a tree
+    visible = [kind for kind, kind_type in enumerate(table.types) if kind_type and not kind_type.startswith("_")]
+    assert visible
+
+    for kind in visible:
+        kind_type, flags = table.types[kind], table.flags[kind]
+        assert bool(flags & DECLARATOR) == kind_type.endswith("declarator"), kind_type
+        assert bool(flags & BINDING) == (kind_type == "variable_declarator"), kind_type
+        assert bool(flags & METHOD) == (kind_type in OLD_METHOD_NODES), kind_type
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_kinds_and_lookups(language):
+    table = taxonomy(language)
+    for flag, kind_types in KIND_FLAGS.items():
+        assert {table.types[kind] for kind in table.kinds(flag)} == {
+            kind_type for kind_type in kind_types if kind_type in table.types
+        }
+
+    named = table.kinds(NAMED)
+    assert named and all(table.types[kind] for kind in named)
+    # ERROR nodes have an id past the grammar's kinds
+    assert table.flags_of(len(table)) == NAMED
+    assert table.type_of(len(table)) == "ERROR"
+
+
+def test_taxonomy_is_built_once_per_grammar(tmp_path):
+    table = taxonomy("python")
+    assert taxonomy("python") is table
+
+    tree = parse(tmp_path, "python", SAMPLES["python"][1])
+    rebuilt = NodeTaxonomy(tree.language)
+    assert rebuilt.types == table.types and rebuilt.flags == table.flags
+
+
+@pytest.mark.parametrize("language", ["java", "cpp"])
+def test_field_check_matches_substring_check(tmp_path, language):
+    table = taxonomy(language)
+    sources = [SAMPLES[language][1], FIELDS[language]]
+    sources += [generate_file(language, "classes", 0, scale=0.05)]
+
+    checked = 0
+    for index, source in enumerate(sources):
+        root = parse(tmp_path, language, source, index).root_node
+        for node in nodes(root):
+            if node.type != "field_declaration":
+                continue
+            old = not any("function" in child.type or child.type in OLD_METHOD_NODES for child in node.children)
+            assert is_field(node, table) == old, node.text
+            checked += 1
+
+    assert checked >= 8
@@ -0,0 +1,57 @@
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+import engine.parser_manager as parser_manager
+from core.file_scanner import FileScanner
+from engine.analyzer import analyzable_extensions, detect_language
+from engine.parser_manager import ParserManager
+
+PLUGIN = '''
+from engine.parser_manager import ParserManager
+
+def parse(file_path):
+    return "tree"
+
+ParserManager.register("toy", parse, extensions=(".toy",))
+'''
+
+
+@pytest.fixture
+def toy_plugin(tmp_path, monkeypatch):
+    (tmp_path / "toy_plugin_parser.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    entry_points = {
+        parser_manager.PARSER_ENTRY_POINT_GROUP: [
+            EntryPoint("toy", "toy_plugin_parser", parser_manager.PARSER_ENTRY_POINT_GROUP),
+        ],
+        parser_manager.EXTENSION_ENTRY_POINT_GROUP: [
+            EntryPoint("toy", "toy", parser_manager.EXTENSION_ENTRY_POINT_GROUP),
+            EntryPoint("ty", "toy", parser_manager.EXTENSION_ENTRY_POINT_GROUP),
+        ],
+    }
+    monkeypatch.setattr(parser_manager, "iter_entry_points", lambda group: entry_points.get(group, []))
+    for name in ("registry", "source_parsers", "queries", "taxonomies", "declared", "extensions"):
+        monkeypatch.setattr(ParserManager, name, dict(getattr(ParserManager, name)))
+    monkeypatch.setattr(ParserManager, "_plugins_loaded", False)
+    yield
+    sys.modules.pop("toy_plugin_parser", None)
+
+
+def test_extensions_resolve_without_importing_plugins(toy_plugin):
+    assert detect_language("a.unknown") is None
+    assert detect_language("b.toy") == "toy"
+    assert detect_language("c.TY") == "toy"
+    assert "toy_plugin_parser" not in sys.modules
+
+    assert ParserManager.get_parser("toy")("d.toy") == "tree"
+    assert "toy_plugin_parser" in sys.modules
+
+
+def test_plugin_extensions_are_analyzable(toy_plugin, monkeypatch):
+    monkeypatch.setattr(FileScanner, "LANGUAGE_MAP", dict(FileScanner.LANGUAGE_MAP))
+    extensions = analyzable_extensions()
+    assert {".toy", ".ty", ".py", ".c"} <= set(extensions)
+    assert "toy_plugin_parser" not in sys.modules
@@ -0,0 +1,51 @@
+import pytest
+from conftest import SAMPLES
+
+from engine.analyzer import analyze_source
+from engine.metric_manager import MetricManager
+from engine.parser_manager import ParserManager
+
+# Halstead (n1, n2, N1, N2) and OOP (classes, methods, attributes,
+# inheritance) of the samples, as the per-metric tree walks counted them
+# before the query packs
+HALSTEAD = {
+    "python": (20, 13, 61, 43),
+    "javascript": (28, 10, 102, 34),
+    "java": (28, 12, 81, 32),
+    "cpp": (28, 12, 84, 29),
+}
+OOP = {
+    "python": (2, 2, 2, 0),
+    "javascript": (1, 2, 2, 1),
+    "java": (1, 2, 2, 1),
+    "cpp": (1, 1, 2, 1),
+}
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_pack_captures_what_the_metrics_consume(language):
+    ParserManager.get_parser(language)
+    query = ParserManager.get_query(language)
+    names = {query.capture_name(index) for index in range(query.capture_count)}
+
+    for metric in MetricManager.registered():
+        captures = metric.visitor(None, "", language).captures
+        if metric.name == "oop":
+            # Inheritance, fields, __init__ and self/this attributes are per language
+            captures = {"class", "method"}
+        assert captures <= names, metric.name
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_captured_metrics_match_tree_walks(language):
+    metrics = analyze_source(SAMPLES[language][1], language)["metrics"]
+    halstead, oop = metrics["halstead"], metrics["oop_metrics"]
+
+    assert (
+        halstead["n1_distinct_operators"], halstead["n2_distinct_operands"],
+        halstead["N1_total_operators"], halstead["N2_total_operands"],
+    ) == HALSTEAD[language]
+    assert (
+        oop["number_of_classes"], oop["number_of_methods"],
+        oop["number_of_attributes"], oop["inheritance_relationships"],
+    ) == OOP[language]
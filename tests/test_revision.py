@@ -0,0 +1,89 @@
+import os
+
+from conftest import comparable
+from git import Repo
+
+from core.metric_cache import MetricCache
+from engine.analyzer import analyze_directory
+from engine.incremental import analyze_changes
+from engine.revision import analyze_revision, iter_revision_files
+
+PY = "def f(x):\n    if x:\n        return 1\n    return 2\n"
+
+
+def test_matches_checkout_with_repository_relative_paths(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write("pkg/b.js", "function g(y) { return y && 1; }\n")
+    git_tree.write("README.md", "not analyzed\n")
+    sha = git_tree.commit()
+
+    output = analyze_revision(git_tree.path, "HEAD", workers=1)
+    assert output["root_path"] == ""
+    assert output["repo_path"] == git_tree.path
+    assert output["revision"] == sha
+    assert [result["file"] for result in output["results"]] == ["a.py", "pkg/b.js"]
+    assert comparable(output) == comparable(analyze_directory(git_tree.path, workers=1))
+
+    blobs = {path: blob.hexsha for path, _, blob in iter_revision_files(git_tree.repo, sha)}
+    assert {result["file"]: result["blob"] for result in output["results"]} == blobs
+
+
+def test_reads_the_revision_not_the_working_tree(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write("generated/x.py", PY)
+    git_tree.write(".staticlensignore", "generated/\n")
+    old = git_tree.commit()
+
+    git_tree.write(".staticlensignore", "")
+    git_tree.write("a.py", PY + PY.replace("f(", "g("))
+    git_tree.remove("generated/x.py")
+    git_tree.write("new.py", PY)
+    git_tree.commit()
+    # Uncommitted edits are not part of any revision
+    git_tree.write(".staticlensignore", "*.py\n")
+
+    assert [result["file"] for result in analyze_revision(git_tree.path, old, workers=1)["results"]] == ["a.py"]
+    head = analyze_revision(git_tree.path, "HEAD", workers=1)
+    assert [result["file"] for result in head["results"]] == ["a.py", "new.py"]
+    assert len(head["results"][0]["metrics"]["cyclomatic_complexity"]["per_function"]) == 2
+
+
+def test_symlinks_are_skipped(git_tree):
+    git_tree.write("a.py", PY)
+    os.symlink("a.py", os.path.join(git_tree.path, "link.py"))
+    os.symlink("a.py", os.path.join(git_tree.path, ".gitignore"))
+    git_tree.commit()
+
+    assert [path for path, _, _ in iter_revision_files(git_tree.repo, "HEAD")] == ["a.py"]
+
+
+def test_bare_repository_and_blob_cache(git_tree, tmp_path):
+    git_tree.write("a.py", PY)
+    git_tree.write("b.py", PY)
+    git_tree.commit()
+    bare = str(tmp_path / "bare.git")
+    Repo.clone_from(git_tree.path, bare, bare=True)
+
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        first = analyze_revision(bare, workers=1, cache=cache)
+        # a.py and b.py are the same blob, so it is only analyzed once
+        assert (first["cache"]["misses"], first["cache"]["hits"]) == (1, 1)
+    with MetricCache(str(tmp_path / "cache")) as cache:
+        second = analyze_revision(bare, workers=1, cache=cache)
+        assert (second["cache"]["misses"], second["cache"]["hits"]) == (0, 2)
+
+    assert first["repo_path"] == bare
+    assert comparable(second) == comparable(first) == comparable(analyze_revision(git_tree.path, workers=1))
+
+
+def test_revision_output_merges_with_working_tree_changes(git_tree):
+    git_tree.write("a.py", PY)
+    git_tree.write("b.py", PY)
+    base = git_tree.commit()
+    base_output = analyze_revision(git_tree.path, base, workers=1)
+
+    git_tree.write("b.py", PY + PY.replace("f(", "g("))
+    git_tree.commit()
+
+    merged = analyze_changes(git_tree.path, base, base_output=base_output, workers=1)
+    assert comparable(merged) == comparable(analyze_directory(git_tree.path, workers=1))
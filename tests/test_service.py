@@ -0,0 +1,199 @@
+import asyncio
+import http.client
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+import pytest
+from conftest import SAMPLES, GitTree, write_samples
+
+from staticlens.service import AnalysisService
+
+
+class Client:
+    """A running AnalysisService on an event loop thread, and requests to it."""
+
+    def __init__(self, **options):
+        self.loop = asyncio.new_event_loop()
+        self.service = AnalysisService(workers=1, **options)
+        self.loop.run_until_complete(self.service.start())
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.service.handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.call(self.service.close)
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(30)
+        self.loop.close()
+
+    def call(self, function, *args):
+        """Run a coroutine function or plain function on the service's loop."""
+        async def run():
+            result = function(*args)
+            return await result if asyncio.iscoroutine(result) else result
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result(60)
+
+    def request(self, method, path, body=None, content_type="application/json", raw=False):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        if isinstance(body, dict):
+            body = json.dumps(body)
+        connection.request(method, path, body=body, headers={"Content-Type": content_type})
+        response = connection.getresponse()
+        data = response.read()
+        connection.close()
+        return response.status, data if raw else json.loads(data)
+
+    def wait(self, job_id):
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            status, job = self.request("GET", f"/jobs/{job_id}")
+            if job["status"] in ("done", "failed", "cancelled"):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    def run_job(self, body):
+        status, job = self.request("POST", "/jobs", body)
+        assert status == 202, job
+        job = self.wait(job["id"])
+        assert job["status"] == "done", job
+        return self.request("GET", f"/jobs/{job['id']}/result")[1]
+
+
+@pytest.fixture
+def client(tmp_path):
+    clients = []
+
+    def start(**options):
+        options.setdefault("allowed_roots", [str(tmp_path)])
+        clients.append(Client(**options))
+        return clients[-1]
+
+    yield start
+    for started in clients:
+        started.close()
+
+
+def test_directory_job_result_and_events(client, sample_dir):
+    service = client()
+    result = service.run_job({"target": sample_dir, "metrics": ["cyclomatic"]})
+
+    assert result["root_path"] == os.path.realpath(sample_dir)
+    assert result["total_files_scanned"] == result["total_files_analyzed"] == 12
+    assert all(set(r["metrics"]) == {"cyclomatic_complexity"} for r in result["results"])
+
+    status, data = service.request("GET", f"/jobs/{result['job']}/events", raw=True)
+    events = [json.loads(line) for line in data.decode().splitlines()]
+    assert status == 200
+    assert [event["event"] for event in events] == ["result"] * 12 + ["end"]
+    assert events[-1]["job"]["files_done"] == 12
+
+
+def test_submissions_coalesce_and_cancel(client, sample_dir):
+    service = client(max_jobs=1)
+    # Hold the only job slot, so the job stays queued until cancelled
+    service.call(service.service._job_slots.acquire)
+
+    status, job = service.request("POST", "/jobs", {"target": sample_dir})
+    first = job["id"]
+    assert status == 202 and job["status"] == "queued"
+    status, job = service.request("POST", "/jobs", {"target": sample_dir + "/"})
+    assert status == 200 and job["coalesced"] and job["id"] == first
+    assert service.request("GET", f"/jobs/{first}")[1]["requests"] == 2
+
+    # Other options make another job
+    status, other = service.request("POST", "/jobs", {"target": sample_dir, "classify": True})
+    assert status == 202 and other["id"] != first
+
+    status, job = service.request("DELETE", f"/jobs/{first}")
+    assert status == 200
+    assert service.wait(first)["status"] == "cancelled"
+    assert service.request("GET", f"/jobs/{first}/result")[0] == 410
+
+    # Deleting a finished job forgets it
+    service.request("DELETE", f"/jobs/{first}")
+    assert service.request("GET", f"/jobs/{first}")[0] == 404
+
+    service.call(service.service._job_slots.release)
+    assert service.wait(other["id"])["status"] == "done"
+
+
+def archive_bytes(kind):
+    buffer = io.BytesIO()
+    files = {f"src/{language}_sample.{extension}": source for language, (extension, source) in SAMPLES.items()}
+    if kind == "zip":
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, source in files.items():
+                archive.writestr(name, source)
+    else:
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for name, source in files.items():
+                data = source.encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_upload(client, kind):
+    service = client()
+    status, job = service.request("POST", "/jobs?metrics=halstead&name=sample", archive_bytes(kind),
+                                  content_type="application/octet-stream")
+    assert status == 202 and job["kind"] == "upload" and job["target"] == "sample"
+
+    job = service.wait(job["id"])
+    assert job["status"] == "done", job
+    result = service.request("GET", f"/jobs/{job['id']}/result")[1]
+    assert sorted(r["file"] for r in result["results"]) == sorted(
+        f"src/{language}_sample.{extension}" for language, (extension, _) in SAMPLES.items()
+    )
+    assert all(set(r["metrics"]) == {"halstead"} for r in result["results"])
+
+
+def test_file_repository_through_mirror_and_cache(client, tmp_path):
+    origin = GitTree(tmp_path / "origin")
+    write_samples(origin.path, copies=2)
+    head = origin.commit()
+    url = f"file://{origin.path}"
+
+    service = client(mirror_dir=str(tmp_path / "mirrors"), cache_dir=str(tmp_path / "cache"))
+    first = service.run_job({"target": url})
+    assert first["repo_url"] == url and first["revision"] == head
+    assert first["total_files_analyzed"] == 8
+    assert all(len(r["blob"]) == 40 and "metrics" in r for r in first["results"])
+
+    # Copies share blobs; a second job finds every blob in the cache
+    second = service.run_job({"target": url})
+    assert [r["metrics"] for r in second["results"]] == [r["metrics"] for r in first["results"]]
+    cache = service.request("GET", "/health")[1]["cache"]
+    assert (cache["misses"], cache["hits"]) == (8, 8)
+
+
+def test_targets_outside_the_roots_are_refused(client, tmp_path, sample_dir):
+    service = client(allowed_roots=[sample_dir])
+    outside = str(tmp_path)
+
+    for target in (outside, f"{sample_dir}/../", f"file://{outside}", f"file://localhost{outside}"):
+        status, body = service.request("POST", "/jobs", {"target": target})
+        assert status == 403, (target, body)
+
+    assert service.request("POST", "/jobs", {"target": sample_dir})[0] == 202
+    assert AnalysisService().allowed_roots == [os.path.realpath(os.getcwd())]
+
+
+def test_bad_requests(client, sample_dir):
+    service = client()
+    assert service.request("POST", "/jobs", {})[0] == 400
+    assert service.request("POST", "/jobs", {"target": sample_dir, "metrics": ["nonsense"]})[0] == 400
+    assert service.request("POST", "/jobs", b"[1]")[0] == 400
+    assert service.request("GET", "/jobs/nope")[0] == 404
+    assert service.request("PUT", "/jobs")[0] == 405
+    assert service.request("GET", "/health")[1]["status"] == "ok"
@@ -0,0 +1,52 @@
+import io
+import mmap
+
+import pytest
+from conftest import SAMPLES
+
+from core.source_loader import as_buffer, load_source
+from engine.analyzer import analyze_source, analyzer
+
+SOURCE = SAMPLES["python"][1]
+
+
+@pytest.mark.parametrize("make", [
+    lambda text: text,
+    lambda text: text.encode("utf-8"),
+    lambda text: bytearray(text.encode("utf-8")),
+    lambda text: memoryview(text.encode("utf-8")),
+    lambda text: io.BytesIO(text.encode("utf-8")),
+], ids=["str", "bytes", "bytearray", "memoryview", "file"])
+def test_analyze_source_accepts_buffers(tmp_path, make):
+    path = tmp_path / "sample.py"
+    path.write_text(SOURCE)
+
+    result = analyze_source(make(SOURCE), name="sample.py")
+    assert result["language"] == "python"
+    assert result["metrics"] == analyzer(str(path))["metrics"]
+
+
+def test_analyze_source_language_and_name():
+    assert analyze_source(SOURCE, "python")["file"] is None
+    assert analyze_source(SOURCE, name="x.unknown") is None
+    assert analyze_source(SOURCE) is None
+
+
+def test_large_files_are_mapped(tmp_path):
+    path = tmp_path / "big.py"
+    path.write_text(SOURCE * 20)
+    size = path.stat().st_size
+
+    assert isinstance(load_source(str(path), mmap_min_bytes=size), mmap.mmap)
+    assert isinstance(load_source(str(path), mmap_min_bytes=size + 1), bytes)
+    assert isinstance(load_source(str(path), mmap_min_bytes=None), bytes)
+
+    mapped = load_source(str(path), mmap_min_bytes=1)
+    assert as_buffer(mapped) is mapped
+    assert analyze_source(mapped, "python")["metrics"] == analyze_source(SOURCE * 20, "python")["metrics"]
+
+
+def test_empty_file_is_read(tmp_path):
+    path = tmp_path / "empty.py"
+    path.write_text("")
+    assert load_source(str(path), mmap_min_bytes=0) == b""
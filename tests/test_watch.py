@@ -0,0 +1,82 @@
+import pytest
+
+from engine.analyzer import analyzer
+from engine.metric_manager import MetricManager
+from engine.watch import WatchSession
+from metrics.base_metric import MetricVisitor, VisitorMetric
+
+JAVA = (
+    "class C extends B {\n"
+    "  int z;\n"
+    "  int a(int x) { if (x > 0 && y) { return x + 1; } return 2; }\n"
+    "  int m(int q) { for (int i = 0; i < q; i++) { if (i % 2 == 0 || i > 5) { q += i; } } return q; }\n"
+    "}\n"
+    "class D { int b(int y) { while (y > 0) { y = y - 1; } return y * 3; } }\n"
+)
+
+JS = (
+    "function a(x) ){\n"
+    "  if (x && y) { return x + 1; }\n"
+    "  return 2;\n"
+    "}\n"
+    "class C extends B {\n"
+    "  constructor(z) { this.z = z; }\n"
+    "  m(q) { for (let i = 0; i < q; i++) { if (i % 2 || i > 5) { q += i; } } return q; }\n"
+    "}\n"
+    "const f = (u) => u * 2;\n"
+    "function b(y) { while (y > 0) { y = y - 1; } return y * 3; }\n"
+)
+
+
+@pytest.mark.parametrize("name, source, old, new", [
+    # Introduces a syntax error into a clean file
+    ("f.java", JAVA, "{ if (i % 2", "{ % 2"),
+    # Edits a file that already has one
+    ("f.js", JS, "u * 2;\nfunction", "u * 2ction"),
+], ids=["introduce-error", "edit-with-error"])
+def test_edit_with_syntax_error_matches_fresh_analysis(tmp_path, name, source, old, new):
+    path = tmp_path / name
+    path.write_text(source)
+    session = WatchSession(str(tmp_path))
+    session.initial_scan()
+
+    path.write_text(source.replace(old, new, 1))
+    result = session.update(str(path))
+
+    assert result["metrics"] == analyzer(str(path))["metrics"]
+
+
+class FunctionCount(MetricVisitor):
+    """Captures-driven but not mergeable: watch mode must recompute it whole."""
+
+    captures = {"function"}
+
+    def __init__(self):
+        self.count = 0
+
+    def consume(self, captures):
+        self.count += len(captures.get("function", ()))
+
+    def result(self):
+        return {"function_count": self.count}
+
+
+class FunctionCountMetric(VisitorMetric):
+    name = "function_count"
+
+    def visitor(self, tree, file_path, language):
+        return FunctionCount()
+
+
+def test_unmergeable_metric_is_recomputed_whole(tmp_path, monkeypatch):
+    monkeypatch.setattr(MetricManager, "_metrics", MetricManager.registered() + [FunctionCountMetric()])
+    path = tmp_path / "f.js"
+    path.write_text(JS.replace("a(x) )", "a(x)"))
+    session = WatchSession(str(tmp_path))
+    session.initial_scan()
+
+    path.write_text(path.read_text() + "function c() { return 1; }\n")
+    result = session.update(str(path))
+
+    assert result["metrics"]["function_count"] == 6
+    assert result["metrics"] == analyzer(str(path))["metrics"]